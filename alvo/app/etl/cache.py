@@ -0,0 +1,186 @@
+import hashlib
+import os
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+
+from app.config.config import settings
+
+CACHE_SUFFIX = '.arrow'
+
+# Metadado gravado no schema: quando o intervalo foi buscado na API
+WRITTEN_AT_KEY = b'written_at'
+
+# Tipos fixos por coluna: páginas JSON (strings) e Arrow ficam iguais no cache
+COLUMN_TYPES = {
+    'id': pa.int64(),
+    'timestamp': pa.timestamp('us'),
+    'asset_id': pa.int32(),
+}
+
+
+def to_table(page: list[dict[str, Any]] | pa.Table) -> pa.Table:
+    """
+    Normaliza uma página (lista de dicts ou tabela Arrow) para o schema do
+    cache: id e asset_id inteiros, timestamp e métricas em float64.
+    """
+    table = page if isinstance(page, pa.Table) else pa.Table.from_pylist(page)
+    schema = pa.schema([
+        (name, COLUMN_TYPES.get(name, pa.float64())) for name in table.column_names
+    ])
+    return table.cast(schema)
+
+
+@dataclass
+class RawCache:
+    """
+    Cache local dos dados brutos extraídos, um arquivo Arrow IPC por intervalo.
+    Os arquivos são lidos via memory map. Intervalos já fechados quando foram
+    buscados não expiram; intervalos "abertos" (o dia de hoje) valem por
+    `open_ttl_seconds`. Acima de `max_bytes` os menos usados são removidos (LRU).
+    """
+
+    directory: Path = field(default_factory=lambda: Path(settings.RAW_CACHE_DIR))
+    max_bytes: int = settings.RAW_CACHE_MAX_MB * 1024 * 1024
+    open_ttl_seconds: int = settings.RAW_CACHE_OPEN_TTL_SECONDS
+    # Ignora o que já existe no cache e regrava com dados novos da API
+    refresh: bool = False
+    namespace: str = settings.SOURCE_API_URL
+    hits: int = 0
+    misses: int = 0
+
+    def __post_init__(self):
+        self.directory = Path(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None,
+        asset_ids: list[int] | None = None,
+    ) -> Path:
+        key = '|'.join([
+            self.namespace,
+            start_time.isoformat(),
+            end_time.isoformat(),
+            ','.join(sorted(metrics or [])),
+            ','.join(str(a) for a in sorted(set(asset_ids or []))),
+        ])
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        name = f'{start_time:%Y%m%dT%H%M%S}_{end_time:%Y%m%dT%H%M%S}_{digest}'
+        return self.directory / f'{name}{CACHE_SUFFIX}'
+
+    def _is_fresh(self, table: pa.Table, end_time: datetime) -> bool:
+        metadata = table.schema.metadata or {}
+        written_at = datetime.fromisoformat(metadata[WRITTEN_AT_KEY].decode())
+        if written_at > end_time:
+            # Intervalo já estava fechado quando foi buscado
+            return True
+        age = (datetime.now() - written_at).total_seconds()
+        return age < self.open_ttl_seconds
+
+    def get(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None = None,
+        asset_ids: list[int] | None = None,
+    ) -> pa.Table | None:
+        """
+        Retorna a tabela do intervalo (memory-mapped) ou None se não houver
+        entrada válida.
+        """
+        path = self.path(start_time, end_time, metrics, asset_ids)
+        if self.refresh or not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            # Arquivo removido pela eviction ou corrompido: busca de novo
+            self.misses += 1
+            return None
+
+        if not self._is_fresh(table, end_time):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Atualiza o mtime: é a referência de uso para o LRU
+        os.utime(path)
+        self.hits += 1
+        return table
+
+    async def store(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None,
+        pages: AsyncIterator[list[dict[str, Any]] | pa.Table],
+        asset_ids: list[int] | None = None,
+    ) -> AsyncIterator[list[dict[str, Any]] | pa.Table]:
+        """
+        Repassa as páginas da API gravando-as em disco conforme chegam.
+        A entrada só é publicada se o intervalo for lido até o fim.
+        """
+        path = self.path(start_time, end_time, metrics, asset_ids)
+        tmp_path = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        written_at = datetime.now().isoformat().encode()
+        writer = None
+        completed = False
+        try:
+            async for page in pages:
+                table = to_table(page)
+                if writer is None:
+                    schema = table.schema.with_metadata({WRITTEN_AT_KEY: written_at})
+                    writer = pa.ipc.new_file(str(tmp_path), schema)
+                writer.write_table(table)
+                yield page
+            completed = True
+        finally:
+            if writer is not None:
+                writer.close()
+                if completed:
+                    tmp_path.replace(path)
+                    self.evict()
+                else:
+                    tmp_path.unlink(missing_ok=True)
+
+    def evict(self):
+        """
+        Remove as entradas menos usadas até o cache caber em `max_bytes`.
+        """
+        entries = []
+        for path in self.directory.glob(f'*{CACHE_SUFFIX}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def summary(self) -> str:
+        return f'{self.hits} hits, {self.misses} misses ({self.directory})'
+
+
+def open_cache(enabled: bool = True, refresh: bool = False) -> RawCache | None:
+    """
+    Cache configurado pelo settings, ou None se desativado (--no-cache).
+    """
+    if not (enabled and settings.RAW_CACHE_ENABLED):
+        return None
+    return RawCache(refresh=refresh)
@@ -0,0 +1,100 @@
+import time
+import zlib
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+import httpx
+import zstandard
+
+
+@dataclass
+class TransferStats:
+    """Bytes na rede x bytes decodificados das respostas da API Fonte."""
+
+    responses: int = 0
+    wire_bytes: int = 0
+    decoded_bytes: int = 0
+    decode_seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.decoded_bytes / self.wire_bytes if self.wire_bytes else 0.0
+
+    def summary(self) -> str:
+        return (
+            f'{self.responses} respostas, {self.wire_bytes / 1024:.1f} KB na rede, '
+            f'{self.decoded_bytes / 1024:.1f} KB decodificados '
+            f'(taxa {self.ratio:.1f}x), decode {self.decode_seconds * 1000:.1f} ms'
+        )
+
+
+def _decompressor(encoding: str | None):
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj()
+    if encoding == 'gzip':
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    return None
+
+
+class _DecodingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, encoding: str | None, stats):
+        self._stream = stream
+        self._decompressor = _decompressor(encoding)
+        self._stats = stats
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for raw in self._stream:
+            self._stats.wire_bytes += len(raw)
+            data = raw
+            if self._decompressor is not None:
+                started = time.perf_counter()
+                data = self._decompressor.decompress(raw)
+                self._stats.decode_seconds += time.perf_counter() - started
+            self._stats.decoded_bytes += len(data)
+            if data:
+                yield data
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class DecompressingTransport(httpx.AsyncBaseTransport):
+    """
+    Anuncia `accept_encoding` e descomprime a resposta (zstd/gzip) aqui mesmo,
+    medindo bytes na rede e tempo de decode. O httpx recebe o corpo já
+    decodificado, de forma transparente para o Extractor.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        accept_encoding: str,
+        stats: TransferStats,
+    ):
+        self._transport = transport
+        self._accept_encoding = accept_encoding
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.headers['Accept-Encoding'] = self._accept_encoding
+        response = await self._transport.handle_async_request(request)
+        self.stats.responses += 1
+
+        encoding = response.headers.get('content-encoding')
+        headers = response.headers
+        if _decompressor(encoding) is not None:
+            headers = httpx.Headers([
+                (k, v)
+                for k, v in response.headers.multi_items()
+                if k.lower() not in {'content-encoding', 'content-length'}
+            ])
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            stream=_DecodingStream(response.stream, encoding, self.stats),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
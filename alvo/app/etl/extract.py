@@ -1,41 +1,567 @@
-from dataclasses import dataclass
+import asyncio
+import itertools
+import json
+import tempfile
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Any
 
 import httpx
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from app.config.config import settings
+from app.etl.cache import RawCache
+from app.etl.compression import DecompressingTransport, TransferStats
+from app.etl.transform import METRICS, STATS, WINDOW
+
+# Header devolvido pela API Fonte com o cursor da próxima página
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+EVENT_STREAM_MEDIA_TYPE = 'text/event-stream'
+
+# Granularidade das contagens usadas no planejamento adaptativo
+STATS_BUCKET = timedelta(hours=1)
+
+# Uma página é uma lista de dicts (json/ndjson) ou uma tabela Arrow (colunar)
+Page = list[dict[str, Any]] | pa.Table
+
+# Sub-janela a extrair: (início, fim, registros previstos ou None se desconhecido)
+Window = tuple[datetime, datetime, int | None]
+
+# Corpo Parquet acima deste tamanho (bytes) é baixado para um arquivo temporário
+PARQUET_SPOOL_BYTES = 64 * 1024 * 1024
+
+
+# Prefixo de cada mensagem Arrow IPC: marcador de continuação e tamanho
+# (int32) dos metadados. Tamanho zero é o marcador de fim do stream
+IPC_CONTINUATION = b'\xff\xff\xff\xff'
+IPC_PREFIX_BYTES = 8
+
+
+def _read_ipc_messages(buffer: bytes) -> tuple[list[pa.ipc.Message], int, bool]:
+    """
+    Mensagens Arrow IPC completas no início de `buffer`. Retorna (mensagens,
+    bytes consumidos, fim do stream); uma mensagem incompleta não é consumida.
+    """
+    messages, position = [], 0
+    reader = pa.BufferReader(buffer)
+    while len(buffer) - position >= IPC_PREFIX_BYTES:
+        prefix = buffer[position : position + IPC_PREFIX_BYTES]
+        if prefix[:4] != IPC_CONTINUATION:
+            raise ValueError('Mensagem Arrow IPC sem marcador de continuação')
+        metadata_bytes = int.from_bytes(prefix[4:], 'little', signed=True)
+        if metadata_bytes == 0:
+            return messages, position + IPC_PREFIX_BYTES, True
+        if len(buffer) - position < IPC_PREFIX_BYTES + metadata_bytes:
+            break
+
+        reader.seek(position)
+        try:
+            message = pa.ipc.read_message(reader)
+        except (pa.ArrowInvalid, OSError):
+            # Metadados completos, corpo ainda não
+            break
+        messages.append(message)
+        position = reader.tell()
+    return messages, position, False
+
+
+async def _arrow_batches(response: httpx.Response) -> AsyncIterator[pa.RecordBatch]:
+    """
+    Decodifica o stream Arrow IPC conforme os bytes chegam: cada lote sai assim
+    que a sua mensagem está completa. Em memória ficam só o último chunk e a
+    mensagem ainda incompleta. Sem o marcador de fim, o stream foi cortado.
+    """
+    buffer, schema = b'', None
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        try:
+            messages, consumed, finished = _read_ipc_messages(buffer)
+        except ValueError as e:
+            raise httpx.DecodingError(str(e), request=response.request) from e
+        buffer = buffer[consumed:]
+        for message in messages:
+            if message.type == 'schema':
+                schema = pa.ipc.read_schema(message)
+            else:
+                yield pa.ipc.read_record_batch(message, schema)
+        if finished:
+            return
+
+    raise httpx.DecodingError('Stream Arrow IPC incompleto', request=response.request)
+
+
+def _build_client(stats: TransferStats) -> httpx.AsyncClient:
+    # Um pool de conexões compartilhado por todas as sub-janelas
+    limits = httpx.Limits(
+        max_connections=settings.EXTRACT_MAX_CONCURRENCY,
+        max_keepalive_connections=settings.EXTRACT_MAX_CONCURRENCY,
+    )
+    transport = DecompressingTransport(
+        httpx.AsyncHTTPTransport(limits=limits),
+        accept_encoding=settings.EXTRACT_ACCEPT_ENCODING,
+        stats=stats,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.SOURCE_API_URL, timeout=30.0, transport=transport
+    )
 
 
 @dataclass
 class Extractor:
-    client: httpx.AsyncClient = httpx.AsyncClient(
-        base_url=settings.SOURCE_API_URL, timeout=30.0
-    )
+    client: httpx.AsyncClient | None = None
+    page_size: int = settings.EXTRACT_PAGE_SIZE
+    window_minutes: int = settings.EXTRACT_WINDOW_MINUTES
+    max_concurrency: int = settings.EXTRACT_MAX_CONCURRENCY
+    format: str = settings.EXTRACT_FORMAT
+    mode: str = settings.EXTRACT_MODE
+    adaptive: bool = settings.EXTRACT_ADAPTIVE
+    window_rows: int = settings.EXTRACT_WINDOW_ROWS
+    follow_max_delay: float = settings.FOLLOW_MAX_DELAY_SECONDS
+    follow_retry: float = settings.FOLLOW_RETRY_SECONDS
+    stats: TransferStats = field(default_factory=TransferStats)
+    cache: RawCache | None = None
+    # Ativos pedidos à Fonte (parâmetro `asset_id`); vazio traz todos
+    asset_ids: list[int] = field(default_factory=lambda: list(settings.ETL_ASSET_IDS))
 
-    async def get_raw_data(
-        self, date: datetime, metrics: list[str] | None = None
-    ) -> list[dict[str, any]]:  # noqa: E501
+    def __post_init__(self):
+        if self.client is None:
+            self.client = _build_client(self.stats)
+
+    @staticmethod
+    def day_range(date: datetime) -> tuple[datetime, datetime]:
         """
-        Busca dados de um dia inteiro na API Fonte.
+        Define o intervalo do dia (00:00 até 23:59:59).
         """
-        # Define o intervalo do dia (00:00 até 23:59:59)
         start_time = date.replace(hour=0, minute=0, second=0, microsecond=0)
         end_time = start_time + timedelta(days=1) - timedelta(seconds=1)
+        return start_time, end_time
+
+    def _asset_params(self) -> dict[str, list[int]]:
+        return {'asset_id': self.asset_ids} if self.asset_ids else {}
 
+    @staticmethod
+    def split_range(
+        start_time: datetime, end_time: datetime, window: timedelta
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Divide o intervalo em sub-janelas consecutivas e sem sobreposição,
+        seguindo a mesma convenção de fim inclusivo (- 1 segundo).
+        """
+        windows = []
+        window_start = start_time
+        while window_start <= end_time:
+            window_end = min(window_start + window - timedelta(seconds=1), end_time)
+            windows.append((window_start, window_end))
+            window_start += window
+        return windows
+
+    async def iter_range(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None = None,
+        page_size: int | None = None,
+    ) -> AsyncIterator[Page]:
+        """
+        Percorre o intervalo em páginas de até `page_size` registros (padrão:
+        o do Extractor). Apenas uma página fica em memória por vez.
+        """
         params = {
             'start_date': start_time.isoformat(),
             'end_date': end_time.isoformat(),
+            **self._asset_params(),
         }
 
         if metrics:
             params['metrics'] = metrics
 
-        try:
+        page_size = page_size or self.page_size
+        if self.format == 'ndjson':
+            pages = self._iter_ndjson(params, page_size)
+        elif self.format in {'arrow', 'parquet'}:
+            pages = self._iter_columnar(params, page_size)
+        else:
+            pages = self._iter_cursor(params, page_size)
+
+        async for page in pages:
+            yield page
+
+    async def _iter_cursor(
+        self, params: dict[str, Any], page_size: int
+    ) -> AsyncIterator[Page]:
+        """
+        Uma requisição por página, seguindo o cursor da API Fonte.
+        """
+        params = {**params, 'limit': page_size}
+        while True:
             response = await self.client.get('/sensors', params=params)
             response.raise_for_status()
-            return response.json()
+            page = response.json()
+            if page:
+                yield page
+
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return
+            params = {**params, 'after': cursor}
+
+    async def _iter_ndjson(
+        self, params: dict[str, Any], page_size: int
+    ) -> AsyncIterator[Page]:
+        """
+        Uma única requisição em streaming: as linhas NDJSON são lidas conforme
+        chegam e agrupadas em páginas de `page_size`.
+        """
+        async with self.client.stream(
+            'GET', '/sensors', params=params, headers={'Accept': NDJSON_MEDIA_TYPE}
+        ) as response:
+            response.raise_for_status()
+            page = []
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                page.append(json.loads(line))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+
+            if page:
+                yield page
+
+    async def _iter_columnar(
+        self, params: dict[str, Any], page_size: int
+    ) -> AsyncIterator[Page]:
+        """
+        Uma requisição por intervalo em formato colunar (Arrow IPC ou Parquet).
+        Cada lote vira uma tabela Arrow entregue direto ao Transformer, sem
+        passar por dicts. No Arrow os lotes saem conforme chegam; o Parquet
+        (rodapé no fim do arquivo) é baixado antes, em disco se passar de
+        PARQUET_SPOOL_BYTES.
+        """
+        media_type = (
+            ARROW_STREAM_MEDIA_TYPE if self.format == 'arrow' else PARQUET_MEDIA_TYPE
+        )
+        with tempfile.SpooledTemporaryFile(max_size=PARQUET_SPOOL_BYTES) as spool:
+            async with self.client.stream(
+                'GET', '/sensors', params=params, headers={'Accept': media_type}
+            ) as response:
+                response.raise_for_status()
+                if self.format == 'arrow':
+                    async for batch in _arrow_batches(response):
+                        if batch.num_rows:
+                            yield pa.Table.from_batches([batch])
+                    return
+
+                async for chunk in response.aiter_bytes():
+                    spool.write(chunk)
+
+            parquet_file = pq.ParquetFile(spool)
+            for batch in parquet_file.iter_batches(batch_size=page_size):
+                if batch.num_rows:
+                    yield pa.Table.from_batches([batch])
+
+    async def _fetch_windows(
+        self, windows: list[Window], metrics: list[str] | None = None
+    ) -> AsyncIterator[Page]:
+        """
+        Busca as sub-janelas concorrentemente e entrega cada janela em ordem de
+        timestamp. No máximo `max_concurrency` janelas ficam à frente do
+        consumidor (em andamento ou prontas esperando a vez): uma nova só começa
+        quando a mais antiga é entregue, então a memória não cresce com o
+        intervalo mesmo se a carga for mais lenta que a fonte.
+        """
+
+        async def fetch(window_start: datetime, window_end: datetime, rows: int | None):
+            # Com a contagem prevista, uma página maior que a janela evita a
+            # requisição extra que confirmaria que não há mais registros
+            page_size = min(self.page_size, rows + 1) if rows is not None else None
+            return [
+                page
+                async for page in self.iter_range(
+                    window_start, window_end, metrics, page_size
+                )
+            ]
+
+        upcoming = iter(windows)
+        tasks: deque[asyncio.Task] = deque()
+
+        def schedule():
+            free = self.max_concurrency - len(tasks)
+            for window in itertools.islice(upcoming, max(free, 0)):
+                tasks.append(asyncio.create_task(fetch(*window)))
+
+        try:
+            schedule()
+            # As janelas são disjuntas e ordenadas: entregar na ordem das tasks
+            # já mantém a ordem de timestamp.
+            while tasks:
+                pages = await tasks.popleft()
+                schedule()
+                for page in pages:
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_windows(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None = None,
+    ) -> AsyncIterator[Page]:
+        """
+        Divide o intervalo em sub-janelas fixas de `window_minutes`, buscadas
+        concorrentemente.
+        """
+        window = timedelta(minutes=self.window_minutes)
+        windows = [
+            (window_start, window_end, None)
+            for window_start, window_end in self.split_range(
+                start_time, end_time, window
+            )
+        ]
+        async for page in self._fetch_windows(windows, metrics):
+            yield page
+
+    async def get_stats(
+        self, start_time: datetime, end_time: datetime, bucket: str = 'hour'
+    ) -> list[dict[str, Any]]:
+        """
+        Contagem e primeiro/último timestamp por hora (ou dia) na API Fonte,
+        sem baixar os dados. Horas sem registros não aparecem.
+        """
+        response = await self.client.get(
+            '/sensors/stats',
+            params={
+                'start_date': start_time.isoformat(),
+                'end_date': end_time.isoformat(),
+                'bucket': bucket,
+                **self._asset_params(),
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def plan_windows(
+        self, start_time: datetime, end_time: datetime, stats: list[dict[str, Any]]
+    ) -> list[Window]:
+        """
+        Agrupa as horas com dados (`stats` por hora, em ordem) em sub-janelas
+        de cerca de `window_rows` registros. Horas vazias entre duas
+        sub-janelas são puladas; a última vai até `end_time`, para incluir o
+        que chegar depois da consulta. Sem dados, não há sub-janelas.
+        """
+        windows = []
+        window_start, rows = None, 0
+        for bucket in stats:
+            bucket_start = datetime.fromisoformat(bucket['bucket_start'])
+            if window_start is None:
+                window_start = max(bucket_start, start_time)
+            rows += bucket['count']
+            if rows >= self.window_rows:
+                bucket_end = bucket_start + STATS_BUCKET - timedelta(seconds=1)
+                windows.append((window_start, min(bucket_end, end_time), rows))
+                window_start, rows = None, 0
+
+        if window_start is not None:
+            windows.append((window_start, end_time, rows))
+        elif windows:
+            last_start, _, last_rows = windows[-1]
+            windows[-1] = (last_start, end_time, last_rows)
+        return windows
+
+    async def iter_planned(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None = None,
+    ) -> AsyncIterator[Page]:
+        """
+        Extração adaptativa: consulta as contagens por hora do intervalo e
+        busca apenas as sub-janelas com dados, com páginas do tamanho delas.
+        """
+        stats = await self.get_stats(start_time, end_time)
+        windows = self.plan_windows(start_time, end_time, stats)
+        async for page in self._fetch_windows(windows, metrics):
+            yield page
+
+    def iter_interval(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: list[str] | None = None,
+    ) -> AsyncIterator[Page]:
+        """
+        Busca um intervalo qualquer na API Fonte, página a página.
+        Com `adaptive` as sub-janelas são planejadas pelas contagens da fonte;
+        senão, com `window_minutes` o intervalo é dividido em sub-janelas fixas.
+        """
+        if self.adaptive:
+            return self.iter_planned(start_time, end_time, metrics)
+        if self.window_minutes:
+            return self.iter_windows(start_time, end_time, metrics)
+        return self.iter_range(start_time, end_time, metrics)
+
+    async def _iter_live_lines(self, params: dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Linhas do live tail (SSE). Se a conexão cair, reconecta com o
+        Last-Event-ID do último evento recebido, sem repetir nem pular linhas.
+        """
+        last_event_id = None
+        while True:
+            headers = {'Accept': EVENT_STREAM_MEDIA_TYPE}
+            if last_event_id:
+                headers['Last-Event-ID'] = last_event_id
+            try:
+                async for line in self._stream_lines('/sensors/live', params, headers):
+                    if line.startswith('id: '):
+                        last_event_id = line.removeprefix('id: ')
+                    yield line
+            except httpx.TransportError as e:
+                print(f'⚠️ Conexão com o live tail caiu ({e}), reconectando...')
+            # Fonte reiniciando (ou que encerrou o stream): espera antes de voltar
+            await asyncio.sleep(self.follow_retry)
+
+    async def _stream_lines(
+        self, path: str, params: dict[str, Any], headers: dict[str, str]
+    ) -> AsyncIterator[str]:
+        async with self.client.stream(
+            'GET', path, params=params, headers=headers
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                yield line
+
+    async def iter_live(
+        self, since: datetime, metrics: list[str] | None = None
+    ) -> AsyncIterator[Page]:
+        """
+        Segue o live tail da API Fonte (GET /sensors/live) a partir de `since`,
+        sem fim. As linhas são agrupadas em micro-lotes: uma página sai ao
+        chegar a `page_size` linhas, `follow_max_delay` segundos após a
+        primeira linha da página ou quando a fonte avisa (keep-alive) que não
+        há mais dados.
+        """
+        params = {'since': since.isoformat(), **self._asset_params()}
+        if metrics:
+            params['metrics'] = metrics
+
+        page, page_started = [], 0.0
+        async for line in self._iter_live_lines(params):
+            if line.startswith('data: '):
+                if not page:
+                    page_started = time.monotonic()
+                page.append(json.loads(line.removeprefix('data: ')))
+
+            # Comentário (':') é o keep-alive: a fonte está em dia
+            flush = (
+                line.startswith(':')
+                or len(page) >= self.page_size
+                or time.monotonic() - page_started >= self.follow_max_delay
+            )
+            if page and flush:
+                yield page
+                page = []
+
+    async def get_day_digest(self, date: datetime) -> tuple[int, int]:
+        """
+        Digest (contagem, checksum) do dia na API Fonte, sem baixar os dados.
+        """
+        start_time, end_time = self.day_range(date)
+        response = await self.client.get(
+            '/sensors/digest',
+            params={
+                'start_date': start_time.isoformat(),
+                'end_date': end_time.isoformat(),
+                'bucket': 'day',
+                **self._asset_params(),
+            },
+        )
+        response.raise_for_status()
+        buckets = response.json()
+        return (
+            sum(b['count'] for b in buckets),
+            sum(b['checksum'] for b in buckets),
+        )
+
+    async def get_aggregates(
+        self, date: datetime, metrics: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Janelas do dia já agregadas pela API Fonte (mesma largura e
+        estatísticas do Transformer), uma linha por janela e ativo.
+        """
+        start_time, end_time = self.day_range(date)
+        response = await self.client.get(
+            '/sensors/aggregate',
+            params={
+                'start_date': start_time.isoformat(),
+                'end_date': end_time.isoformat(),
+                'bucket_minutes': int(pd.Timedelta(WINDOW).total_seconds() // 60),
+                'metrics': metrics or METRICS,
+                'stats': STATS,
+                **self._asset_params(),
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def iter_pages(
+        self,
+        date: datetime,
+        metrics: list[str] | None = None,
+        refresh: bool = False,
+    ) -> AsyncIterator[Page]:
+        """
+        Busca os dados de um dia inteiro na API Fonte, página a página.
+        Com `cache`, um dia já extraído é lido do disco sem tocar na rede;
+        `refresh` ignora a cópia em disco (ex: a fonte mudou) e a regrava.
+        """
+        start_time, end_time = self.day_range(date)
+        cached = None
+        if self.cache is not None and not refresh:
+            cached = self.cache.get(start_time, end_time, metrics, self.asset_ids)
+        if cached is not None:
+            for batch in cached.to_batches(max_chunksize=self.page_size):
+                yield pa.Table.from_batches([batch])
+            return
+
+        pages = self.iter_interval(start_time, end_time, metrics)
+        if self.cache is not None:
+            pages = self.cache.store(
+                start_time, end_time, metrics, pages, self.asset_ids
+            )
+
+        async for page in pages:
+            yield page
+
+    async def get_raw_data(
+        self, date: datetime, metrics: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Busca dados de um dia inteiro na API Fonte.
+        Junta todas as páginas em memória; prefira `iter_pages` para dias grandes.
+        """
+        try:
+            rows = []
+            async for page in self.iter_pages(date, metrics):
+                rows.extend(page.to_pylist() if isinstance(page, pa.Table) else page)
+            return rows
         except httpx.HTTPError as e:
             print(f'Erro ao extrair dados: {e}')
             raise
         finally:
-            await self.client.aclose()
+            await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
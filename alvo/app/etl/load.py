@@ -1,39 +1,64 @@
 from dataclasses import dataclass
+from datetime import datetime
 
 import pandas as pd
-from sqlalchemy import insert, select
+from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infra.models.signal import Signal
+from app.infra.models.range_digest import RangeDigest
+from app.infra.models.signal import DEFAULT_ASSET_ID, Signal
 from app.infra.models.target import TargetData
+from app.infra.models.watermark import Watermark
+
+# Linhas por INSERT: 3 parâmetros por linha, bem abaixo do limite de 65535 do Postgres
+UPSERT_BATCH_ROWS = 5_000
 
 
 @dataclass
 class Loader:
     db: AsyncSession
 
-    async def _get_or_create_signals(self, signal_names: list[str]) -> dict[str, int]:
+    async def _get_or_create_signals(
+        self, signals: list[tuple[int, str]]
+    ) -> dict[tuple[int, str], int]:
         """
-        Garante que todos sinais existam no banco e retorna um mapa {nome: id}.
+        Garante que todos sinais (asset_id, nome) existam no banco e retorna
+        um mapa {(asset_id, nome): id}.
         """
-        # 1. Buscar sinais existentes
-        result = await self.db.execute(select(Signal))
-        existing_signals = {s.name: s.id for s in result.scalars().all()}
+        # 1. Buscar sinais existentes dos ativos envolvidos
+        asset_ids = {asset_id for asset_id, _ in signals}
+        result = await self.db.execute(
+            select(Signal).where(Signal.asset_id.in_(asset_ids))
+        )
+        existing_signals = {(s.asset_id, s.name): s.id for s in result.scalars()}
 
         # 2. Identificar novos sinais
-        new_signals = set(signal_names) - set(existing_signals.keys())
+        new_signals = set(signals) - set(existing_signals.keys())
 
         if new_signals:
-            # Inserir novos
+            # Inserir novos (outro worker do backfill pode criá-los ao mesmo tempo)
             stmt = (
-                insert(Signal)
-                .values([{'name': name} for name in new_signals])
-                .returning(Signal.id, Signal.name)
+                pg_insert(Signal)
+                .values([
+                    {'asset_id': asset_id, 'name': name}
+                    for asset_id, name in new_signals
+                ])
+                .on_conflict_do_nothing(index_elements=['asset_id', 'name'])
+                .returning(Signal.id, Signal.asset_id, Signal.name)
             )
             result = await self.db.execute(stmt)
             for row in result:
-                existing_signals[row.name] = row.id
+                existing_signals[row.asset_id, row.name] = row.id
+
+            # Sinais criados concorrentemente não voltam no RETURNING
+            if new_signals - existing_signals.keys():
+                result = await self.db.execute(
+                    select(Signal).where(Signal.asset_id.in_(asset_ids))
+                )
+                existing_signals.update({
+                    (s.asset_id, s.name): s.id for s in result.scalars()
+                })
 
             # Commit das definições de sinais
             await self.db.commit()
@@ -42,33 +67,130 @@ class Loader:
 
     async def save_data(self, df: pd.DataFrame):
         """
-        Recebe DataFrame processado (timestamp, value, signal_name) e salva no banco.
+        Recebe DataFrame processado (timestamp, value, signal_name e, opcional,
+        asset_id) e salva no banco. Sem asset_id, os sinais são do ativo padrão.
         """
         if df.empty:
             print('Nenhum dado para salvar.')
             return
 
-        # 1. Resolver IDs dos Sinais
-        unique_signals = df['signal_name'].unique().tolist()
-        signal_map = await self._get_or_create_signals(unique_signals)
+        if 'asset_id' not in df.columns:
+            df['asset_id'] = DEFAULT_ASSET_ID
 
-        # 2. Mapear nomes para IDs no DataFrame
-        # Usa .map para criar a coluna signal_id
-        df['signal_id'] = df['signal_name'].map(signal_map)
+        # 1. Resolver IDs dos Sinais de cada ativo
+        keys = df[['asset_id', 'signal_name']].drop_duplicates()
+        signal_map = await self._get_or_create_signals(
+            list(keys.itertuples(index=False, name=None))
+        )
+
+        # 2. Mapear (asset_id, nome) para IDs no DataFrame via join
+        signal_ids = pd.DataFrame(
+            [(*key, signal_id) for key, signal_id in signal_map.items()],
+            columns=['asset_id', 'signal_name', 'signal_id'],
+        )
+        df = df.merge(signal_ids, on=['asset_id', 'signal_name'], how='left')
 
         # 3. Preparar lista de dicionários para inserção
         records = df[['timestamp', 'signal_id', 'value']].to_dict(orient='records')
 
         # 4. Upsert (Inserir ou Atualizar se já existir timestamp+signal_id)
-        # Upsert do Postgres para evitar erro de duplicidade se rodar o ETL 2x
-        stmt = pg_insert(TargetData).values(records)
+        # Upsert do Postgres para evitar erro de duplicidade se rodar o ETL 2x.
+        # Em lotes: um dia de todos os ativos estoura o limite de parâmetros
+        for start in range(0, len(records), UPSERT_BATCH_ROWS):
+            stmt = pg_insert(TargetData).values(
+                records[start : start + UPSERT_BATCH_ROWS]
+            )
 
-        # Validar com PK ou Unique Constraint
+            # Validar com PK ou Unique Constraint
+            update_stmt = stmt.on_conflict_do_update(
+                index_elements=['timestamp', 'signal_id'],
+                set_={'value': stmt.excluded.value},
+            )
+            await self.db.execute(update_stmt)
+
+        await self.db.commit()
+        print(f'Sucesso: {len(records)} registros salvos/atualizados.')
+
+    async def get_watermark(
+        self, source: str, families: list[str], asset_ids: list[int] | None = None
+    ) -> datetime | None:
+        """
+        Retorna o watermark comum às famílias e ativos (o menor entre eles), ou
+        None se alguma família de algum ativo ainda não tiver sido carregada.
+        Sem `asset_ids` (todos os ativos), considera os ativos já carregados.
+        """
+        stmt = select(Watermark).where(
+            Watermark.source == source, Watermark.signal_family.in_(families)
+        )
+        if asset_ids:
+            stmt = stmt.where(Watermark.asset_id.in_(asset_ids))
+        result = await self.db.execute(stmt)
+        watermarks = {
+            (w.asset_id, w.signal_family): w.loaded_until for w in result.scalars()
+        }
+        assets = asset_ids or {asset_id for asset_id, _ in watermarks}
+        expected = {(asset_id, family) for asset_id in assets for family in families}
+        if not expected or expected - watermarks.keys():
+            return None
+        return min(watermarks.values())
+
+    async def save_watermark(
+        self, source: str, families: list[str], loaded_until: dict[int, datetime]
+    ):
+        """
+        Avança o watermark das famílias de cada ativo (nunca retrocede).
+        `loaded_until` mapeia ativo -> último timestamp carregado.
+        """
+        stmt = pg_insert(Watermark).values([
+            {
+                'source': source,
+                'signal_family': family,
+                'asset_id': asset_id,
+                'loaded_until': until,
+            }
+            for asset_id, until in loaded_until.items()
+            for family in families
+        ])
         update_stmt = stmt.on_conflict_do_update(
-            index_elements=['timestamp', 'signal_id'],
-            set_={'value': stmt.excluded.value},
+            index_elements=['source', 'signal_family', 'asset_id'],
+            set_={
+                'loaded_until': func.greatest(
+                    Watermark.loaded_until, stmt.excluded.loaded_until
+                ),
+                'updated_at': func.now(),
+            },
         )
+        await self.db.execute(update_stmt)
+        await self.db.commit()
 
+    async def get_range_digest(
+        self, source: str, bucket_start: datetime
+    ) -> tuple[int, int] | None:
+        """
+        Digest (contagem, checksum) registrado na última carga do dia.
+        """
+        digest = await self.db.get(RangeDigest, (source, bucket_start))
+        if digest is None:
+            return None
+        return digest.row_count, digest.checksum
+
+    async def save_range_digest(
+        self, source: str, bucket_start: datetime, digest: tuple[int, int]
+    ):
+        row_count, checksum = digest
+        stmt = pg_insert(RangeDigest).values(
+            source=source,
+            bucket_start=bucket_start,
+            row_count=row_count,
+            checksum=checksum,
+        )
+        update_stmt = stmt.on_conflict_do_update(
+            index_elements=['source', 'bucket_start'],
+            set_={
+                'row_count': stmt.excluded.row_count,
+                'checksum': stmt.excluded.checksum,
+                'loaded_at': func.now(),
+            },
+        )
         await self.db.execute(update_stmt)
         await self.db.commit()
-        print(f'Sucesso: {len(records)} registros salvos/atualizados.')
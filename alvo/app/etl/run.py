@@ -1,39 +1,381 @@
-from datetime import datetime
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import date, datetime
 
-from app.etl.extract import Extractor
+import httpx
+import pandas as pd
+
+from app.config.config import settings
+from app.etl.cache import RawCache
+from app.etl.extract import Extractor, Page
 from app.etl.load import Loader
-from app.etl.transform import Transformer
-from app.infra.database.database import AsyncSessionLocal
+from app.etl.transform import METRICS, Transformer
+from app.infra.database.database import AsyncSessionLocal, engine
+
+
+@dataclass
+class PipelineResult:
+    date: date
+    status: str  # 'ok', 'empty', 'skipped' (fonte inalterada) ou 'error'
+    extracted: int = 0
+    loaded: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+    @property
+    def throughput(self) -> float:
+        """Registros extraídos por segundo."""
+        return self.extracted / self.elapsed if self.elapsed else 0.0
+
+
+async def _transform_and_load(
+    transformer: Transformer, loader: Loader, df: pd.DataFrame
+) -> int:
+    df_clean = transformer.process_data(df)
+    if df_clean.empty:
+        return 0
+
+    await loader.save_data(df_clean)
+    return len(df_clean)
+
+
+async def _stream_pages(
+    pages: AsyncIterator[Page],
+    transformer: Transformer,
+    loader: Loader,
+) -> tuple[int, int, dict[int, datetime]]:
+    """
+    Transforma e carrega as páginas conforme chegam: apenas uma página
+    (mais a janela de 10 min ainda aberta) fica em memória por vez.
+    Retorna (registros extraídos, registros agregados carregados,
+    último timestamp extraído de cada ativo).
+    """
+    extracted = loaded = 0
+    pending = None
+    latest = {}
+
+    async for page in pages:
+        extracted += len(page)
+        df = transformer.to_frame(page)
+        if df.empty:
+            continue
+        for asset_id, timestamp in transformer.last_timestamps(df).items():
+            latest[asset_id] = max(timestamp, latest.get(asset_id, timestamp))
+        if pending is not None and not pending.empty:
+            df = pd.concat([pending, df])
+
+        # A última janela pode continuar na próxima página
+        df_complete, pending = transformer.split_pending_window(df)
+        loaded += await _transform_and_load(transformer, loader, df_complete)
+
+    if pending is not None:
+        loaded += await _transform_and_load(transformer, loader, pending)
+
+    return extracted, loaded, latest
+
 
+async def _load_aggregates(
+    extractor: Extractor, loader: Loader, target_date: datetime
+) -> tuple[int, int]:
+    """
+    Modo 'aggregate': a API Fonte já devolve as janelas de 10 min agregadas,
+    então o resample do pandas é dispensado. Retorna (janelas, sinais).
+    """
+    rows = await extractor.get_aggregates(target_date)
+    df = Transformer.from_aggregates(rows)
+    if df.empty:
+        return len(rows), 0
 
-async def run_pipeline(target_date: datetime):
+    await loader.save_data(df)
+    return len(rows), len(df)
+
+
+async def _load_day(
+    extractor: Extractor, loader: Loader, target_date: datetime, force: bool
+) -> tuple[int, int] | None:
+    """
+    Processa o dia, a menos que o digest da fonte seja igual ao registrado
+    na última carga (retorna None). Com `force` o digest não é consultado.
+    """
+    day_start, _ = extractor.day_range(target_date)
+    digest = None
+    changed = False
+    if not force:
+        digest = await extractor.get_day_digest(target_date)
+        stored = await loader.get_range_digest(settings.SOURCE_NAME, day_start)
+        if stored == digest:
+            return None
+        # Já carregado antes e a fonte mudou: a cópia em cache está velha
+        changed = stored is not None
+
+    if extractor.mode == 'aggregate':
+        extracted, loaded = await _load_aggregates(extractor, loader, target_date)
+    else:
+        extracted, loaded, _ = await _stream_pages(
+            extractor.iter_pages(target_date, refresh=changed), Transformer(), loader
+        )
+
+    # Digest lido antes da extração: se a fonte mudar no meio, o próximo
+    # run não vai bater e reprocessa o dia
+    if digest is not None:
+        await loader.save_range_digest(settings.SOURCE_NAME, day_start, digest)
+    return extracted, loaded
+
+
+async def run_pipeline(
+    target_date: datetime,
+    extractor: Extractor | None = None,
+    cache: RawCache | None = None,
+    force: bool = False,
+) -> PipelineResult:
+    """
+    Executa o ETL de um dia. Um `extractor` compartilhado (backfill) não é
+    fechado aqui; quem o criou é responsável por isso. Com `cache`, os dados
+    brutos de um dia já extraído são lidos do disco. Dias cujo digest na fonte
+    não mudou desde a última carga são pulados, exceto com `force`.
+    """
     print(f'🚀 Iniciando Pipeline ETL para {target_date.date()}...')
+    started = time.perf_counter()
+
+    owns_extractor = extractor is None
+    if owns_extractor:
+        extractor = Extractor(cache=cache)
 
-    # 1. Extract
-    print('--- Extraindo dados da Fonte ---')
-    extractor = Extractor()
+    print('--- Extraindo, transformando e carregando por página ---')
     try:
-        raw_data = await extractor.get_raw_data(target_date)
-        print(f'📥 Dados extraídos: {len(raw_data)} registros.')
-    except Exception as e:
+        async with AsyncSessionLocal() as db:
+            counts = await _load_day(extractor, Loader(db), target_date, force)
+    except httpx.HTTPError as e:
         print(f'❌ Erro na extração: {e}')
-        return
+        return PipelineResult(
+            target_date.date(),
+            'error',
+            elapsed=time.perf_counter() - started,
+            error=str(e),
+        )
+    finally:
+        if owns_extractor:
+            await extractor.aclose()
 
-    # 2. Transform
-    print('--- Transformando dados ---')
-    transformer = Transformer()
-    df_clean = transformer.process_data(raw_data)
+    elapsed = time.perf_counter() - started
+    if counts is None:
+        print('⏭️ Dia inalterado na fonte desde a última carga (use --force).')
+        return PipelineResult(target_date.date(), 'skipped', elapsed=elapsed)
 
-    if df_clean.empty:
+    extracted, loaded = counts
+    print(f'📥 Dados extraídos: {extracted} registros.')
+    if owns_extractor:
+        print(f'📦 Transferência: {extractor.stats.summary()}')
+        if cache is not None:
+            print(f'🗄️ Cache: {cache.summary()}')
+        print_pool_usage()
+
+    if not loaded:
         print('⚠️ Nenhum dado para processar após transformação.')
-        return
+        return PipelineResult(target_date.date(), 'empty', extracted, 0, elapsed)
 
-    print(f'📊 Dados transformados: {len(df_clean)} registros (agregados).')
+    print(f'📊 Dados transformados: {loaded} registros (agregados).')
+    print('✅ Pipeline finalizado com sucesso!')
+    return PipelineResult(target_date.date(), 'ok', extracted, loaded, elapsed)
 
-    # 3. Load
-    print('--- Carregando no Banco Alvo ---')
-    async with AsyncSessionLocal() as db:
-        loader = Loader(db)
-        await loader.save_data(df_clean)
 
-    print('✅ Pipeline finalizado com sucesso!')
+def incremental_start(watermark: datetime | None, now: datetime) -> datetime:
+    """
+    Início da extração incremental: a janela de 10 min que contém o watermark
+    (o menor entre os ativos pedidos) é reextraída inteira, pois pode ter sido
+    carregada ainda incompleta. Sem watermark, começa no início do dia corrente.
+    """
+    if watermark is None:
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return Transformer.window_start(watermark)
+
+
+async def _load_increment(
+    extractor: Extractor, loader: Loader, end_time: datetime
+) -> tuple[int, int, dict[int, datetime]]:
+    watermark = await loader.get_watermark(
+        settings.SOURCE_NAME, METRICS, extractor.asset_ids
+    )
+    start_time = incremental_start(watermark, end_time)
+    print(f'🔖 Watermark: {watermark}. Extraindo de {start_time} a {end_time}')
+
+    extracted, loaded, latest = await _stream_pages(
+        extractor.iter_interval(start_time, end_time), Transformer(), loader
+    )
+    if latest:
+        await loader.save_watermark(settings.SOURCE_NAME, METRICS, latest)
+    return extracted, loaded, latest
+
+
+async def run_incremental(extractor: Extractor | None = None) -> PipelineResult:
+    """
+    Extrai apenas o que chegou desde o watermark, reagrega somente as janelas
+    afetadas (upsert) e avança o watermark. Pensado para rodar a cada poucos
+    minutos.
+    """
+    print('🚀 Iniciando Pipeline ETL incremental...')
+    started = time.perf_counter()
+    end_time = datetime.now().replace(microsecond=0)
+
+    owns_extractor = extractor is None
+    if owns_extractor:
+        extractor = Extractor()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            extracted, loaded, latest = await _load_increment(
+                extractor, Loader(db), end_time
+            )
+    except httpx.HTTPError as e:
+        print(f'❌ Erro na extração: {e}')
+        return PipelineResult(
+            end_time.date(),
+            'error',
+            elapsed=time.perf_counter() - started,
+            error=str(e),
+        )
+    finally:
+        if owns_extractor:
+            await extractor.aclose()
+
+    elapsed = time.perf_counter() - started
+    if not loaded:
+        print('⚠️ Nenhum dado novo desde o último watermark.')
+        return PipelineResult(end_time.date(), 'empty', extracted, 0, elapsed)
+
+    print(
+        f'📊 {extracted} registros novos, {loaded} agregados atualizados. '
+        f'Watermark: {min(latest.values())} ({len(latest)} ativo(s))'
+    )
+    print('✅ Pipeline incremental finalizado com sucesso!')
+    return PipelineResult(end_time.date(), 'ok', extracted, loaded, elapsed)
+
+
+async def _follow(extractor: Extractor, loader: Loader):
+    watermark = await loader.get_watermark(
+        settings.SOURCE_NAME, METRICS, extractor.asset_ids
+    )
+    start_time = incremental_start(watermark, datetime.now().replace(microsecond=0))
+    print(f'🔖 Watermark: {watermark}. Seguindo a fonte a partir de {start_time}')
+
+    transformer = Transformer()
+    async for page in extractor.iter_live(start_time):
+        df = transformer.to_frame(page)
+        if df.empty:
+            continue
+        # O live tail segue a ordem dos commits, não a do timestamp: linhas
+        # atrasadas caem em janelas já carregadas. Cada janela tocada é
+        # reextraída inteira da fonte e recalculada (upsert)
+        for window_start, window_end in transformer.window_ranges(df.index):
+            await _stream_pages(
+                extractor.iter_interval(window_start, window_end), transformer, loader
+            )
+        await loader.save_watermark(
+            settings.SOURCE_NAME, METRICS, transformer.last_timestamps(df)
+        )
+
+
+async def run_follow(extractor: Extractor | None = None):
+    """
+    Modo contínuo: começa do watermark, como o incremental, e segue o live
+    tail da Fonte (SSE): a cada micro-lote, recalcula as janelas de 10 min
+    em que as linhas caíram, inclusive as de linhas atrasadas, e avança o
+    watermark. Roda até ser interrompido; ao reiniciar, continua do watermark.
+    """
+    print('🚀 Iniciando Pipeline ETL contínuo (live tail)...')
+    owns_extractor = extractor is None
+    if owns_extractor:
+        extractor = Extractor()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await _follow(extractor, Loader(db))
+    finally:
+        if owns_extractor:
+            await extractor.aclose()
+
+
+async def run_backfill(
+    dates: list[datetime],
+    workers: int = settings.ETL_WORKERS,
+    cache: RawCache | None = None,
+    force: bool = False,
+) -> list[PipelineResult]:
+    """
+    Executa o ETL de vários dias no mesmo processo, com até `workers` dias
+    em paralelo. Todos os dias compartilham o cliente HTTP e o pool do banco.
+    """
+    started = time.perf_counter()
+    extractor = Extractor(cache=cache)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_day(target_date: datetime) -> PipelineResult:
+        async with semaphore:
+            day_started = time.perf_counter()
+            try:
+                return await run_pipeline(target_date, extractor, force=force)
+            except Exception as e:
+                # Falha em um dia não interrompe os demais
+                print(f'❌ Erro no dia {target_date.date()}: {e}')
+                return PipelineResult(
+                    target_date.date(),
+                    'error',
+                    elapsed=time.perf_counter() - day_started,
+                    error=str(e),
+                )
+
+    try:
+        results = await asyncio.gather(*(run_day(d) for d in dates))
+    finally:
+        await extractor.aclose()
+
+    print_report(results, time.perf_counter() - started)
+    print(f'📦 Transferência: {extractor.stats.summary()}')
+    if cache is not None:
+        print(f'🗄️ Cache: {cache.summary()}')
+    print_pool_usage()
+    return results
+
+
+def print_report(results: list[PipelineResult], elapsed: float):
+    print('📋 Resumo do backfill')
+    for r in results:
+        line = (
+            f'  {r.date}  {r.status:<7}  {r.extracted:>9} extraídos  '
+            f'{r.loaded:>9} carregados  {r.elapsed:>7.2f}s  '
+            f'{r.throughput:>9.0f} reg/s'
+        )
+        if r.error:
+            line += f'  ({r.error})'
+        print(line)
+
+    extracted = sum(r.extracted for r in results)
+    by_status = {
+        status: sum(1 for r in results if r.status == status)
+        for status in ('ok', 'empty', 'skipped', 'error')
+    }
+    throughput = extracted / elapsed if elapsed else 0.0
+    print(
+        f'Total: {len(results)} dias (ok: {by_status["ok"]}, '
+        f'vazios: {by_status["empty"]}, inalterados: {by_status["skipped"]}, '
+        f'erros: {by_status["error"]}) | '
+        f'{extracted} registros em {elapsed:.2f}s ({throughput:.0f} reg/s)'
+    )
+
+
+def print_pool_usage():
+    """
+    Uso do pool do banco no processo: espera alta ou timeouts indicam
+    DB_POOL_SIZE/DB_MAX_OVERFLOW pequenos para ETL_WORKERS.
+    """
+    pool = engine.pool.summary()
+    print(
+        f'🔌 Pool do banco: {pool["checkouts"]} checkouts, '
+        f'{pool["connects"]} conexões abertas, '
+        f'espera média {pool["wait_seconds_avg"] * 1000:.1f} ms '
+        f'(máx. {pool["wait_seconds_max"] * 1000:.1f} ms), '
+        f'overflow {pool["overflow_checkouts"]}x, timeouts {pool["timeouts"]} '
+        f'(pool {pool["size"]} + overflow {pool["max_overflow"]})'
+    )
@@ -1,64 +1,177 @@
+from datetime import datetime, timedelta
 from typing import Any, Dict, List
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from app.infra.models.signal import DEFAULT_ASSET_ID
+
+# Largura da janela de agregação
+WINDOW = '10min'
+
+# Métricas agregadas (nomes do JSON da API); cada uma é uma família de sinais
+METRICS = ['wind_speed', 'power', 'ambient_temperature']
+
+# Estatísticas calculadas por janela: o sinal é '<métrica>_<estatística>'
+STATS = ['mean', 'min', 'max', 'std']
 
 
 class Transformer:
     @staticmethod
-    def process_data(raw_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    def to_frame(raw_data: List[Dict[str, Any]] | pa.Table) -> pd.DataFrame:
         """
-        Recebe lista de dicts da API, converte para DataFrame,
-        agrega a cada 10 min e transforma para formato Long (Tidy Data).
+        Converte a página da API (lista de dicts ou tabela Arrow colunar)
+        em DataFrame indexado por timestamp.
         """
-        if not raw_data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(raw_data)
+        if isinstance(raw_data, pa.Table):
+            df = raw_data.to_pandas()
+        else:
+            df = pd.DataFrame(raw_data)
+        if df.empty:
+            return df
 
         # Converter timestamp para datetime e definir como índice
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         df.set_index('timestamp', inplace=True)
+        return df
 
-        # Variáveis para agregar
-        # Apenas os nomes que batem com o JSON da API
-        metrics = ['wind_speed', 'power', 'ambient_temperature']
+    @staticmethod
+    def window_start(timestamp: datetime) -> datetime:
+        """
+        Início da janela de agregação que contém `timestamp`.
+        """
+        return pd.Timestamp(timestamp).floor(WINDOW).to_pydatetime()
 
-        # Filtra apenas colunas que existem no dataframe para evitar erro
-        available_metrics = [m for m in metrics if m in df.columns]
+    @staticmethod
+    def last_timestamps(df: pd.DataFrame) -> dict[int, datetime]:
+        """
+        Maior timestamp de cada ativo no DataFrame de `to_frame` (sem a coluna
+        asset_id, as linhas são do DEFAULT_ASSET_ID).
+        """
+        if 'asset_id' not in df.columns:
+            return {DEFAULT_ASSET_ID: df.index.max().to_pydatetime()}
+        latest = df.index.to_series().groupby(df['asset_id'].to_numpy()).max()
+        return {int(asset_id): ts.to_pydatetime() for asset_id, ts in latest.items()}
 
-        # 1. Agregação (Resample 10min)
-        # Cálcular as estatísticas pedidas: mean, min, max, std
-        list_agg = ['mean', 'min', 'max', 'std']
-        df_agg = df[available_metrics].resample('10min').agg(list_agg)
+    @staticmethod
+    def window_ranges(index: pd.DatetimeIndex) -> list[tuple[datetime, datetime]]:
+        """
+        Janelas de agregação que contêm os timestamps, com as vizinhas unidas
+        em intervalos [início, fim] (fim inclusivo, como na API Fonte).
+        """
+        step = pd.Timedelta(WINDOW)
+        ranges = []
+        for start in index.floor(WINDOW).unique().sort_values():
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = start + step
+            else:
+                ranges.append([start, start + step])
+        return [
+            (start.to_pydatetime(), (end - timedelta(microseconds=1)).to_pydatetime())
+            for start, end in ranges
+        ]
 
-        # O DataFrame agora tem MultiIndex nas colunas:
-        #   (wind_speed, mean), (wind_speed, min)...
-        # Transformando para formato longo.
+    @staticmethod
+    def split_pending_window(
+        df: pd.DataFrame,
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Separa as janelas completas da última janela de 10 min, que pode
+        continuar na próxima página. Os dados chegam ordenados por timestamp.
+        """
+        if df.empty:
+            return df, df
+
+        last_window = df.index[-1].floor(WINDOW)
+        is_complete = df.index < last_window
+        return df[is_complete], df[~is_complete]
+
+    @staticmethod
+    def process_data(
+        raw_data: List[Dict[str, Any]] | pa.Table | pd.DataFrame,
+    ) -> pd.DataFrame:
+        """
+        Recebe lista de dicts da API, tabela Arrow (ou DataFrame de `to_frame`),
+        agrega a cada 10 min por ativo e transforma para formato Long (Tidy Data),
+        com `signal_name` categórico.
+        """
+        if isinstance(raw_data, pd.DataFrame):
+            df = raw_data
+        elif isinstance(raw_data, pa.Table) or raw_data:
+            df = Transformer.to_frame(raw_data)
+        else:
+            return pd.DataFrame()
+
+        if df.empty:
+            return pd.DataFrame()
 
-        dfs_to_concat = []
+        # Filtra apenas colunas que existem no dataframe para evitar erro
+        available_metrics = [m for m in METRICS if m in df.columns]
 
-        for metric in available_metrics:
-            # Seleciona as colunas dessa métrica
-            sub_df = df_agg[metric].copy()
+        if 'asset_id' not in df.columns:
+            df = df.assign(asset_id=DEFAULT_ASSET_ID)
 
-            # Para cada tipo de agregação, criamos linhas
-            # Ex: wind_speed_mean, wind_speed_min
-            for stat in ['mean', 'min', 'max', 'std']:
-                temp_df = sub_df[[stat]].rename(columns={stat: 'value'})
-                # Cria o nome do sinal: ex "wind_speed_mean"
-                temp_df['signal_name'] = f'{metric}_{stat}'
-                dfs_to_concat.append(temp_df)
+        # 1. Agregação (Resample 10min) separada por ativo
+        # Cálcular as estatísticas pedidas: mean, min, max, std
+        grouped = df.groupby(['asset_id', pd.Grouper(level='timestamp', freq=WINDOW)])
+        df_agg = grouped[available_metrics].agg(STATS)
 
-        if not dfs_to_concat:
+        # O DataFrame agora tem MultiIndex nas colunas:
+        #   (wind_speed, mean), (wind_speed, min)...
+        if df_agg.columns.empty:
             return pd.DataFrame()
 
-        # Concatena tudo num formato vertical
-        final_df = pd.concat(dfs_to_concat)
+        # 2. Formato longo numa única passada: a matriz (janelas x sinais) é
+        # lida coluna a coluna, então as linhas saem agrupadas por sinal. Só as
+        # posições com valor (sem NaN) são materializadas; o índice é a posição
+        # de cada linha na matriz completa
+        n_windows, n_signals = df_agg.shape
+        values = df_agg.to_numpy(dtype=float).ravel(order='F')
+        valid = ~np.isnan(values)
+        positions = np.flatnonzero(valid)
+        rows = positions % n_windows
+        # Categórico: um código (int8) por linha em vez de uma string por linha
+        per_signal = valid.reshape(n_signals, n_windows).sum(axis=1)
+        signal_codes = np.repeat(np.arange(n_signals, dtype=np.int8), per_signal)
+        signal_names = [f'{metric}_{stat}' for metric, stat in df_agg.columns]
+        return pd.DataFrame(
+            {
+                'timestamp': df_agg.index.get_level_values('timestamp').take(rows),
+                'asset_id': df_agg.index.get_level_values('asset_id').take(rows),
+                'value': values[positions],
+                'signal_name': pd.Categorical.from_codes(
+                    signal_codes, categories=signal_names
+                ),
+            },
+            index=positions,
+            copy=False,
+        )
 
-        # Reset index para ter timestamp como coluna
-        final_df.reset_index(inplace=True)
+    @staticmethod
+    def from_aggregates(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Converte as janelas já agregadas pela API Fonte (uma coluna
+        '<métrica>_<estatística>' por linha e ativo) para o mesmo formato Long
+        de `process_data`, sem passar pelo resample.
+        """
+        if not rows:
+            return pd.DataFrame()
 
-        # Remove linhas com NaN (onde não houve dado para calcular)
+        df = pd.DataFrame(rows)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        if 'asset_id' not in df.columns:
+            df['asset_id'] = DEFAULT_ASSET_ID
+        final_df = df.melt(
+            id_vars=['timestamp', 'asset_id'],
+            var_name='signal_name',
+            value_name='value',
+        )
+        final_df['value'] = final_df['value'].astype(float)
+        # Mesmas categorias (e ordem) de `process_data`
+        final_df['signal_name'] = pd.Categorical(
+            final_df['signal_name'],
+            categories=df.columns.drop(['timestamp', 'asset_id']),
+        )
         final_df.dropna(subset=['value'], inplace=True)
-
-        return final_df
+        return final_df[['timestamp', 'asset_id', 'value', 'signal_name']]
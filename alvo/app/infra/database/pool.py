@@ -0,0 +1,92 @@
+# Cópia deliberada de fonte/app/infra/database/pool.py: Alvo e Fonte são
+# imagens independentes, sem pacote compartilhado. Altere as duas juntas.
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    """Contadores acumulados de uso do pool desde a criação da engine."""
+
+    checkouts: int = 0
+    # Conexões abertas no banco (inclui as reabertas após recycle/pre-ping)
+    connects: int = 0
+    # Checkouts atendidos além de pool_size (conexões de overflow)
+    overflow_checkouts: int = 0
+    # Esperas que estouraram pool_timeout
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Pool padrão da engine assíncrona medindo quanto cada checkout esperou
+    por uma conexão e quantas vezes o pool precisou de overflow.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.wait_seconds_total += waited
+            self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+
+        self.stats.checkouts += 1
+        if self.overflow() > 0 and self.checkedout() > self.size():
+            self.stats.overflow_checkouts += 1
+        return connection
+
+    def _create_connection(self):
+        self.stats.connects += 1
+        return super()._create_connection()
+
+    def recreate(self):
+        # Após dispose() a engine ganha um pool novo; os contadores continuam
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def summary(self) -> dict:
+        stats = self.stats
+        return {
+            'size': self.size(),
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'checkouts': stats.checkouts,
+            'connects': stats.connects,
+            'overflow_checkouts': stats.overflow_checkouts,
+            'timeouts': stats.timeouts,
+            'wait_seconds_total': round(stats.wait_seconds_total, 6),
+            'wait_seconds_max': round(stats.wait_seconds_max, 6),
+            'wait_seconds_avg': round(
+                stats.wait_seconds_total / stats.checkouts if stats.checkouts else 0.0,
+                6,
+            ),
+        }
+
+
+def connect_args(statement_timeout_ms: int, prepare_threshold: int | None) -> dict:
+    """
+    Argumentos repassados ao psycopg em cada conexão nova.
+    `prepare_threshold=None` desativa prepared statements (ex: PgBouncer em
+    modo transaction).
+    """
+    args = {'prepare_threshold': prepare_threshold}
+    if statement_timeout_ms:
+        args['options'] = f'-c statement_timeout={statement_timeout_ms}'
+    return args
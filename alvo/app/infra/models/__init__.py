@@ -4,3 +4,5 @@ table_registry = registry()
 
 from .signal import Signal as Signal  # noqa E402
 from .target import TargetData as TargetData  # noqa E402
+from .watermark import Watermark as Watermark  # noqa E402
+from .range_digest import RangeDigest as RangeDigest  # noqa E402
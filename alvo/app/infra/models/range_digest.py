@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_as_dataclass, mapped_column
+
+from . import table_registry
+
+
+@mapped_as_dataclass(table_registry)
+class RangeDigest:
+    """
+    Digest (contagem + checksum) da fonte para cada dia já carregado.
+    Se o digest atual da API for igual, o dia não mudou e pode ser pulado.
+    """
+
+    __tablename__ = 'range_digest'
+
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    checksum: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    loaded_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), init=False
+    )
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, UniqueConstraint
 from sqlalchemy.orm import (
     Mapped,
     mapped_as_dataclass,
@@ -13,14 +13,32 @@ from . import table_registry
 if TYPE_CHECKING:
     from .target import TargetData
 
+# Ativo (turbina) dos sinais carregados antes da dimensão de ativos na Fonte
+DEFAULT_ASSET_ID = 1
+
 
 @mapped_as_dataclass(table_registry)
 class Signal:
+    """
+    Série carregada no Alvo: uma estatística de uma métrica (`name`, ex:
+    'wind_speed_mean') de um ativo. O mesmo nome existe uma vez por ativo.
+    """
+
     __tablename__ = 'signal'
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=False)
 
     data_points: Mapped[list['TargetData']] = relationship(
-        'TargetData', back_populates='signal'
+        'TargetData', back_populates='signal', default_factory=list
+    )
+    asset_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=DEFAULT_ASSET_ID,
+        server_default=str(DEFAULT_ASSET_ID),
+    )
+
+    __table_args__ = (
+        UniqueConstraint('asset_id', 'name', name='uix_signal_asset_name'),
     )
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_as_dataclass, mapped_column
+
+from . import table_registry
+from .signal import DEFAULT_ASSET_ID
+
+
+@mapped_as_dataclass(table_registry)
+class Watermark:
+    """
+    Último timestamp da fonte já carregado por completo, por fonte, família
+    de sinais (métrica de origem, ex: wind_speed -> wind_speed_mean, ...) e
+    ativo: um ativo atrasado não é pulado porque outro já avançou.
+    """
+
+    __tablename__ = 'watermark'
+
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    signal_family: Mapped[str] = mapped_column(String, primary_key=True)
+    asset_id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, server_default=str(DEFAULT_ASSET_ID)
+    )
+    loaded_until: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), init=False
+    )
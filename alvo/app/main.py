@@ -2,9 +2,11 @@ import argparse
 import asyncio
 import logging
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.etl.run import run_pipeline
+from app.config.config import settings
+from app.etl.cache import open_cache
+from app.etl.run import run_backfill, run_follow, run_incremental, run_pipeline
 
 logging.basicConfig(
     level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s'
@@ -20,24 +22,135 @@ def parse_args():
         help='Data para processamento no formato YYYY-MM-DD (Padrão: ontem)',
         default=None,
     )
+    parser.add_argument(
+        '--start',
+        type=str,
+        help='Backfill: primeiro dia (YYYY-MM-DD)',
+        default=None,
+    )
+    parser.add_argument(
+        '--end',
+        type=str,
+        help='Backfill: último dia, inclusivo (YYYY-MM-DD)',
+        default=None,
+    )
+    parser.add_argument(
+        '--days',
+        type=int,
+        help='Backfill: quantidade de dias a partir de --start (ou até --end/hoje)',
+        default=None,
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help=f'Backfill: dias processados em paralelo (Padrão: {settings.ETL_WORKERS})',
+        default=settings.ETL_WORKERS,
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Processa apenas os dados novos desde o último watermark',
+    )
+    parser.add_argument(
+        '--follow',
+        action='store_true',
+        help='Modo contínuo: segue as leituras novas da fonte (live tail) a partir '
+        'do último watermark',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Reprocessa os dias mesmo que o digest da fonte não tenha mudado',
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Não usa o cache local de dados brutos (sempre busca na API)',
+    )
+    cache_group.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignora o cache local e o regrava com dados novos da API',
+    )
     return parser.parse_args()
 
 
+def parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        logger.error('❌ Erro: Formato de data inválido. Use YYYY-MM-DD.')
+        sys.exit(1)
+
+
+def resolve_backfill_dates(args) -> list[datetime]:
+    """
+    Monta a lista de dias do backfill a partir de --start/--end/--days.
+    """
+    start = parse_date(args.start) if args.start else None
+    end = parse_date(args.end) if args.end else None
+
+    if args.days is not None and args.days < 1:
+        logger.error('❌ Erro: --days deve ser maior que zero.')
+        sys.exit(1)
+
+    if start and end and args.days is not None:
+        logger.error('❌ Erro: use --end ou --days junto com --start, não ambos.')
+        sys.exit(1)
+
+    if start is None:
+        end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = end - timedelta(days=(args.days or 1) - 1)
+    elif end is None:
+        end = start + timedelta(days=(args.days or 1) - 1)
+
+    if end < start:
+        logger.error('❌ Erro: --end deve ser maior ou igual a --start.')
+        sys.exit(1)
+
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
 async def main():
     logger.info('🚀 Iniciando o pipeline ETL da Delfos')
     args = parse_args()
+    cache = open_cache(enabled=not args.no_cache, refresh=args.refresh)
 
-    if args.date:
-        try:
-            target_date = datetime.strptime(args.date, '%Y-%m-%d')
-        except ValueError:
-            logger.error('❌ Erro: Formato de data inválido. Use YYYY-MM-DD.')
+    is_backfill = args.start or args.end or args.days is not None
+    if args.follow:
+        if args.incremental or args.date or is_backfill:
+            logger.error('❌ Erro: --follow não pode ser usado com outros modos.')
+            sys.exit(1)
+
+        await run_follow()
+        return
+
+    if args.incremental:
+        if args.date or is_backfill:
+            logger.error('❌ Erro: --incremental não pode ser usado com outras datas.')
+            sys.exit(1)
+
+        await run_incremental()
+        return
+
+    if is_backfill:
+        if args.date:
+            logger.error('❌ Erro: --date não pode ser usado com --start/--end/--days.')
             sys.exit(1)
+
+        dates = resolve_backfill_dates(args)
+        logger.info(f'📆 Backfill de {len(dates)} dias com {args.workers} workers')
+        await run_backfill(dates, workers=args.workers, cache=cache, force=args.force)
+        return
+
+    if args.date:
+        target_date = parse_date(args.date)
     else:
         # Se não passar data, assume "ontem" ou "hoje"
         target_date = datetime.now()
 
-    await run_pipeline(target_date)
+    await run_pipeline(target_date, cache=cache, force=args.force)
 
 
 if __name__ == '__main__':
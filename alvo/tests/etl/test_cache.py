@@ -0,0 +1,113 @@
+import os
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import httpx
+import pyarrow as pa
+import pytest
+
+from app.etl.cache import RawCache
+from app.etl.extract import Extractor
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 1, 23, 59, 59)
+
+
+def _page(minutes: range) -> list[dict]:
+    return [
+        {
+            'id': m,
+            'timestamp': (START + timedelta(minutes=m)).isoformat(),
+            'wind_speed': float(m),
+            'power': None,
+        }
+        for m in minutes
+    ]
+
+
+async def _pages(*pages):
+    for page in pages:
+        yield page
+
+
+async def _drain(pages) -> list:
+    return [page async for page in pages]
+
+
+@pytest.mark.asyncio
+async def test_store_then_get_roundtrip(tmp_path):
+    cache = RawCache(directory=tmp_path)
+    first, second = _page(range(3)), _page(range(3, 5))
+
+    passed = await _drain(cache.store(START, END, None, _pages(first, second)))
+
+    assert passed == [first, second]
+    table = cache.get(START, END)
+    assert table.num_rows == len(first) + len(second)
+    assert table.schema.field('timestamp').type == pa.timestamp('us')
+    assert table.column('wind_speed').to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_incomplete_range_is_not_published(tmp_path):
+    cache = RawCache(directory=tmp_path)
+    pages = cache.store(START, END, None, _pages(_page(range(3)), _page(range(3, 5))))
+
+    await anext(pages)
+    await pages.aclose()
+
+    assert cache.get(START, END) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_open_range_expires_after_ttl(tmp_path):
+    end = datetime.now() + timedelta(hours=1)
+    cache = RawCache(directory=tmp_path, open_ttl_seconds=0)
+
+    await _drain(cache.store(START, end, None, _pages(_page(range(3)))))
+
+    assert cache.get(START, end) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_ignores_existing_entry(tmp_path):
+    await _drain(
+        RawCache(directory=tmp_path).store(START, END, None, _pages(_page(range(3))))
+    )
+
+    assert RawCache(directory=tmp_path, refresh=True).get(START, END) is None
+
+
+@pytest.mark.asyncio
+async def test_evict_removes_least_recently_used(tmp_path):
+    cache = RawCache(directory=tmp_path)
+    days = [START + timedelta(days=i) for i in range(3)]
+    for i, day in enumerate(days):
+        await _drain(cache.store(day, day, None, _pages(_page(range(100)))))
+        path = cache.path(day, day, None)
+        os.utime(path, (1_000 + i, 1_000 + i))
+
+    # O dia mais antigo passa a ser o mais recente
+    cache.get(days[0], days[0])
+    cache.max_bytes = cache.path(days[0], days[0], None).stat().st_size * 2
+    cache.evict()
+
+    assert cache.get(days[0], days[0]) is not None
+    assert cache.get(days[1], days[1]) is None
+    assert cache.get(days[2], days[2]) is not None
+
+
+@pytest.mark.asyncio
+async def test_extractor_reads_cached_day_without_network(tmp_path):
+    cache = RawCache(directory=tmp_path)
+    await _drain(cache.store(START, END, None, _pages(_page(range(5)))))
+
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    extractor = Extractor(client=mock_client, page_size=2, cache=cache)
+    pages = await _drain(extractor.iter_pages(START))
+
+    assert [page.num_rows for page in pages] == [2, 2, 1]
+    mock_client.get.assert_not_called()
+    mock_client.stream.assert_not_called()
@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import httpx
+import pytest
+import zstandard
+
+from app.etl.compression import DecompressingTransport, TransferStats
+
+PAYLOAD = json.dumps([{'id': i, 'wind_speed': 1.5} for i in range(500)]).encode()
+
+
+def _transport(encoding: str, body: bytes, seen: dict) -> DecompressingTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen['accept_encoding'] = request.headers['accept-encoding']
+        return httpx.Response(200, headers={'content-encoding': encoding}, content=body)
+
+    return DecompressingTransport(
+        httpx.MockTransport(handler), 'zstd, gzip', TransferStats()
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('encoding', 'compress'),
+    [
+        ('zstd', zstandard.ZstdCompressor().compress),
+        ('gzip', gzip.compress),
+    ],
+)
+async def test_decompressing_transport_decodes_body(encoding, compress):
+    seen = {}
+    transport = _transport(encoding, compress(PAYLOAD), seen)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get('http://fonte/sensors')
+
+    assert seen['accept_encoding'] == 'zstd, gzip'
+    assert 'content-encoding' not in response.headers
+    assert response.content == PAYLOAD
+
+    stats = transport.stats
+    assert stats.responses == 1
+    assert stats.decoded_bytes == len(PAYLOAD)
+    assert stats.wire_bytes < stats.decoded_bytes
+
+
+@pytest.mark.asyncio
+async def test_decompressing_transport_passes_identity_through():
+    seen = {}
+    transport = _transport('identity', PAYLOAD, seen)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get('http://fonte/sensors')
+
+    assert response.content == PAYLOAD
+    assert transport.stats.wire_bytes == transport.stats.decoded_bytes
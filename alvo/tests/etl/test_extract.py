@@ -1,7 +1,11 @@
-from datetime import datetime
+import asyncio
+import io
+from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, Mock
 
 import httpx
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from app.etl.extract import Extractor
@@ -14,6 +18,7 @@ async def test_get_raw_data_success_date_only():
     mock_response = Mock()
     mock_response.json.return_value = [{'id': 1, 'value': 10}]
     mock_response.raise_for_status.return_value = None
+    mock_response.headers = {}
     mock_client.get.return_value = mock_response
 
     extractor = Extractor(client=mock_client)
@@ -41,6 +46,7 @@ async def test_get_raw_data_success_with_metrics():
     mock_response = Mock()
     mock_response.json.return_value = [{'id': 1, 'value': 10}]
     mock_response.raise_for_status.return_value = None
+    mock_response.headers = {}
     mock_client.get.return_value = mock_response
 
     extractor = Extractor(client=mock_client)
@@ -76,3 +82,427 @@ async def test_get_raw_data_http_error():
 
     # Verificar limpeza
     mock_client.aclose.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_raw_data_follows_cursor():
+    # Preparar mock com duas páginas
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    first_page = Mock()
+    first_page.json.return_value = [{'id': 1, 'value': 10}]
+    first_page.headers = {'X-Next-Cursor': '2023-10-27T00:00:00|1'}
+    last_page = Mock()
+    last_page.json.return_value = [{'id': 2, 'value': 20}]
+    last_page.headers = {}
+    mock_client.get.side_effect = [first_page, last_page]
+
+    extractor = Extractor(client=mock_client, page_size=1)
+    date = datetime(2023, 10, 27)
+
+    result = await extractor.get_raw_data(date=date)
+
+    assert result == [{'id': 1, 'value': 10}, {'id': 2, 'value': 20}]
+
+    expected_calls = 2
+    assert mock_client.get.call_count == expected_calls
+    first_params = mock_client.get.call_args_list[0].kwargs['params']
+    last_params = mock_client.get.call_args_list[1].kwargs['params']
+    assert first_params['limit'] == 1
+    assert 'after' not in first_params
+    assert last_params['after'] == '2023-10-27T00:00:00|1'
+
+    mock_client.aclose.assert_called_once()
+
+
+def test_split_range_hourly():
+    start, end = Extractor.day_range(datetime(2023, 10, 27))
+
+    windows = Extractor.split_range(start, end, timedelta(hours=1))
+
+    expected_windows = 24
+    assert len(windows) == expected_windows
+    assert windows[0] == (datetime(2023, 10, 27, 0), datetime(2023, 10, 27, 0, 59, 59))
+    assert windows[-1] == (datetime(2023, 10, 27, 23), end)
+
+
+@pytest.mark.asyncio
+async def test_get_raw_data_concurrent_windows_keeps_order():
+    max_concurrency = 2
+    in_flight = 0
+    peak = 0
+
+    async def fake_get(url, params):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Janelas iniciais respondem mais devagar: a ordem deve ser mantida
+        start = datetime.fromisoformat(params['start_date'])
+        await asyncio.sleep(0.01 * (6 - start.hour))
+        in_flight -= 1
+
+        response = Mock()
+        response.json.return_value = [{'timestamp': params['start_date']}]
+        response.headers = {}
+        return response
+
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    mock_client.get.side_effect = fake_get
+
+    extractor = Extractor(
+        client=mock_client, window_minutes=60, max_concurrency=max_concurrency
+    )
+    result = await extractor.get_raw_data(date=datetime(2023, 10, 27))
+
+    timestamps = [row['timestamp'] for row in result]
+    expected_windows = 24
+    assert len(timestamps) == expected_windows
+    assert timestamps == sorted(timestamps)
+    assert peak <= max_concurrency
+    mock_client.aclose.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_iter_windows_bounds_look_ahead_to_slow_consumer():
+    max_concurrency = 3
+    requested = 0
+
+    async def fake_get(url, params):
+        nonlocal requested
+        requested += 1
+        response = Mock()
+        response.json.return_value = [{'timestamp': params['start_date']}]
+        response.headers = {}
+        return response
+
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    mock_client.get.side_effect = fake_get
+    extractor = Extractor(
+        client=mock_client, window_minutes=60, max_concurrency=max_concurrency
+    )
+
+    consumed = 0
+    ahead = []
+    start, end = Extractor.day_range(datetime(2023, 10, 27))
+    async for _ in extractor.iter_windows(start, end):
+        consumed += 1
+        # Consumidor lento: a fonte tem tempo de sobra para adiantar janelas
+        await asyncio.sleep(0.005)
+        ahead.append(requested - consumed)
+
+    expected_windows = 24
+    assert consumed == expected_windows
+    # Janelas prontas esperando o consumidor nunca passam de max_concurrency
+    assert max(ahead) <= max_concurrency
+
+
+@pytest.mark.asyncio
+async def test_get_raw_data_ndjson_reads_lines_into_pages():
+    lines = [
+        '{"timestamp": "2023-10-27T00:00:00", "wind_speed": 1.0}',
+        '{"timestamp": "2023-10-27T00:01:00", "wind_speed": 2.0}',
+        '{"timestamp": "2023-10-27T00:02:00", "wind_speed": 3.0}',
+    ]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text='\n'.join(lines) + '\n')
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    extractor = Extractor(client=client, page_size=2, format='ndjson')
+
+    pages = [page async for page in extractor.iter_pages(datetime(2023, 10, 27))]
+
+    assert [len(page) for page in pages] == [2, 1]
+    assert pages[1] == [{'timestamp': '2023-10-27T00:02:00', 'wind_speed': 3.0}]
+
+    # Uma única requisição em streaming, sem paginação por cursor
+    assert len(requests) == 1
+    assert requests[0].headers['Accept'] == 'application/x-ndjson'
+    assert 'limit' not in requests[0].url.params
+    await extractor.aclose()
+
+
+def test_plan_windows_groups_hours_and_skips_empty_ones():
+    start, end = Extractor.day_range(datetime(2023, 10, 27))
+    stats = [
+        {'bucket_start': f'2023-10-27T{hour:02d}:00:00', 'count': count}
+        for hour, count in ((0, 100), (1, 100), (5, 300), (6, 50))
+    ]
+    extractor = Extractor(client=AsyncMock(spec=httpx.AsyncClient), window_rows=200)
+
+    windows = extractor.plan_windows(start, end, stats)
+
+    # Horas 2 a 4 (vazias) ficam de fora; a última janela vai até o fim do dia
+    assert windows == [
+        (datetime(2023, 10, 27, 0), datetime(2023, 10, 27, 1, 59, 59), 200),
+        (datetime(2023, 10, 27, 5), datetime(2023, 10, 27, 5, 59, 59), 300),
+        (datetime(2023, 10, 27, 6), end, 50),
+    ]
+    assert extractor.plan_windows(start, end, []) == []
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_adaptive_fetches_only_planned_windows():
+    stats = {
+        '2023-10-27': [
+            {'bucket_start': '2023-10-27T10:00:00', 'count': 2},
+        ],
+        '2023-10-28': [],
+    }
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        params = request.url.params
+        if request.url.path.endswith('/stats'):
+            return httpx.Response(200, json=stats[params['start_date'][:10]])
+        return httpx.Response(200, json=[{'timestamp': params['start_date']}] * 2)
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    extractor = Extractor(client=client, adaptive=True, window_rows=1000)
+
+    pages = [page async for page in extractor.iter_pages(datetime(2023, 10, 27))]
+    empty = [page async for page in extractor.iter_pages(datetime(2023, 10, 28))]
+    await extractor.aclose()
+
+    assert len(pages) == 1
+    assert empty == []
+    data_requests = [r for r in requests if r.url.path == '/sensors']
+    # Uma única requisição, a partir da primeira hora com dados e com página
+    # maior que a contagem prevista (sem requisição extra pelo cursor)
+    assert len(data_requests) == 1
+    assert data_requests[0].url.params['start_date'] == '2023-10-27T10:00:00'
+    assert data_requests[0].url.params['end_date'] == '2023-10-27T23:59:59'
+    assert data_requests[0].url.params['limit'] == '3'
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_arrow_yields_tables():
+    table = pa.table({
+        'timestamp': pa.array(
+            [datetime(2023, 10, 27, 0, 0), datetime(2023, 10, 27, 0, 1)],
+            pa.timestamp('us'),
+        ),
+        'wind_speed': [1.0, 2.0],
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    body = sink.getvalue().to_pybytes()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers['Accept'] == 'application/vnd.apache.arrow.stream'
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    extractor = Extractor(client=client, format='arrow')
+
+    pages = [page async for page in extractor.iter_pages(datetime(2023, 10, 27))]
+
+    assert len(pages) == 1
+    assert isinstance(pages[0], pa.Table)
+    assert pages[0].equals(table)
+    await extractor.aclose()
+
+
+ARROW_TABLE = pa.table({
+    'timestamp': pa.array(
+        [datetime(2023, 10, 27, 0, m) for m in range(6)], pa.timestamp('us')
+    ),
+    'wind_speed': [float(m) for m in range(6)],
+})
+
+
+def _arrow_messages() -> list[bytes]:
+    """
+    Stream Arrow IPC de ARROW_TABLE em lotes de 2 linhas, uma entrada por
+    mensagem (schema, 3 lotes e marcador de fim), como a Fonte envia.
+    """
+    sink = io.BytesIO()
+    messages = []
+    with pa.ipc.new_stream(sink, ARROW_TABLE.schema) as writer:
+        messages.append(sink.getvalue())
+        for batch in ARROW_TABLE.to_batches(max_chunksize=2):
+            writer.write_batch(batch)
+            messages.append(sink.getvalue()[sum(map(len, messages)) :])
+    messages.append(sink.getvalue()[sum(map(len, messages)) :])
+    return messages
+
+
+def _arrow_extractor(chunks: list[bytes], sent: list[int]) -> Extractor:
+    async def stream():
+        for chunk in chunks:
+            sent.append(len(chunk))
+            yield chunk
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=stream())
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    return Extractor(client=client, format='arrow')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size', [None, 1, 2, 3, 7, 8, 13, 64, 10_000])
+async def test_iter_pages_arrow_decodes_batches_as_bytes_arrive(chunk_size):
+    messages = _arrow_messages()
+    body = b''.join(messages)
+    # None: um chunk por mensagem, alinhado às fronteiras
+    chunks = (
+        messages
+        if chunk_size is None
+        else [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    )
+    sent = []
+    extractor = _arrow_extractor(chunks, sent)
+
+    pages = []
+    async for page in extractor.iter_pages(datetime(2023, 10, 27)):
+        pages.append((page, sum(sent)))
+    await extractor.aclose()
+
+    # Um lote por mensagem; com o corpo partido, o primeiro sai antes do fim
+    assert [page.num_rows for page, _ in pages] == [2, 2, 2]
+    assert pa.concat_tables([page for page, _ in pages]).equals(ARROW_TABLE)
+    if len(chunks) > 1:
+        assert pages[0][1] < len(body)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('cut', ['message', 'byte'])
+async def test_iter_pages_arrow_rejects_stream_without_end_marker(cut):
+    messages = _arrow_messages()[:-1]
+    body = b''.join(messages)
+    # Cortado após uma mensagem completa ou no meio do último lote
+    chunks = messages if cut == 'message' else [body[:-1]]
+    extractor = _arrow_extractor(chunks, [])
+
+    with pytest.raises(httpx.DecodingError):
+        async for _ in extractor.iter_pages(datetime(2023, 10, 27)):
+            pass
+    await extractor.aclose()
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_parquet_reads_spooled_body():
+    table = pa.table({
+        'timestamp': pa.array(
+            [datetime(2023, 10, 27, 0, m) for m in range(5)], pa.timestamp('us')
+        ),
+        'wind_speed': [float(m) for m in range(5)],
+    })
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    body = sink.getvalue().to_pybytes()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers['Accept'] == 'application/vnd.apache.parquet'
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    extractor = Extractor(client=client, format='parquet', page_size=2)
+
+    pages = [page async for page in extractor.iter_pages(datetime(2023, 10, 27))]
+
+    assert [page.num_rows for page in pages] == [2, 2, 1]
+    assert pa.concat_tables(pages).equals(table)
+    await extractor.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_day_digest_sums_buckets():
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    mock_response = Mock()
+    mock_response.json.return_value = [
+        {'bucket_start': '2024-01-01T00:00:00', 'count': 144, 'checksum': -12345}
+    ]
+    mock_client.get.return_value = mock_response
+
+    extractor = Extractor(client=mock_client)
+    digest = await extractor.get_day_digest(datetime(2024, 1, 1, 15, 30))
+
+    assert digest == (144, -12345)
+    args, kwargs = mock_client.get.call_args
+    assert args == ('/sensors/digest',)
+    assert kwargs['params']['start_date'] == '2024-01-01T00:00:00'
+    assert kwargs['params']['end_date'] == '2024-01-01T23:59:59'
+
+
+@pytest.mark.asyncio
+async def test_get_aggregates_requests_transform_windows():
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    mock_response = Mock()
+    mock_response.json.return_value = [{'timestamp': '2024-01-01T00:00:00'}]
+    mock_client.get.return_value = mock_response
+
+    extractor = Extractor(client=mock_client)
+    rows = await extractor.get_aggregates(datetime(2024, 1, 1))
+
+    assert rows == [{'timestamp': '2024-01-01T00:00:00'}]
+    args, kwargs = mock_client.get.call_args
+    assert args == ('/sensors/aggregate',)
+    bucket_expected = 10
+    assert kwargs['params']['bucket_minutes'] == bucket_expected
+    assert kwargs['params']['stats'] == ['mean', 'min', 'max', 'std']
+
+
+@pytest.mark.asyncio
+async def test_requests_filter_configured_assets():
+    mock_client = AsyncMock(spec=httpx.AsyncClient)
+    mock_response = Mock()
+    mock_response.json.return_value = []
+    mock_response.headers = {}
+    mock_client.get.return_value = mock_response
+
+    extractor = Extractor(client=mock_client, asset_ids=[2, 3])
+    await extractor.get_raw_data(datetime(2024, 1, 1))
+    await extractor.get_day_digest(datetime(2024, 1, 1))
+    await extractor.get_aggregates(datetime(2024, 1, 1))
+
+    for _, kwargs in mock_client.get.call_args_list:
+        assert kwargs['params']['asset_id'] == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_iter_live_micro_batches_and_resumes_with_last_event_id():
+    streams = [
+        b'retry: 1000\n\n'
+        b'id: c1\ndata: {"timestamp": "2024-01-01T00:00:00", "power": 1.0}\n\n'
+        b'id: c2\ndata: {"timestamp": "2024-01-01T00:01:00", "power": 2.0}\n\n'
+        b': keepalive\n\n',
+        b'id: c3\ndata: {"timestamp": "2024-01-01T00:02:00", "power": 3.0}\n\n'
+        b': keepalive\n\n',
+    ]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, content=streams[len(requests) - 1])
+
+    client = httpx.AsyncClient(
+        base_url='http://fonte', transport=httpx.MockTransport(handler)
+    )
+    extractor = Extractor(client=client, follow_retry=0)
+
+    pages = extractor.iter_live(datetime(2024, 1, 1))
+    first = await anext(pages)
+    second = await anext(pages)
+    await pages.aclose()
+
+    # Keep-alive fecha o micro-lote; a reconexão retoma após o último evento
+    assert [row['power'] for row in first] == [1.0, 2.0]
+    assert [row['power'] for row in second] == [3.0]
+    assert requests[0].url.params['since'] == '2024-01-01T00:00:00'
+    assert 'last-event-id' not in requests[0].headers
+    assert requests[1].headers['last-event-id'] == 'c2'
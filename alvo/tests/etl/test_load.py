@@ -1,6 +1,8 @@
+from datetime import datetime
+
 import pandas as pd
 import pytest
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from app.etl.load import Loader
 from app.infra.models.signal import Signal
@@ -63,6 +65,36 @@ async def test_save_data_new_signals(session):
             assert row.value == value_expected
 
 
+@pytest.mark.asyncio
+async def test_save_data_resolves_signals_per_asset(session):
+    loader = Loader(db=session)
+    timestamp = pd.Timestamp('2023-10-27 10:00:00')
+    df = pd.DataFrame({
+        'timestamp': [timestamp, timestamp, timestamp],
+        'asset_id': [1, 2, 2],
+        'signal_name': ['power_max', 'power_max', 'power_min'],
+        'value': [1.0, 2.0, 0.5],
+    })
+
+    await loader.save_data(df)
+    # Mesmos sinais de novo: reaproveita os ids já criados
+    await loader.save_data(df)
+
+    signals = (await session.execute(select(Signal))).scalars().all()
+    assert {(s.asset_id, s.name) for s in signals} == {
+        (1, 'power_max'),
+        (2, 'power_max'),
+        (2, 'power_min'),
+    }
+    result = await session.execute(
+        select(Signal.asset_id, TargetData.value)
+        .join(Signal)
+        .where(Signal.name == 'power_max')
+        .order_by(Signal.asset_id)
+    )
+    assert result.all() == [(1, 1.0), (2, 2.0)]
+
+
 @pytest.mark.asyncio
 async def test_save_data_upsert(session):
     loader = Loader(db=session)
@@ -108,3 +140,56 @@ async def test_save_data_upsert(session):
     value_expected = 20.0
     assert len(rows) == 1
     assert rows[0].value == value_expected
+
+
+@pytest.mark.asyncio
+async def test_save_data_many_assets_exceeds_bind_param_limit(session):
+    loader = Loader(db=session)
+    # 144 janelas x 12 sinais x 13 ativos x 3 parâmetros > 65535
+    timestamps = pd.date_range('2024-01-01', periods=144, freq='10min')
+    signals = [f'signal_{i}' for i in range(12)]
+    assets = range(1, 14)
+    index = pd.MultiIndex.from_product(
+        [assets, signals, timestamps], names=['asset_id', 'signal_name', 'timestamp']
+    )
+    df = index.to_frame(index=False)
+    df['value'] = 1.0
+
+    await loader.save_data(df)
+
+    count = await session.scalar(select(func.count()).select_from(TargetData))
+    assert count == len(df)
+
+
+@pytest.mark.asyncio
+async def test_watermark_only_moves_forward(session):
+    loader = Loader(db=session)
+    families = ['wind_speed', 'power']
+
+    assert await loader.get_watermark('fonte', families) is None
+
+    await loader.save_watermark('fonte', families, {1: datetime(2024, 1, 1, 12, 0)})
+    await loader.save_watermark('fonte', families, {1: datetime(2024, 1, 1, 8, 0)})
+
+    assert await loader.get_watermark('fonte', families) == datetime(2024, 1, 1, 12)
+    # Família ainda sem watermark: força a extração a partir do início
+    assert await loader.get_watermark('fonte', [*families, 'power_factor']) is None
+
+
+@pytest.mark.asyncio
+async def test_watermark_is_tracked_per_asset(session):
+    loader = Loader(db=session)
+    families = ['wind_speed']
+
+    await loader.save_watermark(
+        'fonte', families, {1: datetime(2024, 1, 1, 12), 2: datetime(2024, 1, 1, 9)}
+    )
+    await loader.save_watermark('fonte', families, {1: datetime(2024, 1, 1, 13)})
+
+    # O ativo atrasado segura o início da próxima extração
+    assert await loader.get_watermark('fonte', families) == datetime(2024, 1, 1, 9)
+    assert await loader.get_watermark('fonte', families, [1]) == datetime(
+        2024, 1, 1, 13
+    )
+    # Ativo pedido ainda sem watermark: extrai a partir do início
+    assert await loader.get_watermark('fonte', families, [1, 3]) is None
@@ -1,10 +1,19 @@
+import asyncio
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from sqlalchemy import select
 
-from app.etl.run import run_pipeline
+from app.etl.extract import Extractor
+from app.etl.run import (
+    PipelineResult,
+    incremental_start,
+    run_backfill,
+    run_follow,
+    run_incremental,
+    run_pipeline,
+)
 from app.infra.models.signal import Signal
 from app.infra.models.target import TargetData
 
@@ -14,7 +23,7 @@ async def test_run_pipeline_integration(session):
     # 1. Preparar Dados Mockados
     target_date = datetime(2024, 1, 1)
 
-    # Exemplo de dados brutos retornados pelo Extractor.get_raw_data (lista de dicts)
+    # Exemplo de dados brutos retornados pelo Extractor.iter_pages (lista de dicts)
     # Baseado na lógica do transform.py, espera chaves:
     # 'timestamp', 'wind_speed', 'power', 'ambient_temperature'. E agrega a cada 10min.
     raw_data = [
@@ -50,8 +59,16 @@ async def test_run_pipeline_integration(session):
         patch('app.etl.run.AsyncSessionLocal', return_value=mock_session_cm),
     ):
         # Configurar a instância do mock extractor
+        # Duas páginas: a janela de 00:00 fica dividida entre elas
+        async def iter_pages(*args, **kwargs):
+            yield raw_data[:1]
+            yield raw_data[1:]
+
         mock_extractor_instance = MockExtractor.return_value
-        mock_extractor_instance.get_raw_data = AsyncMock(return_value=raw_data)
+        mock_extractor_instance.iter_pages = iter_pages
+        mock_extractor_instance.aclose = AsyncMock()
+        mock_extractor_instance.day_range = Extractor.day_range
+        mock_extractor_instance.get_day_digest = AsyncMock(return_value=(3, 42))
 
         # 3. Executar o pipeline
         await run_pipeline(target_date)
@@ -106,3 +123,191 @@ async def test_run_pipeline_integration(session):
     result_all_data = await session.execute(select(TargetData))
     all_data = result_all_data.scalars().all()
     assert len(all_data) > 0
+
+
+@pytest.mark.asyncio
+async def test_run_backfill_runs_days_concurrently_and_isolates_errors(capsys):
+    dates = [datetime(2024, 1, day) for day in range(1, 6)]
+    workers = 2
+    in_flight = 0
+    peak = 0
+
+    async def fake_run_pipeline(target_date, extractor, force=False):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if target_date.day == 3:  # noqa: PLR2004
+            raise RuntimeError('falha no load')
+        return PipelineResult(target_date.date(), 'ok', 1440, 1728, 0.01)
+
+    with (
+        patch('app.etl.run.Extractor') as MockExtractor,
+        patch('app.etl.run.run_pipeline', side_effect=fake_run_pipeline),
+    ):
+        MockExtractor.return_value.aclose = AsyncMock()
+        results = await run_backfill(dates, workers=workers)
+
+        # Um único cliente HTTP compartilhado, fechado ao final
+        MockExtractor.assert_called_once()
+        MockExtractor.return_value.aclose.assert_awaited_once()
+
+    assert peak <= workers
+    assert [r.date for r in results] == [d.date() for d in dates]
+    assert [r.status for r in results] == ['ok', 'ok', 'error', 'ok', 'ok']
+    assert results[2].error == 'falha no load'
+    # Uso do pool do banco no relatório final
+    assert 'Pool do banco' in capsys.readouterr().out
+
+
+def test_incremental_start_reextracts_watermark_window():
+    now = datetime(2024, 1, 2, 9, 30)
+
+    assert incremental_start(None, now) == datetime(2024, 1, 2)
+    assert incremental_start(datetime(2024, 1, 2, 9, 17, 45), now) == datetime(
+        2024, 1, 2, 9, 10
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_incremental_advances_watermark(session):
+    mock_session_cm = MagicMock()
+    mock_session_cm.__aenter__ = AsyncMock(return_value=session)
+    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
+
+    calls = []
+    batches = [
+        [
+            {'timestamp': '2024-01-01T00:00:00', 'wind_speed': 10.0},
+            {'timestamp': '2024-01-01T00:12:00', 'wind_speed': 12.0},
+        ],
+        [
+            {'timestamp': '2024-01-01T00:12:00', 'wind_speed': 12.0},
+            {'timestamp': '2024-01-01T00:15:00', 'wind_speed': 16.0},
+        ],
+    ]
+
+    def iter_interval(start_time, end_time, metrics=None):
+        calls.append(start_time)
+        batch = batches[len(calls) - 1]
+
+        async def pages():
+            yield batch
+
+        return pages()
+
+    extractor = MagicMock(asset_ids=[])
+    extractor.iter_interval = iter_interval
+
+    with patch('app.etl.run.AsyncSessionLocal', return_value=mock_session_cm):
+        await run_incremental(extractor)
+        await run_incremental(extractor)
+
+    # A segunda execução começa na janela do watermark (00:10), não no dia
+    assert calls[1] == datetime(2024, 1, 1, 0, 10)
+
+    session.expire_all()
+    signal = (
+        await session.execute(select(Signal).where(Signal.name == 'wind_speed_mean'))
+    ).scalar_one()
+    result = await session.execute(
+        select(TargetData).where(
+            TargetData.signal_id == signal.id,
+            TargetData.timestamp == datetime(2024, 1, 1, 0, 10),
+        )
+    )
+    expected_mean = 14.0
+    assert result.scalar_one().value == expected_mean
+
+
+@pytest.mark.asyncio
+async def test_run_follow_reloads_windows_of_late_rows(session):
+    mock_session_cm = MagicMock()
+    mock_session_cm.__aenter__ = AsyncMock(return_value=session)
+    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
+
+    since = []
+    committed = []
+    # Ordem dos commits: a linha das 00:05 chega depois da janela seguinte
+    live_pages = [
+        [{'timestamp': '2024-01-01T00:00:00', 'wind_speed': 10.0}],
+        [{'timestamp': '2024-01-01T00:12:00', 'wind_speed': 20.0}],
+        [{'timestamp': '2024-01-01T00:05:00', 'wind_speed': 14.0}],
+    ]
+
+    async def iter_live(start_time, metrics=None):
+        since.append(start_time)
+        for page in live_pages:
+            committed.extend(page)
+            yield page
+
+    async def iter_interval(start_time, end_time, metrics=None):
+        yield [
+            row
+            for row in committed
+            if start_time <= datetime.fromisoformat(row['timestamp']) <= end_time
+        ]
+
+    extractor = MagicMock(asset_ids=[])
+    extractor.iter_live = iter_live
+    extractor.iter_interval = iter_interval
+
+    with patch('app.etl.run.AsyncSessionLocal', return_value=mock_session_cm):
+        await run_follow(extractor)
+        committed.clear()
+        await run_follow(extractor)
+
+    # O watermark é o maior timestamp visto (00:12), não o da última linha
+    assert since[1] == datetime(2024, 1, 1, 0, 10)
+
+    session.expire_all()
+    result = await session.execute(
+        select(TargetData.timestamp, TargetData.value)
+        .join(Signal)
+        .where(Signal.name == 'wind_speed_mean')
+        .order_by(TargetData.timestamp)
+    )
+    # A janela das 00:00 foi recalculada com a linha atrasada
+    assert result.all() == [
+        (datetime(2024, 1, 1), 12.0),
+        (datetime(2024, 1, 1, 0, 10), 20.0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_pipeline_skips_day_with_unchanged_digest(session):
+    target_date = datetime(2024, 1, 1)
+    mock_session_cm = MagicMock()
+    mock_session_cm.__aenter__ = AsyncMock(return_value=session)
+    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
+
+    pages_fetched = 0
+
+    async def iter_pages(*args, **kwargs):
+        nonlocal pages_fetched
+        pages_fetched += 1
+        yield [{'timestamp': '2024-01-01T00:00:00', 'wind_speed': 10.0}]
+
+    extractor = MagicMock()
+    extractor.day_range = Extractor.day_range
+    extractor.iter_pages = iter_pages
+    extractor.get_day_digest = AsyncMock(return_value=(1, 42))
+
+    with patch('app.etl.run.AsyncSessionLocal', return_value=mock_session_cm):
+        first = await run_pipeline(target_date, extractor)
+        second = await run_pipeline(target_date, extractor)
+        forced = await run_pipeline(target_date, extractor, force=True)
+
+        # A fonte mudou: o dia volta a ser processado
+        extractor.get_day_digest.return_value = (2, 99)
+        changed = await run_pipeline(target_date, extractor)
+
+    assert [first.status, second.status, forced.status, changed.status] == [
+        'ok',
+        'skipped',
+        'ok',
+        'ok',
+    ]
+    pages_expected = 3
+    assert pages_fetched == pages_expected
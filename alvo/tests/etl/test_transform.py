@@ -1,4 +1,5 @@
 import pandas as pd
+import pyarrow as pa
 
 from app.etl.transform import Transformer
 
@@ -78,3 +79,124 @@ def test_process_data_missing_metrics():
     assert any('wind_speed' in s for s in unique_signals)
     assert not any('power' in s for s in unique_signals)
     assert not any('ambient_temperature' in s for s in unique_signals)
+
+
+def test_process_data_aggregates_each_asset():
+    raw_data = [
+        {'timestamp': '2023-10-27T10:00:00', 'asset_id': 1, 'wind_speed': 10.0},
+        {'timestamp': '2023-10-27T10:00:00', 'asset_id': 2, 'wind_speed': 20.0},
+        {'timestamp': '2023-10-27T10:05:00', 'asset_id': 1, 'wind_speed': 12.0},
+        {'timestamp': '2023-10-27T10:05:00', 'asset_id': 2, 'wind_speed': 22.0},
+    ]
+
+    result = Transformer.process_data(raw_data)
+
+    means = result[result['signal_name'] == 'wind_speed_mean']
+    assert dict(zip(means['asset_id'], means['value'])) == {1: 11.0, 2: 21.0}
+
+
+def test_process_data_long_format_layout():
+    raw_data = [
+        {'timestamp': '2023-10-27T10:00:00', 'asset_id': 2, 'wind_speed': 10.0},
+        {'timestamp': '2023-10-27T10:00:00', 'asset_id': 1, 'wind_speed': 20.0},
+        {'timestamp': '2023-10-27T10:05:00', 'asset_id': 1, 'wind_speed': 22.0},
+    ]
+
+    result = Transformer.process_data(raw_data)
+
+    # Linhas agrupadas por sinal e, dentro dele, por (asset_id, timestamp);
+    # o std do ativo 2 (uma amostra só) é NaN e fica de fora
+    assert list(result.columns) == ['timestamp', 'asset_id', 'value', 'signal_name']
+    assert isinstance(result['signal_name'].dtype, pd.CategoricalDtype)
+    assert list(result['signal_name'].cat.categories) == [
+        'wind_speed_mean',
+        'wind_speed_min',
+        'wind_speed_max',
+        'wind_speed_std',
+    ]
+    assert result['signal_name'].tolist() == [
+        'wind_speed_mean',
+        'wind_speed_mean',
+        'wind_speed_min',
+        'wind_speed_min',
+        'wind_speed_max',
+        'wind_speed_max',
+        'wind_speed_std',
+    ]
+    assert result['asset_id'].tolist() == [1, 2, 1, 2, 1, 2, 1]
+    assert result['value'].tolist()[:2] == [21.0, 10.0]
+    assert result.index.tolist() == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_split_pending_window():
+    raw_data = [
+        {'timestamp': '2023-10-27T10:00:00', 'wind_speed': 10.0},
+        {'timestamp': '2023-10-27T10:09:00', 'wind_speed': 11.0},
+        {'timestamp': '2023-10-27T10:10:00', 'wind_speed': 12.0},
+        {'timestamp': '2023-10-27T10:15:00', 'wind_speed': 13.0},
+    ]
+    df = Transformer.to_frame(raw_data)
+
+    complete, pending = Transformer.split_pending_window(df)
+
+    # Janela 10:00 está completa; 10:10 pode continuar na próxima página
+    assert complete['wind_speed'].tolist() == [10.0, 11.0]
+    assert pending['wind_speed'].tolist() == [12.0, 13.0]
+
+
+def test_process_data_arrow_table_matches_dicts():
+    raw_data = [
+        {'timestamp': '2023-10-27T10:00:00', 'wind_speed': 10.0, 'power': 100.0},
+        {'timestamp': '2023-10-27T10:05:00', 'wind_speed': 20.0, 'power': 200.0},
+        {'timestamp': '2023-10-27T10:10:00', 'wind_speed': 15.0, 'power': 150.0},
+    ]
+    table = pa.table({
+        'timestamp': pa.array(
+            pd.to_datetime([r['timestamp'] for r in raw_data]), pa.timestamp('us')
+        ),
+        'wind_speed': [r['wind_speed'] for r in raw_data],
+        'power': [r['power'] for r in raw_data],
+    })
+
+    from_dicts = Transformer.process_data(raw_data)
+    from_table = Transformer.process_data(table)
+
+    pd.testing.assert_frame_equal(from_table, from_dicts, check_dtype=False)
+
+
+def test_from_aggregates_matches_process_data():
+    raw_data = [
+        {'timestamp': '2023-10-27T10:00:00', 'wind_speed': 10.0, 'power': 100.0},
+        {'timestamp': '2023-10-27T10:05:00', 'wind_speed': 20.0, 'power': None},
+        {'timestamp': '2023-10-27T10:10:00', 'wind_speed': 15.0, 'power': 150.0},
+    ]
+    # Mesmas janelas calculadas pela API Fonte (GET /sensors/aggregate)
+    aggregates = [
+        {
+            'timestamp': '2023-10-27T10:00:00',
+            'wind_speed_mean': 15.0,
+            'wind_speed_min': 10.0,
+            'wind_speed_max': 20.0,
+            'wind_speed_std': 7.0710678118654755,
+            'power_mean': 100.0,
+            'power_min': 100.0,
+            'power_max': 100.0,
+            'power_std': None,
+        },
+        {
+            'timestamp': '2023-10-27T10:10:00',
+            'wind_speed_mean': 15.0,
+            'wind_speed_min': 15.0,
+            'wind_speed_max': 15.0,
+            'wind_speed_std': None,
+            'power_mean': 150.0,
+            'power_min': 150.0,
+            'power_max': 150.0,
+            'power_std': None,
+        },
+    ]
+
+    expected = Transformer.process_data(raw_data).reset_index(drop=True)
+    result = Transformer.from_aggregates(aggregates).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=False)
@@ -0,0 +1,38 @@
+from argparse import Namespace
+from datetime import datetime
+
+import pytest
+
+from app.main import resolve_backfill_dates
+
+
+def _args(start=None, end=None, days=None):
+    return Namespace(start=start, end=end, days=days)
+
+
+def test_resolve_backfill_dates_start_end():
+    dates = resolve_backfill_dates(_args(start='2024-01-30', end='2024-02-02'))
+
+    assert dates == [
+        datetime(2024, 1, 30),
+        datetime(2024, 1, 31),
+        datetime(2024, 2, 1),
+        datetime(2024, 2, 2),
+    ]
+
+
+def test_resolve_backfill_dates_start_days():
+    dates = resolve_backfill_dates(_args(start='2024-01-01', days=3))
+
+    assert dates == [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)]
+
+
+def test_resolve_backfill_dates_end_days():
+    dates = resolve_backfill_dates(_args(end='2024-01-03', days=2))
+
+    assert dates == [datetime(2024, 1, 2), datetime(2024, 1, 3)]
+
+
+def test_resolve_backfill_dates_end_before_start_exits():
+    with pytest.raises(SystemExit):
+        resolve_backfill_dates(_args(start='2024-01-03', end='2024-01-01'))
@@ -0,0 +1,80 @@
+"""Partition data by timestamp
+
+Revision ID: 5c7e1f9a2d40
+Revises: ad887fb0f004
+Create Date: 2026-10-18 16:21:47.302914
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.config.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7e1f9a2d40'
+down_revision: Union[str, Sequence[str], None] = 'ad887fb0f004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A tabela atual vira a primeira partição (sem copiar linhas). A chave de
+    # partição precisa estar na PK, que passa a ser (id, timestamp).
+    op.rename_table('data', 'data_legacy')
+    op.execute('ALTER INDEX ix_data_timestamp RENAME TO data_legacy_timestamp_idx')
+    op.drop_constraint('data_pkey', 'data_legacy', type_='primary')
+    op.create_primary_key('data_legacy_pkey', 'data_legacy', ['id', 'timestamp'])
+    op.execute('ALTER TABLE data_legacy ALTER COLUMN id DROP DEFAULT')
+
+    op.create_table('data',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('data_id_seq')"), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('wind_speed', sa.Float(), nullable=True),
+    sa.Column('power', sa.Float(), nullable=True),
+    sa.Column('ambient_temperature', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'timestamp'),
+    postgresql_partition_by='RANGE (timestamp)'
+    )
+    op.execute('ALTER SEQUENCE data_id_seq OWNED BY data.id')
+    op.create_index(
+        op.f('ix_data_timestamp'),
+        'data',
+        ['timestamp'],
+        unique=False,
+        postgresql_using=settings.DATA_TIMESTAMP_INDEX,
+    )
+    op.execute('CREATE TABLE data_default PARTITION OF data DEFAULT')
+
+    # Limites da tabela legada alinhados ao intervalo das partições, para não
+    # se sobreporem às partições criadas depois
+    interval = settings.PARTITION_INTERVAL
+    lower, upper = op.get_bind().execute(sa.text(
+        f"SELECT date_trunc('{interval}', min(timestamp)), "
+        f"date_trunc('{interval}', max(timestamp)) + interval '1 {interval}' "
+        'FROM data_legacy'
+    )).one()
+    if lower is None:
+        op.drop_table('data_legacy')
+        return
+
+    if settings.DATA_TIMESTAMP_INDEX != 'btree':
+        # O índice B-tree não casa com o do pai; o ATTACH cria o equivalente
+        op.execute('DROP INDEX data_legacy_timestamp_idx')
+    op.execute(
+        'ALTER TABLE data ATTACH PARTITION data_legacy '
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('CREATE TABLE data_plain (LIKE data INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO data_plain SELECT * FROM data')
+    op.execute('ALTER SEQUENCE data_id_seq OWNED BY data_plain.id')
+    op.drop_table('data')
+    op.rename_table('data_plain', 'data')
+    op.create_primary_key('data_pkey', 'data', ['id'])
+    op.create_index(op.f('ix_data_timestamp'), 'data', ['timestamp'], unique=False)
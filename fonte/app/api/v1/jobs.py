@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.job import PopulateJobResponse
+from app.services.populate_jobs import populate_jobs
+
+router = APIRouter(prefix='/jobs', tags=['jobs'])
+
+
+@router.get('/{job_id}', response_model=PopulateJobResponse)
+async def get_job(job_id: str):
+    """
+    Progresso de um job de população: linhas gravadas, vazão e ETA.
+    """
+    job = populate_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job não encontrado')
+    return job.summary()
+
+
+@router.delete('/{job_id}', response_model=PopulateJobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancela o job. Lotes já commitados permanecem no banco.
+    """
+    job = await populate_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job não encontrado')
+    return job.summary()
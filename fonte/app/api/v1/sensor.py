@@ -1,73 +1,456 @@
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from datetime import timedelta
+from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.infra.database.database import get_session
+from app.config.config import settings
+from app.infra.database.database import (
+    get_read_session,
+    get_session,
+    get_session_factory,
+)
+from app.infra.database.replicas import REPLICA_SESSION_KEY
+from app.infra.models.sensor import SensorData
 from app.infra.repositories.sensor_repository import SensorRepository
+from app.schemas.job import PopulateJobResponse
 from app.schemas.sensor import (
     InertialSensorDataStructure,
+    SensorAggregateFilter,
+    SensorAggregateResponse,
+    SensorBatchResponse,
     SensorDataCreate,
     SensorDataFilter,
     SensorDataResponse,
+    SensorDigestFilter,
+    SensorDigestResponse,
+    SensorLiveFilter,
+    SensorStatsFilter,
+    SensorStatsResponse,
+    decode_cursor,
+    decode_live_cursor,
+    encode_cursor,
+)
+from app.services.live_tail import EVENT_STREAM_MEDIA_TYPE, live_events
+from app.services.populate_jobs import populate_jobs
+from app.services.response_cache import (
+    CachedResponse,
+    cache_key,
+    is_cacheable,
+    response_cache,
+)
+from app.services.sensor_export import (
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    arrow_stream,
+    json_bytes,
+    parquet_bytes,
 )
-from app.services.sensor_data_generator import SensorDataGenerator
+from app.services.sensor_ingest import ingest_batch, micro_batcher, parse_readings
 
 router = APIRouter(prefix='/sensors', tags=['sensors'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
+# Rotas somente leitura: réplica de leitura quando configurada
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+SessionFactory = Annotated[
+    async_sessionmaker[AsyncSession], Depends(get_session_factory)
+]
+
+# Header com o cursor da próxima página (ausente na última página)
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+# Formato streaming: um objeto JSON por linha
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# Representações negociadas via Accept (JSON é o padrão)
+JSON_MEDIA_TYPE = 'application/json'
+NEGOTIATED_MEDIA_TYPES = (
+    NDJSON_MEDIA_TYPE,
+    ARROW_STREAM_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+)
+
+
+def _row_cursor(row: SensorData | dict) -> str:
+    if isinstance(row, dict):
+        return encode_cursor(row['timestamp'], row['id'])
+    return encode_cursor(row.timestamp, row.id)
+
+
+def _range_args(filter: SensorDataFilter) -> dict:
+    return {
+        'start_date': filter.start_date,
+        'end_date': filter.end_date,
+        'metrics': filter.metrics,
+        'limit': filter.limit,
+        'after': decode_cursor(filter.after) if filter.after else None,
+        'asset_ids': filter.asset_id,
+    }
+
+
+def _etag(filter: SensorDataFilter, media_type: str, digest: tuple[int, int]) -> str:
+    """
+    ETag da resposta: parâmetros da consulta, representação e o digest
+    (contagem, checksum) do intervalo no banco.
+    """
+    key = json.dumps([filter.model_dump(mode='json'), media_type, digest])
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def _uses_response_cache(filter: SensorDataFilter, media_type: str | None) -> bool:
+    # Apenas representações bufferizadas (JSON rápido e Parquet) vão para o cache
+    buffered = media_type == PARQUET_MEDIA_TYPE or (
+        media_type is None and settings.SENSORS_FAST_JSON
+    )
+    return settings.RESPONSE_CACHE_ENABLED and buffered and is_cacheable(filter)
+
+
+def _cached_response(cached: CachedResponse, if_none_match: str | None) -> Response:
+    etag = cached.headers.get('ETag')
+    if etag and _etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag})
+    return Response(cached.body, media_type=cached.media_type, headers=cached.headers)
+
+
+async def _buffered_body(
+    db: AsyncSession,
+    filter: SensorDataFilter,
+    media_type: str | None,
+    headers: dict[str, str],
+) -> bytes:
+    """
+    Corpo completo das representações não-streaming: Parquet ou JSON rápido.
+    """
+    if media_type == PARQUET_MEDIA_TYPE:
+        batches = SensorRepository.stream_columns_by_range(db, **_range_args(filter))
+        return await parquet_bytes(batches, filter.metrics)
+
+    rows = await SensorRepository.get_rows_by_range(db, **_range_args(filter))
+    # Página cheia: pode haver mais registros após o último retornado
+    if filter.limit and len(rows) == filter.limit:
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last[0], last[-1])
+    return json_bytes(rows)
+
+
+async def _ndjson_lines(
+    db: AsyncSession, filter: SensorDataFilter
+) -> AsyncIterator[str]:
+    rows = SensorRepository.stream_data_by_range(db, **_range_args(filter))
+    async for row in rows:
+        yield SensorDataResponse.model_validate(row).model_dump_json() + '\n'
 
 
 @router.get('', response_model=list[SensorDataResponse])
 async def get_sensor_data(
     filter: Annotated[SensorDataFilter, Query()],
-    db: Session,
+    db: ReadSession,
+    request: Request,
+    response: Response,
 ):
     """
     Retorna dados da tabela 'data' filtrados por intervalo de tempo.
     Permite selecionar colunas específicas.
+    Com `limit` a resposta é paginada (keyset em timestamp + id): o cursor
+    da próxima página vem no header X-Next-Cursor e deve ser enviado em `after`.
+    Com `Accept: application/x-ndjson` as linhas são enviadas em streaming,
+    uma por linha, conforme saem do cursor do banco.
+    Com `asset_id` (repetível) apenas os ativos pedidos são retornados.
+    Com `Accept: application/vnd.apache.arrow.stream` (ou `.parquet`) a resposta
+    é colunar, contendo apenas timestamp, asset_id e as métricas selecionadas.
+    Em JSON, com SENSORS_FAST_JSON, as linhas vão do banco para o orjson
+    sem passar pelo ORM nem pelo `response_model` (mesmo contrato).
+    JSON e Parquet de intervalos já fechados ficam no cache LRU em memória.
+    Respostas não-streaming levam um ETag calculado sobre as linhas da página;
+    com `If-None-Match` igual a ele e a página inalterada no banco, a resposta
+    é 304 sem corpo.
     """
     if filter.start_date > filter.end_date:
         raise HTTPException(
             status_code=400, detail='start_date deve ser menor que end_date'
         )
 
-    print('Fetching sensor data with filter:', filter)
-    results = await SensorRepository.get_data_by_range(
-        db, filter.start_date, filter.end_date, filter.metrics
-    )
+    accept = request.headers.get('accept', '')
+    media_type = next((m for m in NEGOTIATED_MEDIA_TYPES if m in accept), None)
+    if_none_match = request.headers.get('if-none-match')
+
+    key = None
+    generation = response_cache.generation
+    if _uses_response_cache(filter, media_type):
+        key = cache_key(filter, media_type or JSON_MEDIA_TYPE)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return _cached_response(cached, if_none_match)
+
+    headers = {}
+    # Streaming (NDJSON/Arrow) não leva ETag: o checksum exigiria ler o
+    # intervalo inteiro antes do primeiro byte
+    streaming = media_type in {NDJSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE}
+    if settings.SENSORS_ETAG_ENABLED and not streaming:
+        args = _range_args(filter)
+        digest = await SensorRepository.get_range_checksum(
+            db,
+            filter.start_date,
+            filter.end_date,
+            filter.asset_id,
+            limit=args['limit'],
+            after=args['after'],
+        )
+        headers['ETag'] = _etag(filter, media_type or JSON_MEDIA_TYPE, digest)
+        if _etag_matches(if_none_match, headers['ETag']):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    if media_type == NDJSON_MEDIA_TYPE:
+        return StreamingResponse(
+            _ndjson_lines(db, filter), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        batches = SensorRepository.stream_columns_by_range(db, **_range_args(filter))
+        return StreamingResponse(
+            arrow_stream(batches, filter.metrics),
+            media_type=ARROW_STREAM_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    if media_type == PARQUET_MEDIA_TYPE or settings.SENSORS_FAST_JSON:
+        body = await _buffered_body(db, filter, media_type, headers)
+        media_type = media_type or JSON_MEDIA_TYPE
+        if key is not None:
+            entry = CachedResponse(
+                body, media_type, dict(headers), filter.start_date, filter.end_date
+            )
+            ttl = None
+            if REPLICA_SESSION_KEY in db.info:
+                ttl = settings.RESPONSE_CACHE_REPLICA_TTL_SECONDS
+            response_cache.put(key, entry, generation, ttl)
+        return Response(body, media_type=media_type, headers=headers)
+
+    results = await SensorRepository.get_data_by_range(db, **_range_args(filter))
+    response.headers.update(headers)
+
+    # Página cheia: pode haver mais registros após o último retornado
+    if filter.limit and len(results) == filter.limit:
+        response.headers[NEXT_CURSOR_HEADER] = _row_cursor(results[-1])
+
     return results
 
 
+@router.get('/cache')
+async def get_response_cache_stats():
+    """
+    Contadores do cache de respostas (hits, misses, evictions, invalidações).
+    """
+    return response_cache.summary()
+
+
+@router.get('/live')
+async def get_sensor_live(
+    filter: Annotated[SensorLiveFilter, Query()],
+    session_factory: SessionFactory,
+    last_event_id: Annotated[str | None, Header()] = None,
+):
+    """
+    Live tail (Server-Sent Events): envia as linhas novas assim que são
+    commitadas, avisado por LISTEN/NOTIFY, sem polling. Cada evento traz uma
+    linha em `data` e a posição na ordem dos commits em `id`; ao reconectar,
+    `Last-Event-ID` (ou `after`) retoma do último evento recebido e `since`
+    inclui as linhas a partir de um timestamp. Sem dados novos, envia um
+    comentário de keep-alive a cada LIVE_TAIL_HEARTBEAT_SECONDS.
+    """
+    if not settings.LIVE_TAIL_ENABLED:
+        raise HTTPException(status_code=404, detail='Live tail desativado')
+
+    cursor = last_event_id or filter.after
+    try:
+        after = decode_live_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    events = live_events(
+        session_factory,
+        metrics=filter.metrics,
+        asset_ids=filter.asset_id,
+        since=filter.since,
+        after=after,
+    )
+    return StreamingResponse(
+        events,
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        # Sem cache nem buffer em proxies (nginx): cada evento sai na hora
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.get('/aggregate', response_model=list[SensorAggregateResponse])
+async def get_sensor_aggregates(
+    filter: Annotated[SensorAggregateFilter, Query()],
+    db: ReadSession,
+):
+    """
+    Estatísticas (mean, min, max, std) por janela de `bucket_minutes`,
+    calculadas no banco. Equivale ao resample do ETL, sem trafegar as
+    linhas de minuto a minuto. Cada ativo tem as suas janelas. Janelas
+    múltiplas de 10 minutos são montadas a partir da tabela de rollup
+    (ROLLUP_ENABLED).
+    """
+    if filter.start_date > filter.end_date:
+        raise HTTPException(
+            status_code=400, detail='start_date deve ser menor que end_date'
+        )
+
+    return await SensorRepository.get_aggregates_by_range(
+        db,
+        filter.start_date,
+        filter.end_date,
+        bucket=timedelta(minutes=filter.bucket_minutes),
+        metrics=filter.metrics,
+        stats=filter.stats,
+        rollup=settings.ROLLUP_ENABLED,
+        asset_ids=filter.asset_id,
+    )
+
+
+@router.get('/digest', response_model=list[SensorDigestResponse])
+async def get_sensor_digest(
+    filter: Annotated[SensorDigestFilter, Query()],
+    db: ReadSession,
+):
+    """
+    Contagem e checksum dos registros por dia (ou hora) do intervalo.
+    Permite ao consumidor saber, sem baixar os dados, se um período mudou.
+    """
+    if filter.start_date > filter.end_date:
+        raise HTTPException(
+            status_code=400, detail='start_date deve ser menor que end_date'
+        )
+
+    return await SensorRepository.get_digest_by_range(
+        db, filter.start_date, filter.end_date, filter.bucket, filter.asset_id
+    )
+
+
+@router.get('/stats', response_model=list[SensorStatsResponse])
+async def get_sensor_stats(
+    filter: Annotated[SensorStatsFilter, Query()],
+    db: ReadSession,
+):
+    """
+    Quantidade de registros e primeiro/último timestamp por dia (ou hora) do
+    intervalo, lidos só do índice. Permite ao consumidor dimensionar a
+    extração e pular períodos vazios antes de pedir os dados.
+    """
+    if filter.start_date > filter.end_date:
+        raise HTTPException(
+            status_code=400, detail='start_date deve ser menor que end_date'
+        )
+
+    return await SensorRepository.get_stats_by_range(
+        db, filter.start_date, filter.end_date, filter.bucket, filter.asset_id
+    )
+
+
 @router.post('', status_code=201, response_model=SensorDataResponse)
 async def create_sensor_data(
     data: SensorDataCreate,
     db: Session,
+    session_factory: SessionFactory,
 ):
     """
-    Insere um novo registro na tabela 'data'.
+    Insere um novo registro na tabela 'data'. Com INGEST_MICROBATCH_ENABLED,
+    registros de requisições concorrentes são gravados juntos.
     """
+    if settings.INGEST_MICROBATCH_ENABLED:
+        await micro_batcher.submit(data, session_factory)
+        return data
+
     new_data = await SensorRepository.insert_sensor_data(
         db,
         timestamp=data.timestamp,
         wind_speed=data.wind_speed,
         power=data.power,
         ambient_temperature=data.ambient_temperature,
+        asset_id=data.asset_id,
     )
     return new_data
 
 
-@router.post('/populate_database', status_code=201)
-async def populate_database(
-    payload: InertialSensorDataStructure,
+@router.post('/batch', status_code=201, response_model=SensorBatchResponse)
+async def create_sensor_data_batch(
+    request: Request,
     db: Session,
+    idempotent: bool = False,
 ):
     """
-    Endpoint para popular o banco de dados.
+    Insere um lote de leituras (array JSON ou NDJSON) numa única transação,
+    via COPY/INSERT em lote. Com `idempotent=true`, leituras cujo par
+    (asset_id, timestamp) já existe são ignoradas.
     """
-    generator = SensorDataGenerator(db)
+    body = await request.body()
+    ndjson = request.headers.get('content-type', '').startswith(NDJSON_MEDIA_TYPE)
     try:
-        result = await generator.generate_data(payload.start_date, payload.days)
-        return {'message': 'Dados inseridos com sucesso', 'details': result}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        readings = parse_readings(body, ndjson)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False), body=body)
+
+    if len(readings) > settings.INGEST_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f'Máximo de {settings.INGEST_BATCH_MAX_ROWS} leituras por lote',
+        )
+
+    result = await ingest_batch(db, readings, idempotent)
+    return {
+        'received': result.received,
+        'inserted': result.inserted,
+        'skipped': result.skipped,
+    }
+
+
+@router.post(
+    '/populate_database',
+    status_code=202,
+    response_model=PopulateJobResponse,
+)
+async def populate_database(
+    payload: InertialSensorDataStructure,
+    session_factory: SessionFactory,
+    request: Request,
+    response: Response,
+):
+    """
+    Inicia a população do banco em segundo plano e retorna o job na hora.
+    O progresso fica em GET /jobs/{job_id}; DELETE cancela.
+    """
+    job = populate_jobs.start(
+        payload.start_date,
+        payload.days,
+        session_factory,
+        seed=payload.seed,
+        assets=payload.assets,
+    )
+    response.headers['Location'] = str(request.url_for('get_job', job_id=job.id))
+    return job.summary()
@@ -1,18 +1,55 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config.config import settings
+from app.infra.database.pool import InstrumentedPool, connect_args
+from app.infra.database.replicas import ReadRouter
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    # Pool configurável e instrumentado, igual para primário e réplicas
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args(
+            settings.DB_STATEMENT_TIMEOUT_MS, settings.DB_PREPARE_THRESHOLD
+        ),
+    )
+
 
 # Cria a engine assíncrona
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+engine = _create_engine(settings.DATABASE_URL)
+
+# Engines das réplicas de leitura (vazio sem DATABASE_REPLICA_URLS)
+replica_engines = [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
 
 # Fábrica de sessões
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+read_router = ReadRouter(
+    primary=AsyncSessionLocal,
+    replicas=[
+        async_sessionmaker(bind=e, class_=AsyncSession, expire_on_commit=False)
+        for e in replica_engines
+    ],
+    retry_seconds=settings.REPLICA_RETRY_SECONDS,
+)
+
 
 # Base para os Models
 class Base(DeclarativeBase):
@@ -23,3 +60,18 @@ class Base(DeclarativeBase):
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# Dependência das rotas somente leitura: réplica (se houver) ou primário
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    session = await read_router.connect()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+# Fábrica de sessões para tarefas em segundo plano, que abrem as próprias
+# sessões (uma por conexão do pool) em vez de usar a da requisição
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    return AsyncSessionLocal
@@ -0,0 +1,129 @@
+import time
+
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Buckets de tempo de SQL (s): de consultas por índice a agregações longas
+QUERY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Linhas por consulta: de 1 a ~1 milhão em potências de 4
+ROWS_BUCKETS = tuple(4**i for i in range(11))
+
+# Chave em `connection.info` com os inícios das execuções em andamento
+QUERY_START_KEY = 'metrics_query_start'
+
+QUERY_DURATION = Histogram(
+    'fonte_db_query_duration_seconds',
+    'Tempo de execução das instruções SQL (até o retorno do driver)',
+    ['operation'],
+    buckets=QUERY_BUCKETS,
+)
+QUERY_ROWS = Histogram(
+    'fonte_db_query_rows',
+    'Linhas retornadas (SELECT) ou afetadas (INSERT/UPDATE/DELETE) por instrução',
+    ['operation'],
+    buckets=ROWS_BUCKETS,
+)
+
+
+def operation_label(statement: str) -> str:
+    # Primeira palavra da instrução: SELECT, INSERT, COPY, WITH...
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else 'UNKNOWN'
+
+
+def _before_cursor_execute(conn, **kw):
+    conn.info.setdefault(QUERY_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, **kw):
+    started = conn.info[QUERY_START_KEY].pop()
+    operation = operation_label(statement)
+    QUERY_DURATION.labels(operation).observe(time.perf_counter() - started)
+    # Cursores no servidor (streaming) ainda não sabem quantas linhas virão
+    if cursor.rowcount >= 0:
+        QUERY_ROWS.labels(operation).observe(cursor.rowcount)
+
+
+def _handle_error(exception_context):
+    # Execução que falhou não passa pelo after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(QUERY_START_KEY):
+        connection.info[QUERY_START_KEY].pop()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Registra os eventos de tempo de SQL na engine (idempotente).
+    """
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(
+        sync_engine, 'before_cursor_execute', _before_cursor_execute, named=True
+    )
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute, named=True)
+    event.listen(sync_engine, 'handle_error', _handle_error)
+
+
+class PoolCollector:
+    """
+    Expõe o estado dos pools (InstrumentedPool) a cada coleta do /metrics,
+    com o rótulo `database` ('primary', 'replica0', ...).
+    """
+
+    def __init__(self, engines: dict[str, AsyncEngine]):
+        self.engines = engines
+
+    def collect(self):
+        pools = {name: e.pool.summary() for name, e in self.engines.items()}
+        gauges = {
+            'size': 'Conexões mantidas no pool (pool_size)',
+            'checked_out': 'Conexões em uso',
+            'checked_in': 'Conexões livres no pool',
+            'overflow': 'Conexões de overflow abertas',
+        }
+        for name, documentation in gauges.items():
+            family = GaugeMetricFamily(
+                f'fonte_db_pool_{name}', documentation, labels=['database']
+            )
+            for database, pool in pools.items():
+                family.add_metric([database], pool[name])
+            yield family
+
+        counters = {
+            'checkouts': 'Checkouts de conexão',
+            'connects': 'Conexões abertas no banco',
+            'overflow_checkouts': 'Checkouts atendidos por conexões de overflow',
+            'timeouts': 'Esperas por conexão que estouraram pool_timeout',
+            'wait_seconds': 'Tempo total esperando por conexão',
+        }
+        for name, documentation in counters.items():
+            family = CounterMetricFamily(
+                f'fonte_db_pool_{name}', documentation, labels=['database']
+            )
+            for database, pool in pools.items():
+                key = 'wait_seconds_total' if name == 'wait_seconds' else name
+                family.add_metric([database], pool[key])
+            yield family
+
+
+def register_pool_collector(engines: dict[str, AsyncEngine], registry=REGISTRY):
+    registry.register(PoolCollector(engines))
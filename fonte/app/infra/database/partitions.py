@@ -0,0 +1,182 @@
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config.config import settings
+from app.infra.models.sensor import DEFAULT_PARTITION, SensorData
+
+PARENT_TABLE = SensorData.__tablename__
+
+# Serializa a criação de partições entre processos/transações concorrentes
+PARTITION_LOCK_KEY = 'data_partitions'
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+# Intervalos de partição já vistos no banco por este processo: inserções que só
+# tocam esses intervalos não consultam o catálogo
+_known_ranges: set[tuple[datetime, datetime]] = set()
+
+
+def partition_start(moment: datetime, interval: str) -> datetime:
+    """
+    Início do dia (ou do mês) que contém `moment`.
+    """
+    start = moment.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def next_partition_start(start: datetime, interval: str) -> datetime:
+    if interval == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    suffix = f'{start:%Y%m%d}' if interval == 'day' else f'{start:%Y%m}'
+    return f'{PARENT_TABLE}_p{suffix}'
+
+
+def partition_ranges(
+    start_date: datetime, end_date: datetime, interval: str
+) -> list[tuple[datetime, datetime]]:
+    """
+    Intervalos [início, fim) das partições que cobrem [start_date, end_date].
+    """
+    ranges = []
+    lower = partition_start(start_date, interval)
+    while lower <= end_date.replace(tzinfo=None):
+        upper = next_partition_start(lower, interval)
+        ranges.append((lower, upper))
+        lower = upper
+    return ranges
+
+
+async def get_partition_bounds(
+    db: AsyncSession | AsyncConnection,
+) -> dict[str, tuple[datetime, datetime] | None]:
+    """
+    Partições existentes de 'data' e seus limites (None para a DEFAULT).
+    """
+    result = await db.execute(
+        text(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = CAST(:parent AS regclass)'
+        ),
+        {'parent': PARENT_TABLE},
+    )
+    bounds = {}
+    for name, expression in result:
+        match = _BOUND_PATTERN.search(expression)
+        bounds[name] = (
+            (
+                datetime.fromisoformat(match.group(1)),
+                datetime.fromisoformat(match.group(2)),
+            )
+            if match
+            else None
+        )
+    return bounds
+
+
+def _missing_ranges(
+    ranges: list[tuple[datetime, datetime]],
+    bounds: dict[str, tuple[datetime, datetime] | None],
+) -> list[tuple[datetime, datetime]]:
+    # Intervalos que se sobrepõem a qualquer partição existente (p.ex. a tabela
+    # legada anexada na migração) ficam com ela ou com a DEFAULT
+    existing = [b for b in bounds.values() if b is not None]
+    return [
+        (lower, upper)
+        for lower, upper in ranges
+        if not any(lower < end and start < upper for start, end in existing)
+    ]
+
+
+async def _create_partition(
+    db: AsyncSession | AsyncConnection, name: str, lower: datetime, upper: datetime
+):
+    # DDL não aceita parâmetros: os limites são datas geradas aqui, não entrada
+    lower_literal, upper_literal = f"'{lower.isoformat()}'", f"'{upper.isoformat()}'"
+    await db.execute(
+        text(
+            f'CREATE TABLE {name} '
+            f'(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+    )
+    # Linhas do intervalo que caíram na DEFAULT são movidas para a nova
+    # partição; senão o ATTACH falharia
+    await db.execute(
+        text(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE timestamp >= {lower_literal} AND timestamp < {upper_literal} '
+            f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'
+        )
+    )
+    await db.execute(
+        text(
+            f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} '
+            f'FOR VALUES FROM ({lower_literal}) TO ({upper_literal})'
+        )
+    )
+
+
+def clear_partition_cache():
+    """
+    Esquece as partições já vistas (ex: após recriar a tabela 'data').
+    """
+    _known_ranges.clear()
+
+
+async def ensure_partitions(
+    db: AsyncSession | AsyncConnection,
+    start_date: datetime,
+    end_date: datetime,
+    interval: str = settings.PARTITION_INTERVAL,
+) -> list[str]:
+    """
+    Cria as partições que faltam para cobrir [start_date, end_date] e
+    retorna seus nomes. Não faz commit: roda na transação de quem chamou.
+    Intervalos já vistos no banco são conferidos só em memória.
+    """
+    ranges = partition_ranges(start_date, end_date, interval)
+    if _known_ranges.issuperset(ranges):
+        return []
+
+    missing = _missing_ranges(ranges, await get_partition_bounds(db))
+    # Só as que já existiam: as criadas aqui somem se a transação abortar
+    _known_ranges.update(set(ranges) - set(missing))
+    if not missing:
+        return []
+
+    await db.execute(
+        text('SELECT pg_advisory_xact_lock(hashtext(:key))'),
+        {'key': PARTITION_LOCK_KEY},
+    )
+    # Relê após o lock: outra transação pode ter criado as mesmas partições
+    created = []
+    for lower, upper in _missing_ranges(ranges, await get_partition_bounds(db)):
+        name = partition_name(lower, interval)
+        await _create_partition(db, name, lower, upper)
+        created.append(name)
+    return created
+
+
+async def premake_partitions(
+    db: AsyncSession | AsyncConnection,
+    now: datetime | None = None,
+    interval: str = settings.PARTITION_INTERVAL,
+    count: int = settings.PARTITION_PREMAKE,
+) -> list[str]:
+    """
+    Garante a partição corrente e as `count` seguintes.
+    """
+    start = partition_start(now or datetime.now(), interval)
+    end = start
+    for _ in range(count):
+        end = next_partition_start(end, interval)
+    return await ensure_partitions(db, start, end, interval)
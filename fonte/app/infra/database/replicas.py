@@ -0,0 +1,73 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Chave em `session.info` com o índice da réplica que atende a sessão (ausente
+# nas sessões do primário)
+REPLICA_SESSION_KEY = 'replica'
+
+
+@dataclass
+class ReadRouter:
+    """
+    Escolhe a sessão das leituras: réplicas em round-robin e, se nenhuma
+    estiver disponível, o primário. Uma réplica que falha ao conectar fica
+    fora do rodízio por `retry_seconds`.
+    """
+
+    primary: async_sessionmaker[AsyncSession]
+    replicas: list[async_sessionmaker[AsyncSession]] = field(default_factory=list)
+    retry_seconds: float = 30.0
+    _next: int = 0
+    _down_until: dict[int, float] = field(default_factory=dict)
+
+    def healthy_replicas(self) -> list[tuple[int, async_sessionmaker[AsyncSession]]]:
+        """
+        Réplicas disponíveis, começando pela próxima da vez no rodízio.
+        """
+        count = len(self.replicas)
+        if not count:
+            return []
+
+        now = time.monotonic()
+        order = [(self._next + offset) % count for offset in range(count)]
+        self._next = (self._next + 1) % count
+        return [
+            (index, self.replicas[index])
+            for index in order
+            if self._down_until.get(index, 0.0) <= now
+        ]
+
+    def mark_down(self, index: int):
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    async def connect(self) -> AsyncSession:
+        """
+        Sessão de leitura. Nas réplicas a conexão é obtida aqui, para que uma
+        réplica fora do ar dê lugar à próxima (ou ao primário) antes de a
+        requisição começar.
+        """
+        for index, factory in self.healthy_replicas():
+            session = factory()
+            try:
+                await session.connection()
+            except (DBAPIError, OSError) as e:
+                await session.close()
+                logger.warning('Réplica %d indisponível, usando outra: %s', index, e)
+                self.mark_down(index)
+                continue
+            session.info[REPLICA_SESSION_KEY] = index
+            return session
+        return self.primary()
+
+    def summary(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {'replica': index, 'available': self._down_until.get(index, 0.0) <= now}
+            for index in range(len(self.replicas))
+        ]
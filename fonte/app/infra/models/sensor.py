@@ -1,5 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from sqlalchemy import DDL, BigInteger, Index, event, text
 from sqlalchemy.orm import (
     Mapped,
     mapped_as_dataclass,
@@ -7,15 +8,99 @@ from sqlalchemy.orm import (
     registry,
 )
 
+from app.config.config import settings
+
 table_registry = registry()
 
+# Partição que recebe linhas sem partição de intervalo correspondente
+DEFAULT_PARTITION = 'data_default'
+
+# Ativo (turbina) das leituras gravadas sem asset_id, inclusive as anteriores
+# à coluna existir
+DEFAULT_ASSET_ID = 1
+
+# Largura das janelas da tabela de rollup; janelas maiores que sejam múltiplas
+# dela são montadas somando as de 10 minutos
+ROLLUP_BUCKET = timedelta(minutes=10)
+
+# Transação (xid) que gravou a linha. Timestamp e id são atribuídos antes do
+# commit; o live tail lê pelo xid e só depois que as transações anteriores
+# terminam, então commits fora de ordem não ficam para trás do cursor
+INGEST_XID_DEFAULT = text('(pg_current_xact_id()::text)::bigint')
+
 
 @mapped_as_dataclass(table_registry)
 class SensorData:
+    """
+    Tabela particionada por intervalo de timestamp (ver
+    app/infra/database/partitions.py). A chave de partição precisa fazer
+    parte da chave primária, por isso ela é (id, timestamp).
+    Cada leitura pertence a um ativo (`asset_id`); o índice (asset_id,
+    timestamp) atende as consultas por ativo dentro de cada partição.
+    `ingest_xid` guarda a transação que gravou a linha (nula nas anteriores à
+    coluna) e é a posição usada pelo live tail (ver services.live_tail).
+    """
+
     __tablename__ = 'data'
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True, autoincrement=True)
-    timestamp: Mapped[datetime] = mapped_column(nullable=False, index=True)
+    timestamp: Mapped[datetime] = mapped_column(primary_key=True, nullable=False)
     wind_speed: Mapped[float] = mapped_column(nullable=True)
     power: Mapped[float] = mapped_column(nullable=True)
     ambient_temperature: Mapped[float] = mapped_column(nullable=True)
+    asset_id: Mapped[int] = mapped_column(
+        nullable=False,
+        default=DEFAULT_ASSET_ID,
+        server_default=str(DEFAULT_ASSET_ID),
+    )
+    ingest_xid: Mapped[int | None] = mapped_column(
+        BigInteger, init=False, nullable=True, server_default=INGEST_XID_DEFAULT
+    )
+
+    __table_args__ = (
+        Index(
+            'ix_data_timestamp',
+            'timestamp',
+            postgresql_using=settings.DATA_TIMESTAMP_INDEX,
+        ),
+        Index('ix_data_asset_timestamp', 'asset_id', 'timestamp'),
+        Index('ix_data_ingest_xid', 'ingest_xid', 'id'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+
+
+@mapped_as_dataclass(table_registry)
+class SensorRollup:
+    """
+    Agregados de 'data' por ativo e janela de ROLLUP_BUCKET, mantidos a cada
+    inserção (ver SensorRepository). Soma, soma dos quadrados e contagem
+    permitem derivar média e desvio padrão de qualquer janela múltipla; a
+    contagem é por métrica porque medições nulas não entram nas estatísticas.
+    """
+
+    __tablename__ = 'sensor_rollup'
+
+    asset_id: Mapped[int] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    wind_speed_sum: Mapped[float]
+    wind_speed_sumsq: Mapped[float]
+    wind_speed_count: Mapped[int] = mapped_column(BigInteger)
+    wind_speed_min: Mapped[float | None]
+    wind_speed_max: Mapped[float | None]
+    power_sum: Mapped[float]
+    power_sumsq: Mapped[float]
+    power_count: Mapped[int] = mapped_column(BigInteger)
+    power_min: Mapped[float | None]
+    power_max: Mapped[float | None]
+    ambient_temperature_sum: Mapped[float]
+    ambient_temperature_sumsq: Mapped[float]
+    ambient_temperature_count: Mapped[int] = mapped_column(BigInteger)
+    ambient_temperature_min: Mapped[float | None]
+    ambient_temperature_max: Mapped[float | None]
+
+
+event.listen(
+    SensorData.__table__,
+    'after_create',
+    DDL(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF data DEFAULT'),
+)
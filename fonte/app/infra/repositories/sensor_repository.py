@@ -1,30 +1,395 @@
+import json
+from collections.abc import AsyncIterator, Iterable, Sequence
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import insert, select
+import numpy as np
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Float,
+    Select,
+    Text,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    null,
+    or_,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infra.models.sensor import SensorData
+from app.config.config import settings
+from app.infra.database.partitions import ensure_partitions
+from app.infra.models.sensor import (
+    DEFAULT_ASSET_ID,
+    ROLLUP_BUCKET,
+    SensorData,
+    SensorRollup,
+)
+
+# Colunas de medição disponíveis na tabela 'data'
+METRIC_COLUMNS = ('wind_speed', 'power', 'ambient_temperature')
+
+# Estatísticas por janela, com a mesma semântica do pandas
+# (std amostral, ddof=1). Valores nulos são ignorados em todas.
+AGGREGATE_FUNCTIONS = {
+    'mean': func.avg,
+    'min': func.min,
+    'max': func.max,
+    'std': func.stddev_samp,
+}
+
+# Origem das janelas do date_bin: alinha à meia-noite, como o resample do pandas
+BUCKET_ORIGIN = datetime(2000, 1, 1)
+
+# Chave em `session.info` com os intervalos inseridos na transação corrente;
+# no commit eles invalidam o cache de respostas (services.response_cache)
+INSERTED_RANGES_KEY = 'sensor_inserted_ranges'
+
+# Canal do LISTEN/NOTIFY avisado a cada transação com inserções
+LIVE_TAIL_CHANNEL = 'sensor_data_inserted'
+
+# Linhas buscadas por ida ao cursor do servidor no modo streaming
+STREAM_BATCH_SIZE = 5000
+
+# Serializa as inserções idempotentes (checagem de timestamps + insert)
+INGEST_LOCK_KEY = 'data_ingest'
+
+# Colunas gravadas pelo COPY e seus tipos no formato binário
+COPY_COLUMNS = ('timestamp', 'asset_id', *METRIC_COLUMNS)
+COPY_TYPES = ('timestamp', 'int4', 'float8', 'float8', 'float8')
+
+# Estatísticas acumuladas por métrica na tabela de rollup
+ROLLUP_FIELDS = ('sum', 'sumsq', 'count', 'min', 'max')
+
+ROLLUP_COLUMNS = [
+    'asset_id',
+    'bucket_start',
+    *(f'{metric}_{field}' for metric in METRIC_COLUMNS for field in ROLLUP_FIELDS),
+]
+
+
+def _snapshot_xmin():
+    # Menor transação ainda aberta: as anteriores já commitaram ou abortaram
+    xmin = func.pg_snapshot_xmin(func.pg_current_snapshot())
+    return cast(cast(xmin, Text), BigInteger)
+
+
+def _filter_assets(stmt: Select, asset_ids: list[int] | None, column=None) -> Select:
+    # Sem filtro: todos os ativos
+    if not asset_ids:
+        return stmt
+    column = SensorData.asset_id if column is None else column
+    return stmt.where(column.in_(asset_ids))
+
+
+def _filter_by_range(  # noqa: PLR0913, PLR0917
+    stmt: Select,
+    start_date: datetime,
+    end_date: datetime,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    asset_ids: list[int] | None = None,
+) -> Select:
+    """
+    Aplica o filtro de intervalo (e de ativos), a ordenação (timestamp, id) e
+    a paginação keyset.
+    """
+    stmt = stmt.where(
+        SensorData.timestamp >= start_date, SensorData.timestamp <= end_date
+    ).order_by(SensorData.timestamp.asc(), SensorData.id.asc())
+    stmt = _filter_assets(stmt, asset_ids)
+
+    # Paginação keyset: continua exatamente após o último registro visto
+    if after:
+        stmt = stmt.where(tuple_(SensorData.timestamp, SensorData.id) > after)
+
+    if limit:
+        stmt = stmt.limit(limit)
+
+    return stmt
+
+
+def _stream_statement(  # noqa: PLR0913, PLR0917
+    start_date: datetime,
+    end_date: datetime,
+    metrics: list[str] | None = None,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    asset_ids: list[int] | None = None,
+) -> Select:
+    """
+    Consulta por colunas (sem ORM) lida via cursor no servidor em lotes de
+    STREAM_BATCH_SIZE linhas.
+    """
+    columns = [m for m in metrics or METRIC_COLUMNS if m in METRIC_COLUMNS]
+    stmt = select(
+        SensorData.id,
+        SensorData.timestamp,
+        SensorData.asset_id,
+        *(getattr(SensorData, m) for m in columns),
+    )
+    stmt = _filter_by_range(stmt, start_date, end_date, limit, after, asset_ids)
+    return stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+async def _track_insert(db: AsyncSession, start_date: datetime, end_date: datetime):
+    """
+    Registra o intervalo inserido para o cache de respostas e avisa os
+    ouvintes do live tail (NOTIFY em LIVE_TAIL_CHANNEL). O Postgres só entrega
+    a notificação no commit, e a descarta no rollback.
+    """
+    db.info.setdefault(INSERTED_RANGES_KEY, []).append((start_date, end_date))
+    if settings.LIVE_TAIL_ENABLED:
+        payload = json.dumps({
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+        })
+        await db.execute(
+            text('SELECT pg_notify(:channel, :payload)'),
+            {'channel': LIVE_TAIL_CHANNEL, 'payload': payload},
+        )
+
+
+async def _copy_rows(db: AsyncSession, rows: Iterable[tuple]):
+    """
+    COPY FROM STDIN em formato binário pela conexão psycopg da própria sessão
+    (mesma transação do ORM): sem parâmetros ligados nem SQL por linha.
+    Cada tupla segue a ordem de COPY_COLUMNS.
+    """
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    statement = (
+        f'COPY {SensorData.__tablename__} ({", ".join(COPY_COLUMNS)}) '
+        'FROM STDIN (FORMAT BINARY)'
+    )
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(statement) as copy:
+            copy.set_types(COPY_TYPES)
+            for row in rows:
+                await copy.write_row(row)
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    # A coluna é sem fuso: horários com fuso são levados para UTC, como na gravação
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(UTC).replace(tzinfo=None)
+
+
+def _rollup_bucket(timestamp: datetime) -> datetime:
+    """
+    Início da janela de ROLLUP_BUCKET que contém `timestamp` (mesma origem do
+    date_bin).
+    """
+    timestamp = _naive_utc(timestamp)
+    return timestamp - (timestamp - BUCKET_ORIGIN) % ROLLUP_BUCKET
+
+
+def _reading_field(column, field: str):
+    """
+    Agregado de uma métrica (coluna de leituras) para a tabela de rollup.
+    Janelas sem valores da métrica ficam com soma zero.
+    """
+    return {
+        'sum': func.coalesce(func.sum(column), 0.0),
+        'sumsq': func.coalesce(func.sum(column * column), 0.0),
+        'count': func.count(column),
+        'min': func.min(column),
+        'max': func.max(column),
+    }[field]
+
+
+def _stored_rollup_field(metric: str, field: str):
+    column = getattr(SensorRollup, f'{metric}_{field}')
+    aggregate = {'min': func.min, 'max': func.max}.get(field, func.sum)
+    return aggregate(column)
+
+
+def _rollup_select(asset_column, bucket_column, source, filters: list) -> Select:
+    """
+    Janelas de `bucket_column` por ativo com soma, soma dos quadrados,
+    contagem, mínimo e máximo por métrica: `source(metric, field)` dá a
+    expressão agregada.
+    """
+    return (
+        select(
+            asset_column.label('asset_id'),
+            bucket_column.label('timestamp'),
+            *(
+                source(metric, field).label(f'{metric}_{field}')
+                for metric in METRIC_COLUMNS
+                for field in ROLLUP_FIELDS
+            ),
+        )
+        .where(*filters)
+        .group_by(asset_column, bucket_column)
+    )
+
+
+def _rollup_deltas(columns: Sequence[Sequence]) -> dict[str, list]:
+    """
+    Soma, soma dos quadrados, contagem, mínimo e máximo por ativo e janela de
+    ROLLUP_BUCKET das leituras (colunas na ordem de COPY_COLUMNS), calculados
+    com NumPy. Retorna uma lista por coluna da tabela de rollup, em ordem de
+    (ativo, janela).
+    """
+    timestamps = columns[0]
+    if getattr(timestamps[0], 'tzinfo', None) is not None:
+        timestamps = [_rollup_bucket(ts) for ts in timestamps]
+    timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+    assets = np.asarray(columns[1], dtype=np.int64)
+    origin = np.datetime64(BUCKET_ORIGIN, 'us')
+    width = np.timedelta64(ROLLUP_BUCKET)
+    buckets = (timestamps - origin) // width
+    # Ordena por ativo e, dentro dele, por janela
+    order = np.lexsort((buckets, assets))
+    assets, buckets = assets[order], buckets[order]
+    # Primeira posição de cada (ativo, janela) nas leituras ordenadas
+    changed = (assets[1:] != assets[:-1]) | (buckets[1:] != buckets[:-1])
+    starts = np.flatnonzero(np.r_[True, changed])
+
+    deltas = {
+        'asset_id': assets[starts].tolist(),
+        'bucket_start': (origin + buckets[starts] * width).tolist(),
+    }
+    for metric, column in zip(METRIC_COLUMNS, columns[2:]):
+        # None vira NaN
+        values = np.asarray(column, dtype=float)[order]
+        valid = ~np.isnan(values)
+        present = np.where(valid, values, 0.0)
+        deltas[f'{metric}_sum'] = np.add.reduceat(present, starts).tolist()
+        deltas[f'{metric}_sumsq'] = np.add.reduceat(present * present, starts).tolist()
+        deltas[f'{metric}_count'] = np.add.reduceat(valid, starts, dtype=int).tolist()
+        # fmin/fmax ignoram NaN; janela sem valores fica NaN e vira NULL
+        for field, reduce in (('min', np.fmin), ('max', np.fmax)):
+            extreme = reduce.reduceat(values, starts)
+            deltas[f'{metric}_{field}'] = np.where(
+                np.isnan(extreme), None, extreme
+            ).tolist()
+    return deltas
+
+
+def _rollup_upsert_statement() -> str:
+    """
+    INSERT dos parciais por janela (um array por coluna, via unnest) somando
+    aos valores já gravados. LEAST/GREATEST ignoram NULL (métrica sem
+    valores na janela).
+    """
+    table = SensorRollup.__tablename__
+    types = {'sum': 'float8', 'sumsq': 'float8', 'count': 'int8'}
+    # %b: parâmetros em formato binário
+    arrays = ['%b::int4[]', '%b::timestamp[]'] + [
+        f'%b::{types.get(field, "float8")}[]'
+        for _ in METRIC_COLUMNS
+        for field in ROLLUP_FIELDS
+    ]
+    updates = []
+    for metric in METRIC_COLUMNS:
+        for field in ('sum', 'sumsq', 'count'):
+            name = f'{metric}_{field}'
+            updates.append(f'{name} = {table}.{name} + EXCLUDED.{name}')
+        for field, function in (('min', 'LEAST'), ('max', 'GREATEST')):
+            name = f'{metric}_{field}'
+            updates.append(f'{name} = {function}({table}.{name}, EXCLUDED.{name})')
+    return (
+        f'INSERT INTO {table} ({", ".join(ROLLUP_COLUMNS)}) '
+        f'SELECT * FROM unnest({", ".join(arrays)}) '
+        f'ON CONFLICT (asset_id, bucket_start) DO UPDATE SET {", ".join(updates)}'
+    )
+
+
+ROLLUP_UPSERT = _rollup_upsert_statement()
+
+
+async def _update_rollup(db: AsyncSession, columns: Sequence[Sequence]):
+    """
+    Acumula as leituras inseridas (colunas na ordem de COPY_COLUMNS) na
+    tabela de rollup, na mesma transação. Como no COPY, usa a conexão psycopg
+    da sessão: os arrays vão em formato binário, sem conversão item a item.
+    """
+    if not settings.ROLLUP_ENABLED or not len(columns[0]):
+        return
+
+    deltas = _rollup_deltas(columns)
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        # As janelas vêm em ordem de chave: upserts concorrentes travam as
+        # linhas na mesma ordem e não entram em deadlock
+        await cursor.execute(ROLLUP_UPSERT, [deltas[name] for name in ROLLUP_COLUMNS])
+
+
+def _rollup_statistic(parts, metric: str, stat: str):
+    """
+    Estatística da janela a partir das partes somadas. O desvio padrão é o
+    amostral (ddof=1), nulo com menos de duas amostras, como no stddev_samp.
+    """
+    if stat in {'min', 'max'}:
+        aggregate = func.min if stat == 'min' else func.max
+        return aggregate(parts.c[f'{metric}_{stat}'])
+
+    total = func.sum(parts.c[f'{metric}_sum'])
+    count = cast(func.sum(parts.c[f'{metric}_count']), Float)
+    if stat == 'mean':
+        return total / func.nullif(count, 0)
+
+    squares = func.sum(parts.c[f'{metric}_sumsq'])
+    # Erros de arredondamento podem deixar a variância levemente negativa
+    variance = func.greatest((squares - total * total / count) / (count - 1), 0)
+    return case((count > 1, func.sqrt(variance)), else_=None)
+
+
+def _row_hash():
+    """
+    Hash de cada linha (id, timestamp e medições). A soma dos hashes não
+    depende da ordem e muda quando qualquer linha é inserida, removida ou
+    alterada.
+    """
+    return func.hashtext(
+        func.concat_ws(
+            '|',
+            SensorData.id,
+            SensorData.timestamp,
+            *(getattr(SensorData, m) for m in METRIC_COLUMNS),
+        )
+    )
 
 
 @dataclass
 class SensorRepository:
     db: AsyncSession
 
-    async def insert_sensor_data(
+    async def insert_sensor_data(  # noqa: PLR0913, PLR0917
         db: AsyncSession,
         timestamp: datetime,
         wind_speed: float | None = None,
         power: float | None = None,
         ambient_temperature: float | None = None,
+        asset_id: int = DEFAULT_ASSET_ID,
     ) -> SensorData:
         new_data = SensorData(
             timestamp=timestamp,
             wind_speed=wind_speed,
             power=power,
             ambient_temperature=ambient_temperature,
+            asset_id=asset_id,
         )
+        await ensure_partitions(db, timestamp, timestamp)
         db.add(new_data)
+        await _track_insert(db, timestamp, timestamp)
+        await _update_rollup(
+            db, [[timestamp], [asset_id], [wind_speed], [power], [ambient_temperature]]
+        )
         await db.commit()
         await db.refresh(new_data)
         return new_data
@@ -32,19 +397,29 @@ class SensorRepository:
     async def get_sensor_data_by_id(
         db: AsyncSession, data_id: int
     ) -> SensorData | None:  # noqa E501
-        result = await db.get(SensorData, data_id)
-        return result
+        # A chave primária é (id, timestamp) por causa do particionamento
+        result = await db.execute(select(SensorData).where(SensorData.id == data_id))
+        return result.scalar_one_or_none()
 
-    async def get_data_by_range(
+    async def get_data_by_range(  # noqa: PLR0913, PLR0917
         db: AsyncSession,
         start_date: datetime,
         end_date: datetime,
         metrics: list[str] | None = None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        asset_ids: list[int] | None = None,
     ) -> list[SensorData] | list[dict]:
-
+        """
+        Busca registros do intervalo ordenados por (timestamp, id).
+        Com `limit`/`after` funciona como paginação keyset: `after` é o par
+        (timestamp, id) do último registro da página anterior.
+        `asset_ids` restringe a busca a esses ativos (todos, se vazio).
+        """
         # Se métricas foram especificadas, selecionamos apenas essas colunas + timestamp
+        # O id também é selecionado pois compõe o cursor da paginação
         if metrics:
-            cols_to_select = [SensorData.timestamp]
+            cols_to_select = [SensorData.id, SensorData.timestamp, SensorData.asset_id]
             for metric in metrics:
                 # Garante que a coluna existe no model para evitar injeção ou erro
                 if hasattr(SensorData, metric):
@@ -55,10 +430,8 @@ class SensorRepository:
             # Se não passar métricas, traz o objeto inteiro
             stmt = select(SensorData)
 
-        # Aplica filtros de data
-        stmt = stmt.where(
-            SensorData.timestamp >= start_date, SensorData.timestamp <= end_date
-        ).order_by(SensorData.timestamp.asc())
+        # Aplica filtros de data e de ativos
+        stmt = _filter_by_range(stmt, start_date, end_date, limit, after, asset_ids)
 
         result = await db.execute(stmt)
 
@@ -68,7 +441,9 @@ class SensorRepository:
             rows = result.all()
             return [
                 {
+                    'id': row.id,
                     'timestamp': row.timestamp,
+                    'asset_id': row.asset_id,
                     **{m: getattr(row, m, None) for m in metrics},
                 }
                 for row in rows
@@ -77,13 +452,474 @@ class SensorRepository:
         # Se selecionou o objeto inteiro (ORM), retorna scalars
         return result.scalars().all()
 
+    async def get_rows_by_range(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        metrics: list[str] | None = None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        asset_ids: list[int] | None = None,
+    ) -> list[tuple]:
+        """
+        Caminho rápido de `get_data_by_range`: tuplas simples no formato
+        (timestamp, asset_id, wind_speed, power, ambient_temperature, id), sem
+        ORM nem identity map. Métricas não selecionadas vêm como NULL do banco.
+        """
+        selected = metrics or METRIC_COLUMNS
+        columns = [
+            getattr(SensorData, m) if m in selected else null().label(m)
+            for m in METRIC_COLUMNS
+        ]
+        stmt = select(
+            SensorData.timestamp, SensorData.asset_id, *columns, SensorData.id
+        )
+        stmt = _filter_by_range(stmt, start_date, end_date, limit, after, asset_ids)
+        result = await db.execute(stmt)
+        return result.tuples().all()
+
+    async def get_rows_by_commit(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        after: tuple[int, int],
+        metrics: list[str] | None = None,
+        limit: int | None = None,
+        asset_ids: list[int] | None = None,
+        since: datetime | None = None,
+    ) -> list[tuple]:
+        """
+        Linhas gravadas após a posição `after` (ingest_xid, id), nessa ordem,
+        no formato de `get_rows_by_range` acrescido do ingest_xid, com
+        timestamp a partir de `since` (se informado). Só entram
+        transações anteriores ao xmin do snapshot, ou seja, já encerradas:
+        nenhuma transação aberta pode commitar linhas antes da última posição
+        lida, então avançar a posição nunca pula linhas.
+        """
+        selected = metrics or METRIC_COLUMNS
+        columns = [
+            getattr(SensorData, m) if m in selected else null().label(m)
+            for m in METRIC_COLUMNS
+        ]
+        stmt = (
+            select(
+                SensorData.timestamp,
+                SensorData.asset_id,
+                *columns,
+                SensorData.id,
+                SensorData.ingest_xid,
+            )
+            .where(
+                SensorData.ingest_xid < _snapshot_xmin(),
+                tuple_(SensorData.ingest_xid, SensorData.id) > tuple_(*after),
+            )
+            .order_by(SensorData.ingest_xid, SensorData.id)
+            .limit(limit)
+        )
+        if since is not None:
+            stmt = stmt.where(SensorData.timestamp >= since)
+        stmt = _filter_assets(stmt, asset_ids)
+        result = await db.execute(stmt)
+        return result.tuples().all()
+
+    async def get_live_position(
+        db: AsyncSession,
+        since: datetime | None = None,
+        asset_ids: list[int] | None = None,
+    ) -> tuple[int, int]:
+        """
+        Posição (ingest_xid, id) inicial do live tail: a da primeira transação
+        que gravou linhas a partir de `since` ou, sem ele (ou sem linhas), o
+        xmin do snapshot atual. Linhas de transações recém-encerradas podem
+        ser enviadas de novo; nenhuma fica de fora.
+        """
+        if since is not None:
+            stmt = select(func.min(SensorData.ingest_xid)).where(
+                SensorData.timestamp >= since
+            )
+            first_xid = await db.scalar(_filter_assets(stmt, asset_ids))
+            if first_xid is not None:
+                return first_xid, 0
+        return await db.scalar(select(_snapshot_xmin())), 0
+
+    async def stream_data_by_range(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        metrics: list[str] | None = None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        asset_ids: list[int] | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Versão streaming de `get_data_by_range`: usa um cursor no servidor
+        (yield_per) e entrega as linhas conforme chegam, sem materializar o
+        intervalo inteiro nem objetos ORM.
+        """
+        stmt = _stream_statement(start_date, end_date, metrics, limit, after, asset_ids)
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            for row in partition:
+                yield row._asdict()
+
+    async def stream_columns_by_range(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        metrics: list[str] | None = None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        asset_ids: list[int] | None = None,
+    ) -> AsyncIterator[dict[str, tuple]]:
+        """
+        Como `stream_data_by_range`, mas entrega cada lote do cursor em formato
+        colunar ({coluna: valores}), pronto para virar um RecordBatch do Arrow.
+        """
+        stmt = _stream_statement(start_date, end_date, metrics, limit, after, asset_ids)
+        result = await db.stream(stmt)
+        columns = list(result.keys())
+        async for partition in result.partitions():
+            yield dict(zip(columns, zip(*partition)))
+
+    async def get_aggregates_by_range(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: timedelta,
+        metrics: list[str] | None = None,
+        stats: list[str] | None = None,
+        rollup: bool = False,
+        asset_ids: list[int] | None = None,
+    ) -> list[dict]:
+        """
+        Agrega o intervalo em janelas de `bucket` (date_bin + GROUP BY) no
+        próprio banco, separadamente por ativo. Cada linha traz o início da
+        janela em `timestamp`, o `asset_id` e uma coluna `<métrica>_<estatística>`
+        por combinação, ordenadas por (timestamp, asset_id).
+        Com `rollup` e `bucket` múltiplo de ROLLUP_BUCKET, lê as janelas
+        inteiras da tabela de rollup (ver `get_aggregates_from_rollup`).
+        """
+        columns = [m for m in metrics or METRIC_COLUMNS if m in METRIC_COLUMNS]
+        stats = [s for s in stats or AGGREGATE_FUNCTIONS if s in AGGREGATE_FUNCTIONS]
+        if rollup and bucket % ROLLUP_BUCKET == timedelta(0):
+            return await SensorRepository.get_aggregates_from_rollup(
+                db, start_date, end_date, bucket, columns, stats, asset_ids
+            )
+
+        bucket_start = func.date_bin(bucket, SensorData.timestamp, BUCKET_ORIGIN).label(
+            'timestamp'
+        )
+        aggregates = [
+            AGGREGATE_FUNCTIONS[stat](getattr(SensorData, metric)).label(
+                f'{metric}_{stat}'
+            )
+            for metric in columns
+            for stat in stats
+        ]
+        stmt = (
+            select(bucket_start, SensorData.asset_id, *aggregates)
+            .where(SensorData.timestamp >= start_date, SensorData.timestamp <= end_date)
+            .group_by(bucket_start, SensorData.asset_id)
+            .order_by(bucket_start, SensorData.asset_id)
+        )
+        stmt = _filter_assets(stmt, asset_ids)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result]
+
+    async def get_aggregates_from_rollup(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: timedelta,
+        metrics: list[str],
+        stats: list[str],
+        asset_ids: list[int] | None = None,
+    ) -> list[dict]:
+        """
+        Mesmo resultado de `get_aggregates_by_range`, com `bucket` múltiplo de
+        ROLLUP_BUCKET: as janelas de 10 minutos inteiramente dentro do
+        intervalo vêm da tabela de rollup e só as pontas parciais são lidas
+        de 'data'.
+        """
+        start_date = _naive_utc(start_date)
+        end_date = _naive_utc(end_date)
+        # Janelas do rollup contidas em [start_date, end_date]: de full_start
+        # (inclusive) a full_end (exclusive)
+        full_start = _rollup_bucket(start_date)
+        if full_start < start_date:
+            full_start += ROLLUP_BUCKET
+        full_end = _rollup_bucket(end_date + timedelta(microseconds=1))
+        full_end = max(full_end, full_start)
+
+        raw = _rollup_select(
+            SensorData.asset_id,
+            func.date_bin(bucket, SensorData.timestamp, BUCKET_ORIGIN),
+            lambda metric, field: _reading_field(getattr(SensorData, metric), field),
+            [
+                SensorData.timestamp >= start_date,
+                SensorData.timestamp <= end_date,
+                or_(
+                    SensorData.timestamp < full_start,
+                    SensorData.timestamp >= full_end,
+                ),
+            ],
+        )
+        stored = _rollup_select(
+            SensorRollup.asset_id,
+            func.date_bin(bucket, SensorRollup.bucket_start, BUCKET_ORIGIN),
+            _stored_rollup_field,
+            [
+                SensorRollup.bucket_start >= full_start,
+                SensorRollup.bucket_start < full_end,
+            ],
+        )
+        raw = _filter_assets(raw, asset_ids)
+        stored = _filter_assets(stored, asset_ids, SensorRollup.asset_id)
+        parts = union_all(raw, stored).subquery()
+        stmt = (
+            select(
+                parts.c.timestamp,
+                parts.c.asset_id,
+                *(
+                    _rollup_statistic(parts, metric, stat).label(f'{metric}_{stat}')
+                    for metric in metrics
+                    for stat in stats
+                ),
+            )
+            .group_by(parts.c.timestamp, parts.c.asset_id)
+            .order_by(parts.c.timestamp, parts.c.asset_id)
+        )
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result]
+
+    async def rebuild_rollup(
+        db: AsyncSession,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> int:
+        """
+        Recalcula a partir de 'data' as janelas de rollup que tocam o
+        intervalo (todas, sem intervalo). Não faz commit; retorna o número de
+        janelas gravadas.
+        """
+        table = SensorRollup.__table__
+        data_filters, rollup_filters = [], []
+        if start_date is not None:
+            start = _rollup_bucket(start_date)
+            data_filters.append(SensorData.timestamp >= start)
+            rollup_filters.append(table.c.bucket_start >= start)
+        if end_date is not None:
+            end = _rollup_bucket(end_date) + ROLLUP_BUCKET
+            data_filters.append(SensorData.timestamp < end)
+            rollup_filters.append(table.c.bucket_start < end)
+
+        await db.execute(delete(table).where(*rollup_filters))
+        source = _rollup_select(
+            SensorData.asset_id,
+            func.date_bin(ROLLUP_BUCKET, SensorData.timestamp, BUCKET_ORIGIN),
+            lambda metric, field: _reading_field(getattr(SensorData, metric), field),
+            data_filters,
+        )
+        result = await db.execute(
+            insert(table)
+            .from_select(ROLLUP_COLUMNS, source)
+            .returning(table.c.bucket_start)
+        )
+        return len(result.all())
+
+    async def get_digest_by_range(
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: str = 'day',
+        asset_ids: list[int] | None = None,
+    ) -> list[dict]:
+        """
+        Contagem e checksum por dia (ou hora) do intervalo, calculados no banco.
+        Buckets sem registros não aparecem.
+        """
+        bucket_start = func.date_trunc(bucket, SensorData.timestamp).label(
+            'bucket_start'
+        )
+        stmt = (
+            select(
+                bucket_start,
+                func.count().label('count'),
+                func.coalesce(func.sum(_row_hash()), 0).label('checksum'),
+            )
+            .where(SensorData.timestamp >= start_date, SensorData.timestamp <= end_date)
+            .group_by(bucket_start)
+            .order_by(bucket_start)
+        )
+        stmt = _filter_assets(stmt, asset_ids)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result]
+
+    async def get_stats_by_range(
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        bucket: str = 'day',
+        asset_ids: list[int] | None = None,
+    ) -> list[dict]:
+        """
+        Contagem e primeiro/último timestamp por dia (ou hora) do intervalo.
+        Só lê `asset_id` e `timestamp`, que estão no índice
+        (asset_id, timestamp): o Postgres responde com index-only scan, sem
+        ler as linhas. Buckets sem registros não aparecem.
+        """
+        bucket_start = func.date_trunc(bucket, SensorData.timestamp).label(
+            'bucket_start'
+        )
+        stmt = (
+            select(
+                bucket_start,
+                func.count().label('count'),
+                func.min(SensorData.timestamp).label('first_timestamp'),
+                func.max(SensorData.timestamp).label('last_timestamp'),
+            )
+            .where(SensorData.timestamp >= start_date, SensorData.timestamp <= end_date)
+            .group_by(bucket_start)
+            .order_by(bucket_start)
+        )
+        stmt = _filter_assets(stmt, asset_ids)
+        result = await db.execute(stmt)
+        return [row._asdict() for row in result]
+
+    async def get_range_checksum(  # noqa: PLR0913, PLR0917
+        db: AsyncSession,
+        start_date: datetime,
+        end_date: datetime,
+        asset_ids: list[int] | None = None,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+    ) -> tuple[int, int]:
+        """
+        (contagem, checksum) das linhas da página servida, usado para o ETag.
+        Com `limit`/`after` só a página é lida (mesmo keyset da consulta),
+        não o intervalo inteiro.
+        """
+        if limit or after:
+            page = _filter_by_range(
+                select(_row_hash().label('row_hash')),
+                start_date,
+                end_date,
+                limit,
+                after,
+                asset_ids,
+            ).subquery()
+            stmt = select(func.count(), func.coalesce(func.sum(page.c.row_hash), 0))
+        else:
+            stmt = select(func.count(), func.coalesce(func.sum(_row_hash()), 0)).where(
+                SensorData.timestamp >= start_date, SensorData.timestamp <= end_date
+            )
+            stmt = _filter_assets(stmt, asset_ids)
+        result = await db.execute(stmt)
+        count, checksum = result.one()
+        return count, checksum
+
+    async def acquire_ingest_lock(db: AsyncSession) -> None:
+        """
+        Lock de transação que impede duas inserções idempotentes concorrentes
+        de gravarem o mesmo timestamp (não há UNIQUE em timestamp).
+        """
+        await db.execute(
+            text('SELECT pg_advisory_xact_lock(hashtext(:key))'),
+            {'key': INGEST_LOCK_KEY},
+        )
+
+    async def get_existing_readings(
+        db: AsyncSession, keys: list[tuple[int, datetime]]
+    ) -> set[tuple[int, datetime]]:
+        """
+        Quais dos pares (asset_id, timestamp) já existem na tabela. O filtro
+        por intervalo permite a poda de partições e o índice
+        (asset_id, timestamp) resolve a busca.
+        """
+        if not keys:
+            return set()
+        timestamps = [timestamp for _, timestamp in keys]
+        values = bindparam('timestamps', timestamps, type_=ARRAY(DateTime()))
+        stmt = (
+            select(SensorData.asset_id, SensorData.timestamp)
+            .distinct()
+            .where(
+                SensorData.timestamp >= min(timestamps),
+                SensorData.timestamp <= max(timestamps),
+                SensorData.timestamp == any_(values),
+            )
+        )
+        stmt = _filter_assets(stmt, sorted({asset_id for asset_id, _ in keys}))
+        result = await db.execute(stmt)
+        return set(result.tuples()) & set(keys)
+
     async def insert_bulk_sensor_data(
         db: AsyncSession,
         data_list: list[dict],
-    ) -> None:
+        method: str = settings.BULK_INSERT_METHOD,
+    ) -> int:
         """
-        Insere múltiplos registros na tabela 'data' em uma única operação.
+        Insere múltiplos registros na tabela 'data' em uma única operação,
+        via COPY binário (`method='copy'`) ou INSERT ... VALUES ('insert').
         Cada dicionário em data_list deve conter as chaves correspondentes
-        às colunas da tabela.
+        às colunas da tabela. Partições que faltam para o intervalo são criadas
+        antes, na mesma transação. Não faz commit. Retorna as linhas inseridas.
+        """
+        if not data_list:
+            return 0
+
+        timestamps = [row['timestamp'] for row in data_list]
+        start_date, end_date = min(timestamps), max(timestamps)
+        await ensure_partitions(db, start_date, end_date)
+        await _track_insert(db, start_date, end_date)
+        rows = [
+            (
+                row['timestamp'],
+                row.get('asset_id', DEFAULT_ASSET_ID),
+                *(
+                    None if row.get(m) is None else float(row[m])
+                    for m in METRIC_COLUMNS
+                ),
+            )
+            for row in data_list
+        ]
+        if method == 'copy':
+            await _copy_rows(db, rows)
+        else:
+            values = [dict(zip(COPY_COLUMNS, row)) for row in rows]
+            await db.execute(insert(SensorData).values(values))
+        await _update_rollup(db, list(zip(*rows)))
+        return len(rows)
+
+    async def insert_bulk_columns(
+        db: AsyncSession,
+        columns: dict[str, Sequence],
+        method: str = settings.BULK_INSERT_METHOD,
+    ) -> int:
+        """
+        Como `insert_bulk_sensor_data`, mas recebe um lote colunar
+        ({coluna: valores}, p.ex. arrays NumPy) com as COPY_COLUMNS; sem
+        `asset_id`, o lote inteiro vai para DEFAULT_ASSET_ID.
+        No COPY as linhas são montadas direto das colunas, sem dicts.
         """
-        await db.execute(insert(SensorData).values(data_list))
+        size = len(columns['timestamp'])
+        if not size:
+            return 0
+
+        if 'asset_id' not in columns:
+            columns = {**columns, 'asset_id': np.full(size, DEFAULT_ASSET_ID)}
+        values = [
+            columns[name].tolist()
+            if hasattr(columns[name], 'tolist')
+            else columns[name]
+            for name in COPY_COLUMNS
+        ]
+        if method != 'copy':
+            data_list = [dict(zip(COPY_COLUMNS, row)) for row in zip(*values)]
+            return await SensorRepository.insert_bulk_sensor_data(db, data_list, method)
+
+        timestamps = values[0]
+        start_date, end_date = min(timestamps), max(timestamps)
+        await ensure_partitions(db, start_date, end_date)
+        await _track_insert(db, start_date, end_date)
+        await _copy_rows(db, zip(*values))
+        await _update_rollup(db, [columns[name] for name in COPY_COLUMNS])
+        return size
@@ -1,14 +1,88 @@
+import logging
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.v1 import sensor
+from app.api.v1 import jobs, sensor
+from app.config.config import settings
+from app.infra.database.database import engine, read_router, replica_engines
+from app.infra.database.metrics import instrument_engine, register_pool_collector
+from app.infra.database.partitions import premake_partitions
+from app.middlewares.compression import CompressionMiddleware
+from app.middlewares.metrics import MetricsMiddleware
+from app.services.live_tail import live_tail
+from app.services.populate_jobs import populate_jobs
 
-app = FastAPI(title='Fonte API - Desafio ETL')
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Partições do período corrente e dos próximos já existem antes dos inserts;
+    # sem elas os dados caem na partição DEFAULT (sem poda)
+    try:
+        async with engine.begin() as conn:
+            created = await premake_partitions(conn)
+        if created:
+            logger.info('Partições criadas: %s', ', '.join(created))
+    except (OSError, SQLAlchemyError) as e:
+        logger.warning('Não foi possível criar as partições futuras: %s', e)
+    yield
+    # Jobs de população em andamento não sobrevivem ao processo
+    await populate_jobs.cancel_all()
+    live_tail.stop()
+
+
+app = FastAPI(title='Fonte API - Desafio ETL', lifespan=lifespan)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        encodings=tuple(settings.COMPRESSION_ENCODINGS),
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    )
+
+if settings.METRICS_ENABLED:
+    engines = {
+        'primary': engine,
+        **{f'replica{i}': e for i, e in enumerate(replica_engines)},
+    }
+    for instrumented in engines.values():
+        instrument_engine(instrumented)
+    register_pool_collector(engines)
+    # Adicionado por último = mais externo: mede o corpo já comprimido
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(sensor.router, prefix='/api/v1', tags=['Dados Fonte'])
+app.include_router(jobs.router, prefix='/api/v1', tags=['Jobs'])
 
 
 @app.get('/health', status_code=HTTPStatus.OK)
 async def health_check():
     return {'status': 'ok'}
+
+
+@app.get('/health/pool', status_code=HTTPStatus.OK)
+async def pool_status():
+    """
+    Uso do pool de conexões: ocupação atual, overflow e tempo de espera.
+    Com réplicas de leitura, inclui o pool e a disponibilidade de cada uma.
+    """
+    replicas = [
+        {**status, **replica.pool.summary()}
+        for status, replica in zip(read_router.summary(), replica_engines)
+    ]
+    return {**engine.pool.summary(), 'replicas': replicas}
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato texto do Prometheus.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
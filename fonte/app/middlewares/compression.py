@@ -0,0 +1,205 @@
+import logging
+import time
+import zlib
+
+import zstandard
+from prometheus_client import Counter, Histogram
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middlewares.metrics import LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Formatos que já chegam comprimidos e não ganham nada com outra camada
+ALREADY_COMPRESSED_MEDIA_TYPES = ('application/vnd.apache.parquet',)
+
+# Expostos em /metrics: taxa de compressão e custo de CPU por encoding
+COMPRESSION_BYTES_IN = Counter(
+    'fonte_compression_input_bytes',
+    'Bytes das respostas antes da compressão, por encoding',
+    ['encoding'],
+)
+COMPRESSION_BYTES_OUT = Counter(
+    'fonte_compression_output_bytes',
+    'Bytes das respostas após a compressão, por encoding',
+    ['encoding'],
+)
+COMPRESSION_SECONDS = Histogram(
+    'fonte_compression_duration_seconds',
+    'Tempo de CPU gasto comprimindo cada resposta, por encoding',
+    ['encoding'],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def parse_accept_encoding(value: str) -> set[str]:
+    """
+    Retorna os encodings aceitos pelo cliente (ignora os marcados com q=0).
+    """
+    accepted = set()
+    for item in value.split(','):
+        name, *params = (part.strip() for part in item.split(';'))
+        quality = next((p.split('=', 1)[1] for p in params if p.startswith('q=')), '1')
+        try:
+            if name and float(quality) > 0:
+                accepted.add(name.lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+class _Encoder:
+    """Compressor incremental: cada chunk sai descarregado (flush) para o cliente."""
+
+    def __init__(self, encoding: str, zstd_level: int, gzip_level: int):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def encode(self, chunk: bytes, final: bool = False) -> bytes:
+        started = time.perf_counter()
+        data = self._compressor.compress(chunk)
+        if final:
+            data += self._compressor.flush()
+        elif self.encoding == 'zstd':
+            data += self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        else:
+            data += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.seconds += time.perf_counter() - started
+        self.bytes_in += len(chunk)
+        self.bytes_out += len(data)
+        return data
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas com o melhor encoding aceito pelo cliente, seguindo
+    a ordem de preferência do servidor (zstd antes de gzip). Respostas menores
+    que `minimum_size` seguem sem compressão. Respostas em streaming (NDJSON,
+    Arrow) são comprimidas chunk a chunk, sem bufferizar o corpo.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: tuple[str, ...] = ('zstd', 'gzip'),
+        zstd_level: int = 3,
+        gzip_level: int = 6,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+        self.zstd_level = zstd_level
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        accepted = parse_accept_encoding(
+            Headers(scope=scope).get('accept-encoding', '')
+        )
+        encoding = next((e for e in self.encodings if e in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Message | None = None
+        self.encoder: _Encoder | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            # Guardado até o primeiro chunk para decidir se vale comprimir
+            self.start_message = message
+            return
+
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.downstream(message)
+            return
+
+        if self.encoder is None:
+            await self._start(message)
+        else:
+            await self._send_chunk(message)
+
+    async def _start(self, message: Message):
+        headers = MutableHeaders(raw=self.start_message['headers'])
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        media_type = headers.get('content-type', '')
+
+        skip = (
+            'content-encoding' in headers
+            or media_type.startswith(ALREADY_COMPRESSED_MEDIA_TYPES)
+            or (not more_body and len(body) < self.middleware.minimum_size)
+        )
+        if skip:
+            self.passthrough = True
+            await self.downstream(self.start_message)
+            await self.downstream(message)
+            return
+
+        self.encoder = _Encoder(
+            self.encoding, self.middleware.zstd_level, self.middleware.gzip_level
+        )
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+
+        if more_body:
+            # Streaming: o tamanho final não é conhecido
+            del headers['Content-Length']
+            await self.downstream(self.start_message)
+            await self._send_chunk(message)
+            return
+
+        data = self.encoder.encode(body, final=True)
+        headers['Content-Length'] = str(len(data))
+        headers['Server-Timing'] = (
+            f'compress;dur={self.encoder.seconds * 1000:.3f};desc="{self.encoding}"'
+        )
+        headers['X-Uncompressed-Length'] = str(len(body))
+        await self.downstream(self.start_message)
+        await self.downstream({'type': 'http.response.body', 'body': data})
+        self._record()
+
+    async def _send_chunk(self, message: Message):
+        more_body = message.get('more_body', False)
+        data = self.encoder.encode(message.get('body', b''), final=not more_body)
+        await self.downstream({
+            'type': 'http.response.body',
+            'body': data,
+            'more_body': more_body,
+        })
+        if not more_body:
+            self._record()
+
+    def _record(self):
+        encoder = self.encoder
+        COMPRESSION_BYTES_IN.labels(encoder.encoding).inc(encoder.bytes_in)
+        COMPRESSION_BYTES_OUT.labels(encoder.encoding).inc(encoder.bytes_out)
+        COMPRESSION_SECONDS.labels(encoder.encoding).observe(encoder.seconds)
+        logger.debug(
+            '%s: %d -> %d bytes em %.2f ms',
+            encoder.encoding,
+            encoder.bytes_in,
+            encoder.bytes_out,
+            encoder.seconds * 1000,
+        )
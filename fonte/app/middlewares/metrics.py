@@ -0,0 +1,107 @@
+import time
+
+from prometheus_client import Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Buckets de latência (s): cobre respostas em cache (~1 ms) até exports longos
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# Buckets de tamanho (bytes): de 1 KB a ~1 GB em potências de 4
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(11))
+
+# Rótulo das requisições que não casaram com nenhuma rota (evita cardinalidade
+# ilimitada com caminhos arbitrários)
+UNMATCHED_ROUTE = 'unmatched'
+
+REQUEST_LATENCY = Histogram(
+    'fonte_http_request_duration_seconds',
+    'Tempo até o último byte da resposta, por rota',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'fonte_http_response_size_bytes',
+    'Bytes do corpo enviados ao cliente (após compressão), por rota',
+    ['method', 'route'],
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'fonte_http_requests_in_progress',
+    'Requisições sendo atendidas no momento',
+    ['method'],
+)
+
+
+def route_label(scope: Scope) -> str:
+    """
+    Template da rota casada ('/api/v1/jobs/{job_id}'), que agrupa os
+    caminhos concretos. Sem rota casada, retorna UNMATCHED_ROUTE.
+    """
+    route = scope.get('route')
+    template = getattr(route, 'path', None)
+    regex = getattr(route, 'path_regex', None)
+    if template is None or regex is None:
+        return UNMATCHED_ROUTE
+
+    # Rotas de routers incluídos podem guardar só o caminho relativo ao
+    # prefixo do include: o prefixo é o trecho do caminho antes do casamento
+    path = scope['path']
+    for index, char in enumerate(path):
+        if char == '/' and regex.match(path[index:]):
+            return path[:index] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Mede latência (até o último chunk, inclusive em streaming) e bytes
+    enviados por rota. Deve ser o middleware mais externo para medir o
+    corpo já comprimido.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            route = route_label(scope)
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(
+                time.perf_counter() - started
+            )
+            RESPONSE_SIZE.labels(method, route).observe(size)
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+JobStatus = Literal['running', 'done', 'cancelled', 'error']
+
+
+class PopulateJobResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    start: datetime
+    end: datetime
+    # Ativos (turbinas) gerados; total_rows conta uma linha por minuto e ativo
+    assets: int
+    total_rows: int
+    rows_written: int
+    elapsed_seconds: float
+    # Linhas gravadas por segundo desde o início do job
+    throughput: float
+    # Estimativa de término (só enquanto o job está rodando)
+    eta_seconds: float | None = None
+    error: str | None = None
+    created_at: datetime
@@ -2,14 +2,66 @@ from datetime import UTC, datetime
 from typing import Literal
 
 from fastapi import Query
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.infra.models.sensor import DEFAULT_ASSET_ID
 
 # Opções válidas para o filtro de colunas
 MetricType = Literal['wind_speed', 'power', 'ambient_temperature']
 
+# Estatísticas disponíveis na agregação por janela (mesmos nomes do pandas)
+AggregateStat = Literal['mean', 'min', 'max', 'std']
+
+# Granularidade do digest por intervalo
+DigestBucket = Literal['day', 'hour']
+
+# Tamanho máximo de página aceito na paginação por cursor
+MAX_PAGE_SIZE = 100_000
+
+# Separador entre timestamp e id dentro do cursor
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(timestamp: datetime, data_id: int) -> str:
+    """
+    Gera o cursor opaco (keyset) a partir do último registro da página.
+    """
+    return f'{timestamp.isoformat()}{CURSOR_SEPARATOR}{data_id}'
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Converte o cursor recebido em `after` para a tupla (timestamp, id).
+    """
+    try:
+        timestamp, data_id = cursor.rsplit(CURSOR_SEPARATOR, 1)
+        return datetime.fromisoformat(timestamp), int(data_id)
+    except ValueError as e:
+        raise ValueError(f'Cursor inválido: {cursor}') from e
+
+
+def encode_live_cursor(ingest_xid: int, data_id: int) -> str:
+    """
+    Cursor do live tail: posição (ingest_xid, id) na ordem dos commits.
+    """
+    return f'{ingest_xid}{CURSOR_SEPARATOR}{data_id}'
+
+
+def decode_live_cursor(cursor: str) -> tuple[int, int]:
+    """
+    Converte o Last-Event-ID (ou `after`) do live tail para (ingest_xid, id).
+    """
+    try:
+        ingest_xid, data_id = cursor.split(CURSOR_SEPARATOR)
+        return int(ingest_xid), int(data_id)
+    except ValueError as e:
+        raise ValueError(f'Cursor inválido: {cursor}') from e
+
 
 class SensorDataBase(BaseModel):
     timestamp: datetime
+    # Ativo (turbina) que gerou a leitura
+    asset_id: int = Field(default=DEFAULT_ASSET_ID, ge=1)
     wind_speed: float | None = None
     power: float | None = None
     ambient_temperature: float | None = None
@@ -25,15 +77,131 @@ class SensorDataResponse(SensorDataBase):
     pass
 
 
+class SensorBatchResponse(BaseModel):
+    received: int
+    inserted: int
+    # Leituras ignoradas no modo idempotente (timestamp já existente)
+    skipped: int
+
+
 class SensorDataFilter(BaseModel):
     start_date: datetime
     end_date: datetime
     metrics: list[MetricType] | None = Query(
         default=None, description='Selecione as variáveis desejadas'
     )
+    asset_id: list[int] | None = Query(
+        default=None, description='Ativos (turbinas) desejados; todos, se vazio'
+    )
+    limit: int | None = Field(
+        default=None,
+        gt=0,
+        le=MAX_PAGE_SIZE,
+        description='Quantidade máxima de registros por página',
+    )
+    after: str | None = Field(
+        default=None,
+        description='Cursor da página anterior (header X-Next-Cursor)',
+    )
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator('after')
+    @classmethod
+    def validate_after(cls, value: str | None) -> str | None:
+        if value is not None:
+            decode_cursor(value)
+        return value
+
+
+class SensorLiveFilter(BaseModel):
+    since: datetime | None = Field(
+        default=None,
+        description='Envia também as linhas a partir deste timestamp (inclusive)',
+    )
+    metrics: list[MetricType] | None = Query(
+        default=None, description='Selecione as variáveis desejadas'
+    )
+    asset_id: list[int] | None = Query(
+        default=None, description='Ativos (turbinas) desejados; todos, se vazio'
+    )
+    after: str | None = Field(
+        default=None,
+        description='Cursor do último evento recebido (igual ao Last-Event-ID)',
+    )
+
+    @field_validator('after')
+    @classmethod
+    def validate_after(cls, value: str | None) -> str | None:
+        if value is not None:
+            decode_live_cursor(value)
+        return value
+
+
+class SensorAggregateFilter(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    bucket_minutes: int = Field(
+        default=10, gt=0, le=1440, description='Largura da janela em minutos'
+    )
+    metrics: list[MetricType] | None = Query(
+        default=None, description='Selecione as variáveis desejadas'
+    )
+    stats: list[AggregateStat] | None = Query(
+        default=None, description='Estatísticas calculadas por janela'
+    )
+    asset_id: list[int] | None = Query(
+        default=None, description='Ativos (turbinas) desejados; todos, se vazio'
+    )
+
+
+class SensorAggregateResponse(BaseModel):
+    """
+    Uma linha por janela e ativo: `timestamp` (início da janela), `asset_id`
+    e uma coluna `<métrica>_<estatística>` para cada combinação pedida.
+    """
+
+    timestamp: datetime
+    asset_id: int
+
+    model_config = ConfigDict(extra='allow')
+
+
+class SensorDigestFilter(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    bucket: DigestBucket = Field(
+        default='day', description='Agrupamento do digest: por dia ou por hora'
+    )
+    asset_id: list[int] | None = Query(
+        default=None, description='Ativos (turbinas) desejados; todos, se vazio'
+    )
+
+
+class SensorDigestResponse(BaseModel):
+    bucket_start: datetime
+    count: int
+    checksum: int
+
+
+class SensorStatsFilter(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    bucket: DigestBucket = Field(
+        default='day', description='Agrupamento das contagens: por dia ou por hora'
+    )
+    asset_id: list[int] | None = Query(
+        default=None, description='Ativos (turbinas) desejados; todos, se vazio'
+    )
+
+
+class SensorStatsResponse(BaseModel):
+    bucket_start: datetime
+    count: int
+    # Primeira e última leitura do bucket
+    first_timestamp: datetime
+    last_timestamp: datetime
+
 
 class InertialSensorDataStructure(BaseModel):
     start_date: datetime = Field(
@@ -42,3 +210,10 @@ class InertialSensorDataStructure(BaseModel):
         default_factory=datetime.now(UTC),
     )
     days: int = 10
+    assets: int = Field(
+        default=1, ge=1, description='Quantidade de ativos (turbinas) gerados'
+    )
+    seed: int | None = Field(
+        default=None,
+        description='Semente do gerador; a mesma semente gera os mesmos dados',
+    )
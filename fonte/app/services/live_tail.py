@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import orjson
+import psycopg
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.config import settings
+from app.infra.repositories.sensor_repository import (
+    LIVE_TAIL_CHANNEL,
+    SensorRepository,
+)
+from app.schemas.sensor import encode_live_cursor
+from app.services.sensor_export import JSON_FIELDS
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_MEDIA_TYPE = 'text/event-stream'
+
+# Comentário SSE enviado quando não há linhas novas: mantém a conexão viva
+# (proxies, load balancers) e avisa o cliente que ele está em dia
+HEARTBEAT = b': keepalive\n\n'
+
+# Primeiro evento: espera sugerida ao cliente (EventSource) antes de
+# reconectar. Também libera os headers da resposta sem esperar por dados
+RETRY_EVENT = b'retry: 1000\n\n'
+
+# Espera (s) antes de reabrir a conexão LISTEN que caiu
+LISTEN_RETRY_SECONDS = 1.0
+
+
+def _conninfo(url: URL) -> str:
+    # URL do SQLAlchemy ('postgresql+psycopg://...') no formato da libpq
+    return url.set(drivername='postgresql').render_as_string(hide_password=False)
+
+
+@dataclass
+class LiveTailListener:
+    """
+    Uma única conexão LISTEN por processo, aberta no primeiro assinante e
+    fechada quando o último sai. Cada notificação só acorda os assinantes:
+    cada um lê do banco as linhas após o próprio cursor, então notificações
+    agrupadas ou perdidas não perdem linhas.
+    """
+
+    retry_seconds: float = LISTEN_RETRY_SECONDS
+    subscribers: set[asyncio.Event] = field(default_factory=set)
+    _task: asyncio.Task | None = None
+
+    def subscribe(self, url: URL) -> asyncio.Event:
+        wakeup = asyncio.Event()
+        self.subscribers.add(wakeup)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen(_conninfo(url)))
+        return wakeup
+
+    def unsubscribe(self, wakeup: asyncio.Event):
+        self.subscribers.discard(wakeup)
+        if not self.subscribers:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _wake_all(self):
+        for wakeup in self.subscribers:
+            wakeup.set()
+
+    async def _listen(self, conninfo: str):
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f'LISTEN {LIVE_TAIL_CHANNEL}')
+                    # Commits anteriores ao LISTEN não geraram notificação aqui
+                    self._wake_all()
+                    async for _ in connection.notifies():
+                        self._wake_all()
+            except (psycopg.Error, OSError) as e:
+                logger.warning('Conexão LISTEN do live tail caiu: %s', e)
+                await asyncio.sleep(self.retry_seconds)
+
+
+live_tail = LiveTailListener()
+
+
+def sse_event(row: tuple) -> bytes:
+    """
+    Um evento SSE por linha de `get_rows_by_commit`: `id` é a posição
+    (ingest_xid, id), usada no Last-Event-ID ao reconectar, e `data` o JSON
+    no formato do SensorDataResponse.
+    """
+    cursor = encode_live_cursor(row[-1], row[-2]).encode()
+    data = orjson.dumps(dict(zip(JSON_FIELDS, row)))
+    return b'id: %s\ndata: %s\n\n' % (cursor, data)
+
+
+async def live_events(  # noqa: PLR0913, PLR0917
+    session_factory: async_sessionmaker[AsyncSession],
+    metrics: list[str] | None = None,
+    asset_ids: list[int] | None = None,
+    since: datetime | None = None,
+    after: tuple[int, int] | None = None,
+    heartbeat: float = settings.LIVE_TAIL_HEARTBEAT_SECONDS,
+    batch_rows: int = settings.LIVE_TAIL_BATCH_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    Eventos SSE das linhas na ordem em que foram gravadas (ingest_xid, id):
+    após a posição `after`, com timestamp a partir de `since` (desde a primeira
+    transação que as gravou) ou, sem nenhum dos dois, as que chegarem depois
+    da conexão. Como a ordem não é a
+    do timestamp, linhas atrasadas ou de backfill também são enviadas. Uma
+    transação só é lida depois que todas as anteriores terminam, então uma
+    transação longa atrasa as seguintes. Alcançado o fim da tabela, espera a
+    próxima notificação de commit; sem dados novos, envia HEARTBEAT a cada
+    `heartbeat` segundos e relê (transações abortadas não notificam).
+    """
+    async with session_factory() as db:
+        url = db.bind.url
+        if after is None:
+            after = await SensorRepository.get_live_position(db, since, asset_ids)
+
+    # Assina antes da primeira leitura: um commit entre a leitura e a espera
+    # já deixa o evento marcado
+    wakeup = live_tail.subscribe(url)
+    try:
+        yield RETRY_EVENT
+        while True:
+            wakeup.clear()
+            while True:
+                async with session_factory() as db:
+                    rows = await SensorRepository.get_rows_by_commit(
+                        db, after, metrics, batch_rows, asset_ids, since
+                    )
+                if rows:
+                    yield b''.join(sse_event(row) for row in rows)
+                    after = (rows[-1][-1], rows[-1][-2])
+                if len(rows) < batch_rows:
+                    break
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), heartbeat)
+            except TimeoutError:
+                yield HEARTBEAT
+    finally:
+        live_tail.unsubscribe(wakeup)
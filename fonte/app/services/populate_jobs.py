@@ -0,0 +1,163 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.config import settings
+from app.infra.repositories.sensor_repository import SensorRepository
+from app.services.sensor_data_generator import SensorDataGenerator
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass
+class PopulateJob:
+    """
+    Estado de uma população em segundo plano. Cada lote é commitado
+    separadamente: um job cancelado ou com erro mantém o que já foi gravado.
+    """
+
+    start_date: datetime
+    days: int
+    seed: int | None = None
+    assets: int = 1
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = 'running'  # 'running', 'done', 'cancelled' ou 'error'
+    rows_written: int = 0
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def total_rows(self) -> int:
+        return max(self.days, 0) * MINUTES_PER_DAY * self.assets
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Linhas gravadas por segundo."""
+        return self.rows_written / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        if self.status != 'running' or not self.throughput:
+            return None
+        return (self.total_rows - self.rows_written) / self.throughput
+
+    def summary(self) -> dict:
+        eta = self.eta_seconds
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'start': self.start_date,
+            'end': self.start_date + timedelta(days=self.days),
+            'assets': self.assets,
+            'total_rows': self.total_rows,
+            'rows_written': self.rows_written,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 1),
+            'eta_seconds': None if eta is None else round(eta, 1),
+            'error': self.error,
+            'created_at': self.created_at,
+        }
+
+
+async def run_populate_job(
+    job: PopulateJob,
+    session_factory: async_sessionmaker[AsyncSession],
+    workers: int = settings.POPULATE_WORKERS,
+):
+    """
+    Gera os lotes numa thread e os grava com `workers` sessões em paralelo
+    (uma conexão do pool cada), atualizando o progresso do job.
+    """
+    generator = SensorDataGenerator(None, seed=job.seed, assets=job.assets)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+
+    async def produce():
+        batches = generator.iter_batches(job.start_date, job.days)
+        while (batch := await asyncio.to_thread(next, batches, None)) is not None:
+            await queue.put(batch)
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def consume():
+        async with session_factory() as db:
+            while (batch := await queue.get()) is not None:
+                await SensorRepository.insert_bulk_columns(db, batch, generator.method)
+                await db.commit()
+                job.rows_written += len(batch['timestamp'])
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(produce())
+            for _ in range(workers):
+                group.create_task(consume())
+        job.status = 'done'
+    except asyncio.CancelledError:
+        job.status = 'cancelled'
+    except Exception as e:
+        # O TaskGroup agrupa as falhas; a primeira explica o erro
+        errors = e.exceptions if isinstance(e, ExceptionGroup) else [e]
+        job.status = 'error'
+        job.error = str(errors[0])
+    finally:
+        job.finished = time.perf_counter()
+
+
+@dataclass
+class JobRegistry:
+    """
+    Jobs de população deste processo. Os finalizados mais antigos são
+    descartados acima de `keep`.
+    """
+
+    keep: int = settings.POPULATE_JOBS_KEEP
+    jobs: dict[str, PopulateJob] = field(default_factory=dict)
+
+    def start(
+        self,
+        start_date: datetime,
+        days: int,
+        session_factory: async_sessionmaker[AsyncSession],
+        seed: int | None = None,
+        assets: int = 1,
+    ) -> PopulateJob:
+        job = PopulateJob(start_date=start_date, days=days, seed=seed, assets=assets)
+        job.task = asyncio.create_task(run_populate_job(job, session_factory))
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> PopulateJob | None:
+        return self.jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> PopulateJob | None:
+        """
+        Cancela o job e espera ele parar (o lote em gravação é desfeito).
+        """
+        job = self.jobs.get(job_id)
+        if job is not None and job.task is not None and not job.task.done():
+            job.task.cancel()
+            await asyncio.wait([job.task])
+        return job
+
+    async def cancel_all(self):
+        for job_id in list(self.jobs):
+            await self.cancel(job_id)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.keep, 0)]:
+            del self.jobs[job_id]
+
+
+populate_jobs = JobRegistry()
@@ -0,0 +1,177 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.infra.repositories.sensor_repository import (
+    INSERTED_RANGES_KEY,
+    METRIC_COLUMNS,
+)
+from app.schemas.sensor import SensorDataFilter
+
+
+def _naive(value: datetime) -> datetime:
+    # A coluna timestamp é sem fuso; datas com fuso são comparadas pelo relógio
+    return value.replace(tzinfo=None)
+
+
+def cache_key(filter: SensorDataFilter, media_type: str) -> tuple:
+    """
+    Chave normalizada: intervalo, conjunto de métricas (na ordem das colunas),
+    conjunto de ativos, paginação e representação.
+    """
+    selected = set(filter.metrics or METRIC_COLUMNS)
+    metrics = tuple(m for m in METRIC_COLUMNS if m in selected)
+    return (
+        media_type,
+        _naive(filter.start_date),
+        _naive(filter.end_date),
+        metrics,
+        tuple(sorted(set(filter.asset_id or ()))),
+        filter.limit,
+        filter.after,
+    )
+
+
+def is_cacheable(filter: SensorDataFilter) -> bool:
+    """
+    Só intervalos inteiramente no passado: o resto ainda pode receber dados.
+    """
+    return filter.end_date < datetime.now(filter.end_date.tzinfo)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str
+    headers: dict[str, str]
+    start_date: datetime
+    end_date: datetime
+    # Instante (time.monotonic) em que a entrada expira; None não expira
+    expires_at: float | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class ResponseCache:
+    """
+    Cache LRU em memória das respostas de GET /sensors, limitado por bytes.
+    Inserções invalidam, no commit, as entradas cujo intervalo se sobrepõe
+    ao inserido (ver `INSERTED_RANGES_KEY`).
+
+    `generation` evita guardar uma resposta lida antes de uma inserção que
+    terminou durante a requisição: `put` recebe a geração observada no início
+    e descarta a resposta se houve invalidação desde então. Respostas lidas de
+    uma réplica, que pode estar atrás do primário, entram com `ttl`.
+    """
+
+    max_bytes: int
+    entries: OrderedDict[tuple, CachedResponse] = field(default_factory=OrderedDict)
+    size: int = 0
+    generation: int = 0
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at is not None:
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: tuple,
+        entry: CachedResponse,
+        generation: int,
+        ttl: float | None = None,
+    ):
+        if generation != self.generation or entry.size > self.max_bytes:
+            return
+
+        if ttl is not None:
+            entry.expires_at = time.monotonic() + ttl
+
+        self._remove(key)
+        self.entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def invalidate(self, start_date: datetime, end_date: datetime):
+        """
+        Remove as entradas que se sobrepõem a [start_date, end_date].
+        """
+        start_date, end_date = _naive(start_date), _naive(end_date)
+        self.generation += 1
+        overlapping = [
+            key
+            for key, entry in self.entries.items()
+            if entry.start_date <= end_date and start_date <= entry.end_date
+        ]
+        for key in overlapping:
+            self._remove(key)
+        self.stats.invalidations += len(overlapping)
+
+    def clear(self):
+        """
+        Esvazia o cache e zera os contadores.
+        """
+        self.entries.clear()
+        self.size = 0
+        self.generation += 1
+        self.stats = CacheStats()
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def summary(self) -> dict:
+        return {
+            'hits': self.stats.hits,
+            'misses': self.stats.misses,
+            'evictions': self.stats.evictions,
+            'invalidations': self.stats.invalidations,
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+response_cache = ResponseCache(max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_inserts(session: Session):
+    # Invalida só após o commit: leituras anteriores já não entram no cache
+    for start_date, end_date in session.info.pop(INSERTED_RANGES_KEY, []):
+        response_cache.invalidate(start_date, end_date)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_inserts(session: Session):
+    session.info.pop(INSERTED_RANGES_KEY, None)
@@ -1,47 +1,134 @@
-import random
+import asyncio
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.config import settings
+from app.infra.models.sensor import DEFAULT_ASSET_ID
 from app.infra.repositories.sensor_repository import SensorRepository
 
+# Vento: passeio aleatório (m/s por minuto) refletido em [0, WIND_MAX]
+WIND_MAX = 25.0
+WIND_START = 8.0
+WIND_STEP_STD = 0.3
+
+# Curva de potência típica de uma turbina de 5 MW (kW)
+RATED_POWER = 5000.0
+CUT_IN_SPEED = 3.0
+RATED_SPEED = 12.0
+CUT_OUT_SPEED = 24.0
+POWER_NOISE_STD = 0.02
+
+# Temperatura: ciclo diário com mínima de madrugada e máxima às 15h
+TEMPERATURE_MEAN = 25.0
+TEMPERATURE_AMPLITUDE = 7.0
+TEMPERATURE_PEAK_HOUR = 15
+TEMPERATURE_NOISE_STD = 0.5
+TEMPERATURE_RANGE = (15.0, 35.0)
+
+
+def power_curve(wind_speed: np.ndarray) -> np.ndarray:
+    """
+    Potência (kW) para cada velocidade do vento: zero abaixo do cut-in e acima
+    do cut-out, cúbica até a velocidade nominal e constante depois dela.
+    """
+    ramp = (wind_speed**3 - CUT_IN_SPEED**3) / (RATED_SPEED**3 - CUT_IN_SPEED**3)
+    power = RATED_POWER * np.clip(ramp, 0.0, 1.0)
+    return np.where(wind_speed > CUT_OUT_SPEED, 0.0, power)
+
+
+def _reflect(values: np.ndarray, upper: float) -> np.ndarray:
+    # Dobra um passeio sem limites para dentro de [0, upper]
+    folded = np.mod(values, 2 * upper)
+    return np.where(folded > upper, 2 * upper - folded, folded)
+
 
 @dataclass
 class SensorDataGenerator:
     db: AsyncSession
+    # 'copy' (COPY binário) ou 'insert' (INSERT ... VALUES)
+    method: str = settings.BULK_INSERT_METHOD
+    chunk_size: int = settings.BULK_CHUNK_SIZE
+    # Semente do gerador: mesma semente, mesmos dados (benchmarks reproduzíveis)
+    seed: int | None = None
+    # Ativos (turbinas) gerados em paralelo, com asset_id de 1 a `assets`
+    assets: int = 1
 
-    async def generate_data(self, start_date: datetime, days: int = 10):
+    def iter_batches(
+        self, start_date: datetime, days: int
+    ) -> Iterator[dict[str, np.ndarray]]:
         """
-        Gera dados minuto a minuto e insere em lote (Bulk Insert).
+        Gera os dados minuto a minuto em lotes colunares de até `chunk_size`
+        linhas, sob demanda: só o lote corrente fica em memória. Com vários
+        ativos, cada minuto traz uma linha por ativo (ordem timestamp, ativo),
+        cada um com o seu passeio de vento.
         """
+        rng = np.random.default_rng(self.seed)
         total_minutes = days * 24 * 60
-        data_batch = []
+        start = np.datetime64(start_date.replace(tzinfo=None), 'us')
+        start_hour = start_date.hour + start_date.minute / 60
+        minutes_per_batch = max(1, self.chunk_size // self.assets)
+        walk = np.full(self.assets, WIND_START)
 
-        current_time = start_date
+        for offset in range(0, total_minutes, minutes_per_batch):
+            minutes = np.arange(offset, min(offset + minutes_per_batch, total_minutes))
+            shape = (len(minutes), self.assets)
 
-        # Geração dos dados em memória
-        for _ in range(total_minutes):
-            record = {
-                'timestamp': current_time,
-                'wind_speed': round(random.uniform(0, 25), 2),
-                'power': round(random.uniform(0, 5000), 2),  # Ex: kW
-                'ambient_temperature': round(random.uniform(15, 35), 2),
+            # O passeio continua do último valor do lote anterior
+            steps = walk + np.cumsum(rng.normal(0.0, WIND_STEP_STD, shape), axis=0)
+            walk = steps[-1]
+            wind_speed = _reflect(steps, WIND_MAX)
+
+            noise = rng.normal(1.0, POWER_NOISE_STD, shape)
+            power = np.clip(power_curve(wind_speed) * noise, 0.0, RATED_POWER)
+
+            hours = start_hour + minutes / 60
+            daily = np.sin(2 * np.pi * (hours - TEMPERATURE_PEAK_HOUR + 6) / 24)
+            temperature = np.clip(
+                TEMPERATURE_MEAN
+                + TEMPERATURE_AMPLITUDE * daily[:, None]
+                + rng.normal(0.0, TEMPERATURE_NOISE_STD, shape),
+                *TEMPERATURE_RANGE,
+            )
+
+            yield {
+                'timestamp': np.repeat(
+                    start + minutes.astype('timedelta64[m]'), self.assets
+                ),
+                'asset_id': np.tile(
+                    np.arange(DEFAULT_ASSET_ID, DEFAULT_ASSET_ID + self.assets),
+                    len(minutes),
+                ),
+                'wind_speed': np.round(wind_speed, 2).ravel(),
+                'power': np.round(power, 2).ravel(),  # Ex: kW
+                'ambient_temperature': np.round(temperature, 2).ravel(),
             }
-            data_batch.append(record)
-            current_time += timedelta(minutes=1)
 
-        # Inserção em lote no Banco
-        # Quebramos em chunks de 10.000 para não estourar memória se for muitos dias
-        chunk_size = 10000
-        for i in range(0, len(data_batch), chunk_size):
-            chunk = data_batch[i : i + chunk_size]
-            await SensorRepository.insert_bulk_sensor_data(self.db, chunk)
+    async def generate_data(self, start_date: datetime, days: int = 10):
+        """
+        Gera dados minuto a minuto e insere em lote (Bulk Insert). O próximo
+        lote é gerado numa thread enquanto o atual é gravado no banco.
+        """
+        batches = self.iter_batches(start_date, days)
+        total_records = 0
+
+        next_batch = asyncio.create_task(asyncio.to_thread(next, batches, None))
+        try:
+            while (batch := await next_batch) is not None:
+                next_batch = asyncio.create_task(asyncio.to_thread(next, batches, None))
+                await SensorRepository.insert_bulk_columns(self.db, batch, self.method)
+                total_records += len(batch['timestamp'])
+        finally:
+            # Não deixa a thread usando o gerador após um erro na inserção
+            await asyncio.wait([next_batch])
 
         await self.db.commit()
 
         return {
-            'total_records': len(data_batch),
+            'total_records': total_records,
             'start': start_date,
-            'end': current_time,
+            'end': start_date + timedelta(minutes=total_records // self.assets),
         }
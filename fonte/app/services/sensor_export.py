@@ -0,0 +1,84 @@
+import io
+from collections.abc import AsyncIterator
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.infra.repositories.sensor_repository import METRIC_COLUMNS
+
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MEDIA_TYPE = 'application/vnd.apache.parquet'
+
+# Campos do SensorDataResponse, na ordem das tuplas de `get_rows_by_range`
+JSON_FIELDS = ('timestamp', 'asset_id', *METRIC_COLUMNS)
+
+
+def sensor_schema(metrics: list[str] | None = None) -> pa.Schema:
+    """
+    Schema colunar da resposta: timestamp, asset_id e as métricas
+    selecionadas, sempre na ordem das colunas da tabela.
+    """
+    selected = set(metrics or METRIC_COLUMNS)
+    columns = [m for m in METRIC_COLUMNS if m in selected]
+    return pa.schema(
+        [('timestamp', pa.timestamp('us')), ('asset_id', pa.int32())]
+        + [(m, pa.float64()) for m in columns]
+    )
+
+
+def json_bytes(rows: list[tuple]) -> bytes:
+    """
+    Serializa as tuplas direto para JSON com orjson, no mesmo formato do
+    `response_model` (SensorDataResponse), sem validar linha a linha.
+    O id no fim da tupla fica de fora (zip para no último campo).
+    """
+    return orjson.dumps([dict(zip(JSON_FIELDS, row)) for row in rows])
+
+
+def _to_batch(columns: dict[str, tuple], schema: pa.Schema) -> pa.RecordBatch:
+    # Colunas extras do cursor (ex: id) ficam de fora do schema exportado
+    return pa.RecordBatch.from_pydict(
+        {name: columns[name] for name in schema.names}, schema=schema
+    )
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+async def arrow_stream(
+    batches: AsyncIterator[dict[str, tuple]], metrics: list[str] | None = None
+) -> AsyncIterator[bytes]:
+    """
+    Codifica os lotes do cursor como Arrow IPC stream, enviando cada
+    RecordBatch assim que ele é lido do banco.
+    """
+    schema = sensor_schema(metrics)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield _drain(sink)
+        async for columns in batches:
+            writer.write_batch(_to_batch(columns, schema))
+            yield _drain(sink)
+
+    # Marcador de fim de stream escrito no close do writer
+    yield _drain(sink)
+
+
+async def parquet_bytes(
+    batches: AsyncIterator[dict[str, tuple]], metrics: list[str] | None = None
+) -> bytes:
+    """
+    Gera um arquivo Parquet com um row group por lote do cursor.
+    O formato exige o rodapé no final, então a resposta não é streaming.
+    """
+    schema = sensor_schema(metrics)
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        async for columns in batches:
+            writer.write_batch(_to_batch(columns, schema))
+    return sink.getvalue()
@@ -0,0 +1,147 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.config import settings
+from app.infra.repositories.sensor_repository import SensorRepository
+from app.schemas.sensor import SensorDataCreate
+
+READINGS_ADAPTER = TypeAdapter(list[SensorDataCreate])
+
+
+def parse_readings(body: bytes, ndjson: bool = False) -> list[SensorDataCreate]:
+    """
+    Valida de uma vez um array JSON (ou NDJSON, uma leitura por linha) de
+    leituras. Erros levantam `pydantic.ValidationError`.
+    """
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        body = b'[' + b','.join(lines) + b']'
+    return READINGS_ADAPTER.validate_json(body)
+
+
+def _naive(timestamp: datetime) -> datetime:
+    # A coluna é sem fuso: horários com fuso são gravados em UTC
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(UTC).replace(tzinfo=None)
+
+
+def to_row(reading: SensorDataCreate) -> dict:
+    row = reading.model_dump()
+    row['timestamp'] = _naive(reading.timestamp)
+    return row
+
+
+@dataclass
+class IngestResult:
+    received: int
+    inserted: int
+
+    @property
+    def skipped(self) -> int:
+        return self.received - self.inserted
+
+
+async def ingest_batch(
+    db: AsyncSession,
+    readings: list[SensorDataCreate],
+    idempotent: bool = False,
+    method: str = settings.BULK_INSERT_METHOD,
+) -> IngestResult:
+    """
+    Grava as leituras numa única transação pelo caminho de inserção em lote.
+    Com `idempotent`, leituras cujo par (asset_id, timestamp) já existe no
+    banco (ou se repete no próprio lote) são ignoradas, então reenviar o mesmo
+    lote não duplica.
+    """
+    rows = [to_row(reading) for reading in readings]
+    if idempotent and rows:
+        await SensorRepository.acquire_ingest_lock(db)
+        # Mantém a primeira leitura de cada (asset_id, timestamp) do lote
+        unique = {}
+        for row in rows:
+            unique.setdefault((row['asset_id'], row['timestamp']), row)
+        existing = await SensorRepository.get_existing_readings(db, list(unique))
+        rows = [row for key, row in unique.items() if key not in existing]
+
+    if rows:
+        await SensorRepository.insert_bulk_sensor_data(db, rows, method)
+    await db.commit()
+    return IngestResult(received=len(readings), inserted=len(rows))
+
+
+@dataclass
+class MicroBatcher:
+    """
+    Agrupa inserções unitárias concorrentes (POST /sensors) em uma única
+    escrita: o lote é gravado ao atingir `max_rows` ou `max_delay` segundos
+    após a primeira leitura. Cada chamada de `submit` só retorna depois que
+    a sua leitura foi commitada (ou levanta o erro da escrita).
+    """
+
+    max_rows: int = settings.INGEST_MICROBATCH_MAX_ROWS
+    max_delay: float = settings.INGEST_MICROBATCH_DELAY_MS / 1000
+    pending: list[tuple[dict, asyncio.Future]] = field(default_factory=list)
+    flushes: int = 0
+    _session_factory: async_sessionmaker[AsyncSession] | None = None
+    _timer: asyncio.TimerHandle | None = None
+    _writes: set[asyncio.Task] = field(default_factory=set)
+
+    async def submit(
+        self,
+        reading: SensorDataCreate,
+        session_factory: async_sessionmaker[AsyncSession],
+    ):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._session_factory = session_factory
+        self.pending.append((to_row(reading), future))
+
+        if len(self.pending) >= self.max_rows:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, []
+        task = asyncio.create_task(self._write(batch, self._session_factory))
+        # Mantém a referência até a escrita terminar
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(
+        self,
+        batch: list[tuple[dict, asyncio.Future]],
+        session_factory: async_sessionmaker[AsyncSession],
+    ):
+        self.flushes += 1
+        try:
+            async with session_factory() as db:
+                await SensorRepository.insert_bulk_sensor_data(
+                    db, [row for row, _ in batch]
+                )
+                await db.commit()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for _, future in batch:
+            # Requisições canceladas (cliente desconectou) já estão concluídas
+            if not future.done():
+                future.set_result(None)
+
+
+micro_batcher = MicroBatcher()
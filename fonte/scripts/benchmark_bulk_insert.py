@@ -0,0 +1,78 @@
+"""
+Compara linhas/s da inserção em lote na tabela data: INSERT ... VALUES x
+COPY binário (SensorRepository.insert_bulk_sensor_data).
+
+Uso:
+    python scripts/benchmark_bulk_insert.py --rows 200000 --chunk-size 10000
+
+Cada método roda numa transação desfeita ao final (rollback), então o banco
+de DATABASE_URL não fica com os dados do benchmark.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Adiciona o diretório pai ao path para conseguir importar 'app'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config.config import settings
+from app.infra.database.database import AsyncSessionLocal
+from app.infra.repositories.sensor_repository import SensorRepository
+
+METHODS = ('insert', 'copy')
+
+
+def synthetic_rows(count: int) -> list[dict]:
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            'timestamp': start + timedelta(minutes=i),
+            'wind_speed': 8.0 + i % 7 / 3,
+            'power': 500.0 + i % 11 / 7,
+            'ambient_temperature': 20.0 + i % 5 / 9,
+        }
+        for i in range(count)
+    ]
+
+
+async def measure(method: str, rows: list[dict], chunk_size: int) -> float:
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for i in range(0, len(rows), chunk_size):
+            await SensorRepository.insert_bulk_sensor_data(
+                db, rows[i : i + chunk_size], method
+            )
+        # Garante que o servidor processou tudo antes de parar o relógio
+        await db.flush()
+        elapsed = time.perf_counter() - started
+        await db.rollback()
+    return elapsed
+
+
+async def run(count: int, chunk_size: int, repeat: int):
+    rows = synthetic_rows(count)
+    print(f'Linhas: {count:,} em lotes de {chunk_size:,}')
+
+    rates = {}
+    for method in METHODS:
+        best = min([await measure(method, rows, chunk_size) for _ in range(repeat)])
+        rates[method] = count / best if best else 0.0
+        print(f'{method:<8} {best * 1000:>9.1f} ms  {rates[method]:>12,.0f} linhas/s')
+    print(f'Ganho do COPY: {rates["copy"] / rates["insert"]:.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--chunk-size', type=int, default=settings.BULK_CHUNK_SIZE)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.chunk_size, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Compara linhas/s do GET /sensors em JSON: caminho antigo (ORM +
+response_model do Pydantic + json.dumps) x caminho rápido (tuplas + orjson).
+
+Uso:
+    python scripts/benchmark_serialization.py --rows 200000
+    python scripts/benchmark_serialization.py --db --start 2025-03-01 --days 1
+
+Sem --db, mede só a serialização sobre linhas geradas em memória.
+Com --db, mede consulta + serialização no banco de DATABASE_URL.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Adiciona o diretório pai ao path para conseguir importar 'app'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pydantic import TypeAdapter
+
+from app.infra.database.database import AsyncSessionLocal
+from app.infra.models.sensor import SensorData
+from app.infra.repositories.sensor_repository import SensorRepository
+from app.schemas.sensor import SensorDataResponse
+from app.services.sensor_export import json_bytes
+
+ADAPTER = TypeAdapter(list[SensorDataResponse])
+
+
+def response_model_bytes(objects: list) -> bytes:
+    """
+    Mesmo trabalho do FastAPI com response_model: valida cada linha,
+    converte para tipos JSON e serializa com json.dumps.
+    """
+    validated = ADAPTER.validate_python(objects, from_attributes=True)
+    content = ADAPTER.dump_python(validated, mode='json')
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def synthetic_rows(count: int) -> tuple[list[SensorData], list[tuple]]:
+    start = datetime(2025, 1, 1)
+    objects, rows = [], []
+    for i in range(count):
+        timestamp = start + timedelta(minutes=i)
+        values = (8.0 + i % 7 / 3, 500.0 + i % 11 / 7, 20.0 + i % 5 / 9)
+        obj = SensorData(timestamp, *values)
+        obj.id = i + 1
+        objects.append(obj)
+        rows.append((timestamp, obj.asset_id, *values, i + 1))
+    return objects, rows
+
+
+def measure(label: str, count: int, func, repeat: int) -> float:
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(func())
+        best = min(best, time.perf_counter() - started)
+    rate = count / best if best else 0.0
+    print(
+        f'{label:<24} {best * 1000:>9.1f} ms  {rate:>12,.0f} linhas/s  '
+        f'{size:>12,} bytes'
+    )
+    return rate
+
+
+async def fetch_from_db(start: datetime, end: datetime):
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        objects = await SensorRepository.get_data_by_range(db, start, end)
+        orm_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = await SensorRepository.get_rows_by_range(db, start, end)
+        tuple_seconds = time.perf_counter() - started
+    return objects, rows, orm_seconds, tuple_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--db', action='store_true', help='Lê as linhas do banco')
+    parser.add_argument('--start', type=str, default='2025-03-01')
+    parser.add_argument('--days', type=int, default=1)
+    args = parser.parse_args()
+
+    orm_seconds = tuple_seconds = 0.0
+    if args.db:
+        start = datetime.strptime(args.start, '%Y-%m-%d')
+        end = start + timedelta(days=args.days) - timedelta(seconds=1)
+        objects, rows, orm_seconds, tuple_seconds = asyncio.run(
+            fetch_from_db(start, end)
+        )
+    else:
+        objects, rows = synthetic_rows(args.rows)
+
+    count = len(rows)
+    print(f'Linhas: {count:,}')
+    if args.db:
+        print(f'Consulta ORM:    {orm_seconds * 1000:>9.1f} ms')
+        print(f'Consulta tuplas: {tuple_seconds * 1000:>9.1f} ms')
+
+    slow = measure(
+        'response_model + json',
+        count,
+        lambda: response_model_bytes(objects),
+        args.repeat,
+    )
+    fast = measure('tuplas + orjson', count, lambda: json_bytes(rows), args.repeat)
+    print(f'Ganho na serialização: {fast / slow:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
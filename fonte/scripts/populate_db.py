@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 import sys
@@ -6,19 +7,22 @@ from datetime import datetime
 # Adiciona o diretório pai ao path para conseguir importar 'app'
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from app.config.config import settings
 from app.infra.database.database import AsyncSessionLocal
 from app.services.sensor_data_generator import SensorDataGenerator
 
 
-async def main():
-    print('Iniciando população do banco de dados...')
+async def main(method: str, chunk_size: int, seed: int | None, assets: int):
+    print(f'Iniciando população do banco de dados ({method}, lotes de {chunk_size})...')
 
     # Define a data inicial fixa ou dinâmica
     start_date = datetime(2025, 3, 1, 0, 0, 0)
     days = 10
 
     async with AsyncSessionLocal() as session:
-        seeder = SensorDataGenerator(session)
+        seeder = SensorDataGenerator(
+            session, method=method, chunk_size=chunk_size, seed=seed, assets=assets
+        )
         result = await seeder.generate_data(start_date, days)
 
     print(f'Sucesso! {result["total_records"]} registros inseridos.')
@@ -26,4 +30,12 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Popula a tabela data da Fonte')
+    parser.add_argument(
+        '--method', choices=['copy', 'insert'], default=settings.BULK_INSERT_METHOD
+    )
+    parser.add_argument('--chunk-size', type=int, default=settings.BULK_CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--assets', type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.method, args.chunk_size, args.seed, args.assets))
@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+# Adiciona o diretório pai ao path para conseguir importar 'app'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.infra.database.database import AsyncSessionLocal
+from app.infra.repositories.sensor_repository import SensorRepository
+
+
+async def main(start_date: datetime | None, end_date: datetime | None):
+    period = f'{start_date or "início"} até {end_date or "fim"}'
+    print(f'Recalculando a tabela sensor_rollup ({period})...')
+
+    async with AsyncSessionLocal() as session:
+        buckets = await SensorRepository.rebuild_rollup(session, start_date, end_date)
+        await session.commit()
+
+    print(f'Sucesso! {buckets} janelas de 10 minutos gravadas.')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Recalcula o rollup da Fonte a partir da tabela data'
+    )
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None)
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end))
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+
+from app.infra.repositories.sensor_repository import SensorRepository
+
+
+@pytest.mark.asyncio
+async def test_get_job_not_found(client):
+    resp = client.get('/api/v1/jobs/unknown')
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+    resp = client.delete('/api/v1/jobs/unknown')
+    assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_cancel_job(client, monkeypatch):
+    # Cada lote "demora" para o job ainda estar rodando no DELETE
+    async def slow_insert_bulk_columns(db, columns, method):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(
+        SensorRepository, 'insert_bulk_columns', slow_insert_bulk_columns
+    )
+    payload = {'start_date': datetime(2024, 1, 1).isoformat(), 'days': 30}
+
+    created = client.post('/api/v1/sensors/populate_database', json=payload)
+    job_id = created.json()['job_id']
+    resp = client.delete(f'/api/v1/jobs/{job_id}')
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json()['status'] == 'cancelled'
+    assert resp.json()['rows_written'] == 0
+    assert client.get(f'/api/v1/jobs/{job_id}').json()['status'] == 'cancelled'
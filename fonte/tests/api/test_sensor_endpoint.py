@@ -1,8 +1,16 @@
+import io
+import json
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
+from sqlalchemy import func, select
 
+from app.config.config import settings
+from app.infra.models.sensor import SensorData
 from app.infra.repositories.sensor_repository import SensorRepository
 
 
@@ -63,6 +71,7 @@ async def test_get_sensor_data_returns_full_objects(client, session):
     item = body[0]
     response_expected = {
         'timestamp': now.isoformat(),
+        'asset_id': 1,
         'wind_speed': 10.5,
         'power': 100.0,
         'ambient_temperature': 25.0,
@@ -127,26 +136,41 @@ async def test_get_sensor_data_with_invalid_metric_returns_422(client):
     assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
 
+def wait_for_job(client, job_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/api/v1/jobs/{job_id}').json()
+        if job['status'] != 'running' or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
 @pytest.mark.asyncio
-async def test_populate_database(client):
+async def test_populate_database(client, session):
     payload = {
         'start_date': datetime(2024, 1, 1, 0, 0, 0).isoformat(),
         'days': 1,
     }
 
     resp = client.post('/api/v1/sensors/populate_database', json=payload)
-    assert resp.status_code == HTTPStatus.CREATED
+    assert resp.status_code == HTTPStatus.ACCEPTED
 
     body = resp.json()
-    expected_response = {
-        'message': 'Dados inseridos com sucesso',
-        'details': {
-            'total_records': 1440,
-            'start': '2024-01-01T00:00:00',
-            'end': '2024-01-02T00:00:00',
-        },
-    }
-    assert body == expected_response
+    total_expected = 1440
+    assert body['status'] == 'running'
+    assert body['total_rows'] == total_expected
+    assert resp.headers['location'].endswith(f'/api/v1/jobs/{body["job_id"]}')
+
+    job = wait_for_job(client, body['job_id'])
+    assert job['status'] == 'done'
+    assert job['rows_written'] == job['total_rows']
+    assert job['start'] == '2024-01-01T00:00:00'
+    assert job['end'] == '2024-01-02T00:00:00'
+    assert job['eta_seconds'] is None
+    assert job['throughput'] > 0
+
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    assert count == job['total_rows']
 
 
 @pytest.mark.asyncio
@@ -162,12 +186,12 @@ async def test_populate_database_invalid_payload(client):
 
 @pytest.mark.asyncio
 async def test_populate_database_server_error(client, monkeypatch):
-    def mock_generate_data(self, start_date, days):
+    async def mock_insert_bulk_columns(db, columns, method):
         raise Exception('Simulated database error')
 
     monkeypatch.setattr(
-        'app.services.sensor_data_generator.SensorDataGenerator.generate_data',
-        mock_generate_data,
+        'app.infra.repositories.sensor_repository.SensorRepository.insert_bulk_columns',
+        mock_insert_bulk_columns,
     )
 
     payload = {
@@ -176,7 +200,553 @@ async def test_populate_database_server_error(client, monkeypatch):
     }
 
     resp = client.post('/api/v1/sensors/populate_database', json=payload)
-    assert resp.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+    assert resp.status_code == HTTPStatus.ACCEPTED
+
+    job = wait_for_job(client, resp.json()['job_id'])
+    assert job['status'] == 'error'
+    assert job['error'] == 'Simulated database error'
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_paginates_with_cursor(client, session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    for minute in range(3):
+        await SensorRepository.insert_sensor_data(
+            db=session,
+            timestamp=now + timedelta(minutes=minute),
+            wind_speed=float(minute),
+        )
+
+    params = {
+        'start_date': now.isoformat(),
+        'end_date': (now + timedelta(minutes=5)).isoformat(),
+        'limit': 2,
+    }
+
+    first = client.get('/api/v1/sensors', params=params)
+    assert first.status_code == HTTPStatus.OK
+    assert [item['wind_speed'] for item in first.json()] == [0.0, 1.0]
+    cursor = first.headers['X-Next-Cursor']
+
+    second = client.get('/api/v1/sensors', params={**params, 'after': cursor})
+    assert second.status_code == HTTPStatus.OK
+    assert [item['wind_speed'] for item in second.json()] == [2.0]
+    # Última página não devolve cursor
+    assert 'X-Next-Cursor' not in second.headers
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_with_invalid_cursor_returns_422(client):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    params = {
+        'start_date': now.isoformat(),
+        'end_date': now.isoformat(),
+        'limit': 10,
+        'after': 'not-a-cursor',
+    }
+
+    resp = client.get('/api/v1/sensors', params=params)
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_ndjson_streams_one_row_per_line(client, session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    for minute in range(2):
+        await SensorRepository.insert_sensor_data(
+            db=session,
+            timestamp=now + timedelta(minutes=minute),
+            wind_speed=10.0 + minute,
+            power=100.0,
+        )
+
+    params = {
+        'start_date': now.isoformat(),
+        'end_date': (now + timedelta(minutes=1)).isoformat(),
+        'metrics': ['wind_speed'],
+    }
+
+    resp = client.get(
+        '/api/v1/sensors', params=params, headers={'Accept': 'application/x-ndjson'}
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers['content-type'].startswith('application/x-ndjson')
+
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    # Mesmo contrato do JSON: campos não selecionados vêm como None
+    assert lines == [
+        {
+            'timestamp': now.isoformat(),
+            'asset_id': 1,
+            'wind_speed': 10.0,
+            'power': None,
+            'ambient_temperature': None,
+        },
+        {
+            'timestamp': (now + timedelta(minutes=1)).isoformat(),
+            'asset_id': 1,
+            'wind_speed': 11.0,
+            'power': None,
+            'ambient_temperature': None,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_arrow_stream_returns_columnar_batches(client, session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    for minute in range(3):
+        await SensorRepository.insert_sensor_data(
+            db=session,
+            timestamp=now + timedelta(minutes=minute),
+            wind_speed=10.0 + minute,
+            power=100.0,
+        )
+
+    params = {
+        'start_date': now.isoformat(),
+        'end_date': (now + timedelta(minutes=2)).isoformat(),
+        'metrics': ['wind_speed'],
+    }
+
+    resp = client.get(
+        '/api/v1/sensors',
+        params=params,
+        headers={'Accept': 'application/vnd.apache.arrow.stream'},
+    )
+    assert resp.status_code == HTTPStatus.OK
+
+    table = pa.ipc.open_stream(resp.content).read_all()
+    # Apenas timestamp, ativo e as métricas selecionadas, sem o id interno
+    assert table.column_names == ['timestamp', 'asset_id', 'wind_speed']
+    assert table.column('wind_speed').to_pylist() == [10.0, 11.0, 12.0]
+    assert table.column('timestamp').to_pylist()[0] == now
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_parquet_returns_all_metrics(client, session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    await SensorRepository.insert_sensor_data(
+        db=session, timestamp=now, wind_speed=10.5, power=100.0
+    )
+
+    params = {'start_date': now.isoformat(), 'end_date': now.isoformat()}
+
+    resp = client.get(
+        '/api/v1/sensors',
+        params=params,
+        headers={'Accept': 'application/vnd.apache.parquet'},
+    )
+    assert resp.status_code == HTTPStatus.OK
+
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.to_pylist() == [
+        {
+            'timestamp': now,
+            'asset_id': 1,
+            'wind_speed': 10.5,
+            'power': 100.0,
+            'ambient_temperature': None,
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_digest_by_day(client, session):
+    start = datetime(2025, 1, 1)
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {'timestamp': start + timedelta(hours=h), 'wind_speed': float(h)}
+            for h in range(30)
+        ],
+    )
+    await session.commit()
+    params = {
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=2)).isoformat(),
+    }
+
+    resp = client.get('/api/v1/sensors/digest', params=params)
+    assert resp.status_code == HTTPStatus.OK
 
     body = resp.json()
-    assert body['detail'] == 'Simulated database error'
+    assert [d['bucket_start'] for d in body] == [
+        '2025-01-01T00:00:00',
+        '2025-01-02T00:00:00',
+    ]
+    assert [d['count'] for d in body] == [24, 6]
+
+    # Alterar uma linha muda o checksum apenas do dia afetado
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=start + timedelta(days=1, hours=12), power=1.0
+    )
+    changed = client.get('/api/v1/sensors/digest', params=params).json()
+    assert changed[0] == body[0]
+    assert changed[1]['checksum'] != body[1]['checksum']
+
+    hourly = client.get(
+        '/api/v1/sensors/digest', params={**params, 'bucket': 'hour'}
+    ).json()
+    # 30 horas com dados + a hora da linha inserida depois
+    length_expected = 31
+    assert len(hourly) == length_expected
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_stats_by_hour(client, session):
+    start = datetime(2025, 1, 1)
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {'timestamp': start + timedelta(minutes=m), 'power': 1.0}
+            for m in (5, 30, 185)
+        ],
+    )
+    await session.commit()
+
+    resp = client.get(
+        '/api/v1/sensors/stats',
+        params={
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=1)).isoformat(),
+            'bucket': 'hour',
+        },
+    )
+
+    assert resp.status_code == HTTPStatus.OK
+    # Horas sem registros não aparecem
+    assert resp.json() == [
+        {
+            'bucket_start': '2025-01-01T00:00:00',
+            'count': 2,
+            'first_timestamp': '2025-01-01T00:05:00',
+            'last_timestamp': '2025-01-01T00:30:00',
+        },
+        {
+            'bucket_start': '2025-01-01T03:00:00',
+            'count': 1,
+            'first_timestamp': '2025-01-01T03:05:00',
+            'last_timestamp': '2025-01-01T03:05:00',
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_etag_not_modified(client, session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    await SensorRepository.insert_sensor_data(session, timestamp=now, power=1.0)
+    params = {
+        'start_date': now.isoformat(),
+        'end_date': (now + timedelta(minutes=5)).isoformat(),
+    }
+
+    resp = client.get('/api/v1/sensors', params=params)
+    etag = resp.headers['etag']
+
+    cached = client.get(
+        '/api/v1/sensors', params=params, headers={'If-None-Match': etag}
+    )
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert cached.content == b''
+
+    # Outra representação do mesmo intervalo tem outro ETag
+    parquet = client.get(
+        '/api/v1/sensors',
+        params=params,
+        headers={'Accept': 'application/vnd.apache.parquet', 'If-None-Match': etag},
+    )
+    assert parquet.status_code == HTTPStatus.OK
+    assert parquet.headers['etag'] != etag
+
+    # Streaming começa sem checksum prévio: sem ETag
+    ndjson = client.get(
+        '/api/v1/sensors',
+        params=params,
+        headers={'Accept': 'application/x-ndjson', 'If-None-Match': etag},
+    )
+    assert ndjson.status_code == HTTPStatus.OK
+    assert 'etag' not in ndjson.headers
+
+    # Um novo registro no intervalo invalida o ETag
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=now + timedelta(minutes=1), power=2.0
+    )
+    changed = client.get(
+        '/api/v1/sensors', params=params, headers={'If-None-Match': etag}
+    )
+    assert changed.status_code == HTTPStatus.OK
+    length_expected = 2
+    assert len(changed.json()) == length_expected
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_etag_scoped_to_page(client, session):
+    start = datetime(2025, 1, 1)
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [{'timestamp': start + timedelta(minutes=m), 'power': 1.0} for m in range(4)],
+    )
+    await session.commit()
+    params = {
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(hours=1)).isoformat(),
+        'limit': 2,
+    }
+    first = client.get('/api/v1/sensors', params=params)
+    second_params = {**params, 'after': first.headers['x-next-cursor']}
+    second = client.get('/api/v1/sensors', params=second_params)
+
+    # Uma linha nova antes do cursor muda só a primeira página
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=start + timedelta(seconds=30), power=2.0
+    )
+    first_again = client.get(
+        '/api/v1/sensors',
+        params=params,
+        headers={'If-None-Match': first.headers['etag']},
+    )
+    second_again = client.get(
+        '/api/v1/sensors',
+        params=second_params,
+        headers={'If-None-Match': second.headers['etag']},
+    )
+
+    assert second.headers['etag'] != first.headers['etag']
+    assert first_again.status_code == HTTPStatus.OK
+    assert second_again.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_aggregates_selected_stats(client, session):
+    start = datetime(2025, 1, 1)
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {'timestamp': start + timedelta(minutes=m), 'power': float(m)}
+            for m in range(60)
+        ],
+    )
+    await session.commit()
+
+    resp = client.get(
+        '/api/v1/sensors/aggregate',
+        params={
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(minutes=59)).isoformat(),
+            'bucket_minutes': 30,
+            'metrics': ['power'],
+            'stats': ['min', 'max'],
+        },
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == [
+        {
+            'timestamp': '2025-01-01T00:00:00',
+            'asset_id': 1,
+            'power_min': 0.0,
+            'power_max': 29.0,
+        },
+        {
+            'timestamp': '2025-01-01T00:30:00',
+            'asset_id': 1,
+            'power_min': 30.0,
+            'power_max': 59.0,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('metrics', [None, ['power']])
+async def test_get_sensor_data_fast_json_matches_response_model(
+    client, session, monkeypatch, metrics
+):
+    start = datetime(2025, 1, 1, 12, 0, 0, 250000)
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {
+                'timestamp': start + timedelta(minutes=m),
+                'wind_speed': 7.1 + m,
+                'power': None if m == 1 else 1 / 3 + m,
+                'ambient_temperature': 20.0,
+            }
+            for m in range(5)
+        ],
+    )
+    await session.commit()
+    params = {
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(hours=1)).isoformat(),
+        'limit': 3,
+    }
+    if metrics:
+        params['metrics'] = metrics
+
+    monkeypatch.setattr(settings, 'SENSORS_FAST_JSON', True)
+    fast = client.get('/api/v1/sensors', params=params)
+    monkeypatch.setattr(settings, 'SENSORS_FAST_JSON', False)
+    slow = client.get('/api/v1/sensors', params=params)
+
+    assert fast.content == slow.content
+    assert fast.headers['x-next-cursor'] == slow.headers['x-next-cursor']
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_response_cache_hit_and_invalidation(client, session):
+    start = datetime(2025, 1, 1)
+    await SensorRepository.insert_sensor_data(session, timestamp=start, power=1.0)
+    params = {
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(hours=1)).isoformat(),
+    }
+
+    first = client.get('/api/v1/sensors', params=params)
+    second = client.get('/api/v1/sensors', params=params)
+    stats = client.get('/api/v1/sensors/cache').json()
+
+    assert second.content == first.content
+    assert second.headers['etag'] == first.headers['etag']
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+    # Inserção no intervalo invalida a entrada no commit
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=start + timedelta(minutes=30), power=2.0
+    )
+    after_insert = client.get('/api/v1/sensors', params=params)
+
+    length_expected = 2
+    assert len(after_insert.json()) == length_expected
+    assert client.get('/api/v1/sensors/cache').json()['invalidations'] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_data_open_range_is_not_cached(client):
+    now = datetime.now()
+    params = {
+        'start_date': (now - timedelta(hours=1)).isoformat(),
+        'end_date': (now + timedelta(hours=1)).isoformat(),
+    }
+
+    client.get('/api/v1/sensors', params=params)
+    client.get('/api/v1/sensors', params=params)
+
+    assert client.get('/api/v1/sensors/cache').json()['entries'] == 0
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_batch_json_and_ndjson(client, session):
+    start = datetime(2025, 1, 1)
+    readings = [
+        {'timestamp': (start + timedelta(minutes=i)).isoformat(), 'power': float(i)}
+        for i in range(4)
+    ]
+
+    resp = client.post('/api/v1/sensors/batch', json=readings[:2])
+    ndjson_resp = client.post(
+        '/api/v1/sensors/batch',
+        content='\n'.join(json.dumps(r) for r in readings[2:]) + '\n',
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+
+    assert resp.status_code == HTTPStatus.CREATED
+    assert resp.json() == {'received': 2, 'inserted': 2, 'skipped': 0}
+    assert ndjson_resp.json() == {'received': 2, 'inserted': 2, 'skipped': 0}
+    rows = await SensorRepository.get_data_by_range(
+        session, start, start + timedelta(hours=1)
+    )
+    assert [r.power for r in rows] == [0.0, 1.0, 2.0, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_batch_idempotent(client, session):
+    start = datetime(2025, 1, 1)
+    readings = [
+        {'timestamp': (start + timedelta(minutes=i)).isoformat(), 'power': 1.0}
+        for i in range(3)
+    ]
+    url = '/api/v1/sensors/batch?idempotent=true'
+
+    first = client.post(url, json=readings)
+    # Reenvio com uma leitura nova e uma repetida dentro do próprio lote
+    extra = {'timestamp': (start + timedelta(minutes=3)).isoformat(), 'power': 2.0}
+    again = client.post(url, json=[*readings, extra, extra])
+
+    assert first.json() == {'received': 3, 'inserted': 3, 'skipped': 0}
+    assert again.json() == {'received': 5, 'inserted': 1, 'skipped': 4}
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    total_expected = 4
+    assert count == total_expected
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_batch_idempotent_per_asset(client, session):
+    timestamp = datetime(2025, 1, 1).isoformat()
+    url = '/api/v1/sensors/batch?idempotent=true'
+
+    first = client.post(url, json=[{'timestamp': timestamp, 'power': 1.0}])
+    # Mesmo timestamp em outro ativo não é duplicata
+    again = client.post(
+        url,
+        json=[
+            {'timestamp': timestamp, 'power': 1.0},
+            {'timestamp': timestamp, 'asset_id': 2, 'power': 3.0},
+        ],
+    )
+    assert first.json() == {'received': 1, 'inserted': 1, 'skipped': 0}
+    assert again.json() == {'received': 2, 'inserted': 1, 'skipped': 1}
+
+    resp = client.get(
+        '/api/v1/sensors',
+        params={'start_date': timestamp, 'end_date': timestamp, 'asset_id': [2]},
+    )
+    assert resp.status_code == HTTPStatus.OK
+    assert [(r['asset_id'], r['power']) for r in resp.json()] == [(2, 3.0)]
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_batch_invalid(client):
+    readings = [
+        {'timestamp': datetime(2025, 1, 1).isoformat()},
+        {'timestamp': 'not-a-date'},
+    ]
+
+    resp = client.post('/api/v1/sensors/batch', json=readings)
+    not_json = client.post('/api/v1/sensors/batch', content=b'{"oops"')
+
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert resp.json()['detail'][0]['loc'] == [1, 'timestamp']
+    assert not_json.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_batch_too_large(client, monkeypatch):
+    monkeypatch.setattr(settings, 'INGEST_BATCH_MAX_ROWS', 1)
+    readings = [{'timestamp': datetime(2025, 1, 1, 0, i).isoformat()} for i in range(2)]
+
+    resp = client.post('/api/v1/sensors/batch', json=readings)
+
+    assert resp.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def test_create_sensor_data_micro_batch(client, session, monkeypatch):
+    monkeypatch.setattr(settings, 'INGEST_MICROBATCH_ENABLED', True)
+    payload = {'timestamp': datetime(2025, 1, 1, 12).isoformat(), 'power': 5.0}
+
+    resp = client.post('/api/v1/sensors', json=payload)
+
+    assert resp.status_code == HTTPStatus.CREATED
+    assert resp.json()['power'] == payload['power']
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    assert count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_sensor_live_rejects_invalid_cursor(client, monkeypatch):
+    resp = client.get('/api/v1/sensors/live', headers={'Last-Event-ID': 'oops'})
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+    monkeypatch.setattr(settings, 'LIVE_TAIL_ENABLED', False)
+    resp = client.get('/api/v1/sensors/live')
+    assert resp.status_code == HTTPStatus.NOT_FOUND
@@ -1,12 +1,22 @@
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from testcontainers.postgres import PostgresContainer
 
-from app.infra.database.database import get_session
+from app.infra.database.database import (
+    get_read_session,
+    get_session,
+    get_session_factory,
+)
+from app.infra.database.partitions import clear_partition_cache
 from app.infra.models.sensor import table_registry
 from app.main import app
+from app.services.response_cache import response_cache
 
 
 @pytest.fixture(scope='session')
@@ -29,6 +39,7 @@ async def session(engine):
     # Drop tables after tests
     async with engine.begin() as conn:
         await conn.run_sync(table_registry.metadata.drop_all)
+    clear_partition_cache()
 
 
 @pytest.fixture
@@ -36,8 +47,15 @@ def client(session):
     async def get_session_override():
         return session
 
+    # As tabelas são recriadas a cada teste: nada do cache pode sobreviver
+    response_cache.clear()
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
+        # Jobs em segundo plano abrem as próprias sessões no banco de teste
+        app.dependency_overrides[get_session_factory] = lambda: async_sessionmaker(
+            session.bind, expire_on_commit=False
+        )
         yield client
 
     app.dependency_overrides.clear()
@@ -0,0 +1,32 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.infra.database.metrics import instrument_engine, operation_label
+
+
+def sample(name: str, operation: str) -> float:
+    return REGISTRY.get_sample_value(name, {'operation': operation}) or 0.0
+
+
+def test_operation_label():
+    assert operation_label('  select 1') == 'SELECT'
+    assert operation_label('WITH moved AS (...) INSERT ...') == 'WITH'
+    assert operation_label('') == 'UNKNOWN'
+
+
+@pytest.mark.asyncio
+async def test_instrument_engine_times_queries_and_rows(engine):
+    instrument_engine(engine)
+    instrument_engine(engine)  # idempotente: não duplica as medições
+    count_before = sample('fonte_db_query_duration_seconds_count', 'SELECT')
+    rows_before = sample('fonte_db_query_rows_sum', 'SELECT')
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT generate_series(1, 3)'))
+
+    rows_expected = 3
+    assert sample('fonte_db_query_duration_seconds_count', 'SELECT') == (
+        count_before + 1
+    )
+    assert sample('fonte_db_query_rows_sum', 'SELECT') == rows_before + rows_expected
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.infra.database import partitions
+from app.infra.database.partitions import (
+    ensure_partitions,
+    get_partition_bounds,
+    partition_ranges,
+)
+from app.infra.models.sensor import DEFAULT_PARTITION, SensorData
+from app.infra.repositories.sensor_repository import SensorRepository
+
+
+def test_partition_ranges_by_month_and_day():
+    start = datetime(2025, 1, 20, 8, 30)
+    end = datetime(2025, 3, 2)
+
+    months = partition_ranges(start, end, 'month')
+    days = partition_ranges(start, start + timedelta(hours=20), 'day')
+
+    assert months == [
+        (datetime(2025, 1, 1), datetime(2025, 2, 1)),
+        (datetime(2025, 2, 1), datetime(2025, 3, 1)),
+        (datetime(2025, 3, 1), datetime(2025, 4, 1)),
+    ]
+    assert days == [
+        (datetime(2025, 1, 20), datetime(2025, 1, 21)),
+        (datetime(2025, 1, 21), datetime(2025, 1, 22)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_moves_rows_from_default(session):
+    # Linha gravada sem partição do mês (ex: antes do particionamento): DEFAULT
+    await session.execute(
+        text("INSERT INTO data (timestamp, wind_speed) VALUES ('2025-01-10', 1.0)")
+    )
+
+    created = await ensure_partitions(
+        session, datetime(2025, 1, 1), datetime(2025, 1, 31), 'month'
+    )
+    await session.commit()
+
+    bounds = await get_partition_bounds(session)
+    in_default = await session.scalar(text(f'SELECT count(*) FROM {DEFAULT_PARTITION}'))
+    in_partition = await session.scalar(text('SELECT count(*) FROM data_p202501'))
+    assert created == ['data_p202501']
+    assert bounds['data_p202501'] == (datetime(2025, 1, 1), datetime(2025, 2, 1))
+    assert in_default == 0
+    assert in_partition == 1
+
+    # Já existente: nada a fazer
+    again = await ensure_partitions(
+        session, datetime(2025, 1, 5), datetime(2025, 1, 6), 'month'
+    )
+    assert again == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_creates_partitions_and_range_is_pruned(session):
+    start = datetime(2025, 1, 31, 23)
+    rows = [
+        {'timestamp': start + timedelta(minutes=i), 'wind_speed': float(i)}
+        for i in range(120)
+    ]
+    await SensorRepository.insert_bulk_sensor_data(session, rows)
+    await session.commit()
+
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    plan = await session.execute(
+        text(
+            'EXPLAIN SELECT * FROM data '
+            "WHERE timestamp >= '2025-02-01' AND timestamp <= '2025-02-01 00:30'"
+        )
+    )
+    plan_text = '\n'.join(line for (line,) in plan)
+    assert count == len(rows)
+    assert 'data_p202502' in plan_text
+    assert 'data_p202501' not in plan_text
+    assert DEFAULT_PARTITION not in plan_text
+
+
+@pytest.mark.asyncio
+async def test_single_insert_creates_partition_and_caches_bounds(session, monkeypatch):
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=datetime(2025, 3, 10), wind_speed=1.0
+    )
+
+    in_default = await session.scalar(text(f'SELECT count(*) FROM {DEFAULT_PARTITION}'))
+    assert 'data_p202503' in await get_partition_bounds(session)
+    assert in_default == 0
+
+    # Criada por esta transação não entra no cache (pode ser desfeita); já
+    # commitada, a próxima conferência no catálogo a registra
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=datetime(2025, 3, 15), wind_speed=1.5
+    )
+
+    async def catalog_query(db):
+        raise AssertionError('partição já conhecida não consulta o catálogo')
+
+    # Segunda inserção no mesmo mês: conferida só em memória
+    monkeypatch.setattr(partitions, 'get_partition_bounds', catalog_query)
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=datetime(2025, 3, 20), wind_speed=2.0
+    )
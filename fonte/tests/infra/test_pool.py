@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.infra.database.pool import InstrumentedPool, connect_args
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_counts_overflow_and_timeouts(engine):
+    pooled = create_async_engine(
+        engine.url,
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    try:
+        async with pooled.connect() as first, pooled.connect() as second:
+            await first.execute(text('SELECT 1'))
+            await second.execute(text('SELECT 1'))
+            busy = pooled.pool.summary()
+
+            # Pool e overflow ocupados: o terceiro checkout espera e estoura
+            with pytest.raises(exc.TimeoutError):
+                async with pooled.connect():
+                    pass
+
+        summary = pooled.pool.summary()
+    finally:
+        await pooled.dispose()
+
+    checked_out_expected = 2
+    assert busy['checked_out'] == checked_out_expected
+    assert busy['overflow'] == 1
+    assert summary['checked_out'] == 0
+    assert summary['checkouts'] == checked_out_expected
+    assert summary['connects'] == checked_out_expected
+    assert summary['overflow_checkouts'] == 1
+    assert summary['timeouts'] == 1
+    assert summary['wait_seconds_max'] >= pooled.pool.timeout()
+
+
+@pytest.mark.asyncio
+async def test_connect_args_statement_timeout(engine):
+    pooled = create_async_engine(
+        engine.url, connect_args=connect_args(1234, prepare_threshold=None)
+    )
+    try:
+        async with pooled.connect() as conn:
+            timeout = await conn.scalar(text('SHOW statement_timeout'))
+    finally:
+        await pooled.dispose()
+
+    assert timeout == '1234ms'
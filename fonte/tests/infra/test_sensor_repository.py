@@ -1,9 +1,16 @@
-from datetime import datetime, timedelta
+import statistics
+from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pytest
+from sqlalchemy import func, select, text
 
-from app.infra.models.sensor import SensorData
-from app.infra.repositories.sensor_repository import SensorRepository
+from app.config.config import settings
+from app.infra.models.sensor import SensorData, SensorRollup
+from app.infra.repositories.sensor_repository import (
+    METRIC_COLUMNS,
+    SensorRepository,
+)
 
 
 @pytest.mark.asyncio
@@ -134,3 +141,329 @@ async def test_get_data_with_dynamic_columns(session):
     assert 'power' not in results[0]
     assert results[0]['wind_speed'] == data1.wind_speed
     assert results[0]['timestamp'] == data1.timestamp
+
+
+@pytest.mark.asyncio
+async def test_get_data_by_range_keyset_pagination(session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    # Registros com o mesmo timestamp: o id desempata o cursor
+    for wind_speed in (1.0, 2.0, 3.0):
+        await SensorRepository.insert_sensor_data(
+            session, timestamp=now, wind_speed=wind_speed
+        )
+
+    first_page = await SensorRepository.get_data_by_range(
+        session, start_date=now, end_date=now, limit=2
+    )
+    last = first_page[-1]
+    second_page = await SensorRepository.get_data_by_range(
+        session, start_date=now, end_date=now, limit=2, after=(last.timestamp, last.id)
+    )
+
+    assert [r.wind_speed for r in first_page] == [1.0, 2.0]
+    assert [r.wind_speed for r in second_page] == [3.0]
+
+
+@pytest.mark.asyncio
+async def test_stream_data_by_range_yields_rows_in_order(session):
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    for minute in (2, 0, 1):
+        await SensorRepository.insert_sensor_data(
+            session, timestamp=now + timedelta(minutes=minute), power=float(minute)
+        )
+
+    rows = [
+        row
+        async for row in SensorRepository.stream_data_by_range(
+            session, start_date=now, end_date=now + timedelta(minutes=5)
+        )
+    ]
+
+    assert [row['power'] for row in rows] == [0.0, 1.0, 2.0]
+    assert set(rows[0]) == {
+        'id',
+        'timestamp',
+        'asset_id',
+        'wind_speed',
+        'power',
+        'ambient_temperature',
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_aggregates_by_range_matches_window_stats(session):
+    start = datetime(2025, 1, 1)
+    speeds = [10.0, 12.0, 17.0, 15.0]
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            # 00:00, 00:05, 00:09 na primeira janela; 00:10 na segunda
+            {'timestamp': start + timedelta(minutes=m), 'wind_speed': v}
+            for m, v in zip([0, 5, 9, 10], speeds)
+        ],
+    )
+    await session.commit()
+
+    rows = await SensorRepository.get_aggregates_by_range(
+        session,
+        start,
+        start + timedelta(hours=1),
+        bucket=timedelta(minutes=10),
+        metrics=['wind_speed'],
+    )
+
+    assert [r['timestamp'] for r in rows] == [start, start + timedelta(minutes=10)]
+    first, second = rows
+    assert first['wind_speed_mean'] == pytest.approx(statistics.mean(speeds[:3]))
+    assert first['wind_speed_min'] == min(speeds[:3])
+    assert first['wind_speed_max'] == max(speeds[:3])
+    assert first['wind_speed_std'] == pytest.approx(statistics.stdev(speeds[:3]))
+    # Uma única amostra: desvio padrão amostral indefinido, como no pandas
+    assert second['wind_speed_std'] is None
+
+
+async def _insert_rollup_sample(session, start):
+    """
+    Dados pelos três caminhos de inserção, com nulos e janelas repetidas.
+    """
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {
+                'timestamp': start + timedelta(minutes=i),
+                'wind_speed': float(i % 7),
+                'power': None if i % 3 else float(i * 10),
+                'ambient_temperature': 20.0 + i / 10,
+            }
+            for i in range(0, 90, 2)
+        ],
+        method='insert',
+    )
+    minutes = np.arange(1, 90, 2)
+    await SensorRepository.insert_bulk_columns(
+        session,
+        {
+            'timestamp': np.datetime64(start) + minutes.astype('timedelta64[m]'),
+            'wind_speed': minutes * 0.5,
+            'power': minutes * 3.0,
+            'ambient_temperature': np.full(len(minutes), 18.5),
+        },
+    )
+    await session.commit()
+    await SensorRepository.insert_sensor_data(
+        session, timestamp=start + timedelta(minutes=15, seconds=30), power=999.0
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('offset', 'length', 'bucket_minutes'),
+    [
+        # Intervalo alinhado, pontas parciais e intervalo menor que uma janela
+        (timedelta(0), timedelta(minutes=89), 10),
+        (timedelta(minutes=7), timedelta(minutes=61, seconds=30), 30),
+        (timedelta(minutes=12), timedelta(minutes=5), 10),
+    ],
+)
+async def test_get_aggregates_from_rollup_matches_raw_data(
+    session, offset, length, bucket_minutes
+):
+    start = datetime(2025, 1, 1)
+    await _insert_rollup_sample(session, start)
+
+    args = (
+        session,
+        start + offset,
+        start + offset + length,
+        timedelta(minutes=bucket_minutes),
+    )
+    raw = await SensorRepository.get_aggregates_by_range(*args)
+    rolled = await SensorRepository.get_aggregates_by_range(*args, rollup=True)
+
+    assert [r.pop('timestamp') for r in rolled] == [r.pop('timestamp') for r in raw]
+    for expected, row in zip(raw, rolled):
+        assert row == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_get_aggregates_from_rollup_converts_offset_to_utc(session):
+    start = datetime(2025, 1, 1)
+    await _insert_rollup_sample(session, start)
+
+    # 2024-12-31 21:07 -03:00 é 2025-01-01 00:07 em UTC
+    local = timezone(timedelta(hours=-3))
+    start_date = datetime(2024, 12, 31, 21, 7, tzinfo=local)
+    end_date = start_date + timedelta(minutes=45)
+    args = (session, start_date, end_date, timedelta(minutes=10))
+    raw = await SensorRepository.get_aggregates_by_range(*args)
+    rolled = await SensorRepository.get_aggregates_by_range(*args, rollup=True)
+
+    assert rolled[0]['timestamp'] == start
+    assert [r.pop('timestamp') for r in rolled] == [r.pop('timestamp') for r in raw]
+    for expected, row in zip(raw, rolled):
+        assert row == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_queries_filter_and_group_by_asset(session):
+    start = datetime(2025, 1, 1)
+    minutes = np.repeat(np.arange(20), 2)
+    await SensorRepository.insert_bulk_columns(
+        session,
+        {
+            'timestamp': np.datetime64(start) + minutes.astype('timedelta64[m]'),
+            'asset_id': np.tile([1, 2], 20),
+            'wind_speed': np.tile([5.0, 9.0], 20),
+            'power': minutes * 1.0,
+            'ambient_temperature': np.full(len(minutes), 20.0),
+        },
+    )
+    await session.commit()
+    end = start + timedelta(minutes=19)
+
+    rows = await SensorRepository.get_data_by_range(
+        session, start, end, metrics=['wind_speed'], asset_ids=[2]
+    )
+    assert {row['asset_id'] for row in rows} == {2}
+    assert {row['wind_speed'] for row in rows} == {9.0}
+
+    args = (session, start, end, timedelta(minutes=10))
+    raw = await SensorRepository.get_aggregates_by_range(*args, metrics=['wind_speed'])
+    rolled = await SensorRepository.get_aggregates_by_range(
+        *args, metrics=['wind_speed'], rollup=True, asset_ids=[1]
+    )
+    # Uma linha por janela e ativo, em ordem (timestamp, asset_id)
+    assert [(r['timestamp'].minute, r['asset_id']) for r in raw] == [
+        (0, 1),
+        (0, 2),
+        (10, 1),
+        (10, 2),
+    ]
+    assert [r['wind_speed_mean'] for r in raw] == [5.0, 9.0, 5.0, 9.0]
+    assert [r['asset_id'] for r in rolled] == [1, 1]
+    assert [r['wind_speed_mean'] for r in rolled] == [5.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_rollup_matches_incremental_rollup(session):
+    start = datetime(2025, 1, 1)
+    await _insert_rollup_sample(session, start)
+
+    def rows(result):
+        return [
+            {k: v for k, v in vars(r).items() if not k.startswith('_')}
+            for r in result.scalars()
+        ]
+
+    stmt = select(SensorRollup).order_by(SensorRollup.bucket_start)
+    incremental = rows(await session.execute(stmt))
+    session.expunge_all()
+
+    rebuilt_expected = 9
+    rebuilt = await SensorRepository.rebuild_rollup(session)
+    await session.commit()
+    assert rebuilt == rebuilt_expected
+    rebuilt_rows = rows(await session.execute(stmt))
+
+    assert len(incremental) == rebuilt_expected
+    assert [r.pop('bucket_start') for r in rebuilt_rows] == [
+        r.pop('bucket_start') for r in incremental
+    ]
+    for expected, row in zip(incremental, rebuilt_rows):
+        assert row == pytest.approx(expected)
+
+
+@pytest.mark.asyncio
+async def test_rollup_not_updated_when_disabled(session, monkeypatch):
+    monkeypatch.setattr(settings, 'ROLLUP_ENABLED', False)
+    await SensorRepository.insert_bulk_sensor_data(
+        session, [{'timestamp': datetime(2025, 1, 1), 'power': 1.0}]
+    )
+    await session.commit()
+
+    result = await session.execute(select(SensorRollup))
+    assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method', ['copy', 'insert'])
+async def test_insert_bulk_sensor_data_methods(session, method):
+    start = datetime(2025, 1, 1)
+    rows = [
+        {
+            'timestamp': start + timedelta(minutes=i),
+            'wind_speed': float(i),
+            'power': None if i % 2 else 100,
+            'ambient_temperature': 20.5,
+        }
+        for i in range(50)
+    ]
+
+    inserted = await SensorRepository.insert_bulk_sensor_data(session, rows, method)
+    await session.commit()
+
+    assert inserted == len(rows)
+    result = await SensorRepository.get_data_by_range(
+        session, start, start + timedelta(hours=1)
+    )
+    assert [r.timestamp for r in result] == [r['timestamp'] for r in rows]
+    assert [r.power for r in result] == [r['power'] for r in rows]
+    assert all(r.id is not None for r in result)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method', ['copy', 'insert'])
+async def test_insert_bulk_with_empty_input_is_a_no_op(session, method):
+    empty_columns = {
+        'timestamp': np.array([], dtype='datetime64[us]'),
+        **{metric: np.array([]) for metric in METRIC_COLUMNS},
+    }
+
+    assert await SensorRepository.insert_bulk_sensor_data(session, [], method) == 0
+    assert (
+        await SensorRepository.insert_bulk_columns(session, empty_columns, method) == 0
+    )
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_get_stats_by_range_counts_per_bucket_from_index(session):
+    start = datetime(2025, 1, 1)
+    minutes = np.r_[np.arange(0, 120, 10), np.arange(1500, 1510)]
+    # Ativo 1 na primeira hora, ativo 2 no restante
+    first_hour = 60
+    await SensorRepository.insert_bulk_columns(
+        session,
+        {
+            'timestamp': np.datetime64(start) + minutes.astype('timedelta64[m]'),
+            'asset_id': np.where(minutes < first_hour, 1, 2),
+            'wind_speed': minutes * 1.0,
+            'power': minutes * 1.0,
+            'ambient_temperature': minutes * 1.0,
+        },
+    )
+    await session.commit()
+    end = start + timedelta(days=2)
+
+    daily = await SensorRepository.get_stats_by_range(session, start, end)
+    hourly = await SensorRepository.get_stats_by_range(
+        session, start, end, 'hour', asset_ids=[2]
+    )
+
+    assert [(s['bucket_start'].day, s['count']) for s in daily] == [(1, 12), (2, 10)]
+    assert daily[0]['first_timestamp'] == start
+    assert daily[0]['last_timestamp'] == start + timedelta(minutes=110)
+    assert [(s['bucket_start'].hour, s['count']) for s in hourly] == [(1, 6), (1, 10)]
+
+    # Sem seq scan, a consulta é respondida só pelo índice (asset_id, timestamp)
+    await session.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = await session.execute(
+        text(
+            "EXPLAIN SELECT date_trunc('hour', timestamp), count(*), "
+            'min(timestamp), max(timestamp) FROM data '
+            "WHERE timestamp >= '2025-01-01' AND timestamp <= '2025-01-03' "
+            'AND asset_id IN (2) GROUP BY 1'
+        )
+    )
+    assert 'Index Only Scan' in '\n'.join(line for (line,) in plan)
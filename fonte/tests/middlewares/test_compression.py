@@ -0,0 +1,97 @@
+import gzip
+
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.middlewares.compression import CompressionMiddleware, parse_accept_encoding
+
+BODY = 'timestamp,wind_speed\n' * 200
+
+
+@pytest.fixture
+def compressed_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get('/big')
+    async def big():
+        return PlainTextResponse(BODY)
+
+    @app.get('/small')
+    async def small():
+        return PlainTextResponse('ok')
+
+    @app.get('/stream')
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield BODY
+
+        return StreamingResponse(chunks(), media_type='application/x-ndjson')
+
+    with TestClient(app) as client:
+        yield client
+
+
+def _raw_get(client, path, accept_encoding):
+    # Lê os bytes como vieram na rede, sem a descompressão automática do httpx
+    with client.stream(
+        'GET', path, headers={'Accept-Encoding': accept_encoding}
+    ) as response:
+        return response, b''.join(response.iter_raw())
+
+
+def test_parse_accept_encoding_ignores_q_zero():
+    assert parse_accept_encoding('gzip;q=0.5, zstd;q=0, br') == {'gzip', 'br'}
+
+
+def test_prefers_zstd_over_gzip(compressed_client):
+    response, raw = _raw_get(compressed_client, '/big', 'gzip, zstd')
+
+    assert response.headers['content-encoding'] == 'zstd'
+    assert response.headers['x-uncompressed-length'] == str(len(BODY))
+    assert 'compress;dur=' in response.headers['server-timing']
+    assert len(raw) < len(BODY)
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    assert decompressor.decompress(raw).decode() == BODY
+
+
+def test_compression_is_exposed_as_prometheus_metrics(compressed_client):
+    def sample(name: str) -> float:
+        return REGISTRY.get_sample_value(name, {'encoding': 'zstd'}) or 0.0
+
+    responses = sample('fonte_compression_duration_seconds_count')
+    bytes_in = sample('fonte_compression_input_bytes_total')
+    bytes_out = sample('fonte_compression_output_bytes_total')
+
+    _, raw = _raw_get(compressed_client, '/big', 'zstd')
+
+    assert sample('fonte_compression_duration_seconds_count') == responses + 1
+    assert sample('fonte_compression_input_bytes_total') == bytes_in + len(BODY)
+    assert sample('fonte_compression_output_bytes_total') == bytes_out + len(raw)
+
+
+def test_falls_back_to_gzip(compressed_client):
+    response, raw = _raw_get(compressed_client, '/big', 'gzip')
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert gzip.decompress(raw).decode() == BODY
+
+
+def test_small_response_is_not_compressed(compressed_client):
+    response, raw = _raw_get(compressed_client, '/small', 'zstd, gzip')
+
+    assert 'content-encoding' not in response.headers
+    assert raw == b'ok'
+
+
+def test_streaming_response_is_compressed_incrementally(compressed_client):
+    response, raw = _raw_get(compressed_client, '/stream', 'gzip')
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    assert gzip.decompress(raw).decode() == BODY * 3
@@ -0,0 +1,37 @@
+from http import HTTPStatus
+
+from prometheus_client import REGISTRY
+
+
+def latency_count(route: str, status: str) -> float:
+    value = REGISTRY.get_sample_value(
+        'fonte_http_request_duration_seconds_count',
+        {'method': 'GET', 'route': route, 'status': status},
+    )
+    return value or 0.0
+
+
+def test_metrics_records_latency_by_route_template(client):
+    before = latency_count('/api/v1/jobs/{job_id}', '404')
+    unmatched_before = latency_count('unmatched', '404')
+
+    client.get('/api/v1/jobs/first')
+    client.get('/api/v1/jobs/second')
+    client.get('/does-not-exist')
+
+    assert latency_count('/api/v1/jobs/{job_id}', '404') == before + 2
+    assert latency_count('unmatched', '404') == unmatched_before + 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    client.get('/health')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    body = response.text
+    assert 'fonte_http_request_duration_seconds_bucket' in body
+    assert 'fonte_http_response_size_bytes_sum{method="GET",route="/health"}' in body
+    assert 'fonte_db_pool_checked_out' in body
+    assert 'fonte_db_pool_wait_seconds_total' in body
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.infra.repositories.sensor_repository import SensorRepository
+from app.schemas.sensor import decode_live_cursor
+from app.services.live_tail import HEARTBEAT, RETRY_EVENT, live_events, live_tail
+
+# Tempo máximo de espera por um evento nos testes (s)
+EVENT_TIMEOUT = 5.0
+
+
+async def _next_rows(events) -> list[tuple[str, dict]]:
+    """
+    Próximo chunk com linhas, ignorando keep-alives: pares (id, data).
+    """
+    while True:
+        chunk = await asyncio.wait_for(anext(events), EVENT_TIMEOUT)
+        if chunk in {HEARTBEAT, RETRY_EVENT}:
+            continue
+        rows = []
+        for event in chunk.decode().strip().split('\n\n'):
+            id_line, data_line = event.split('\n')
+            rows.append((id_line.removeprefix('id: '), json.loads(data_line[6:])))
+        return rows
+
+
+async def _insert(session, start: datetime, minutes: range):
+    await SensorRepository.insert_bulk_sensor_data(
+        session,
+        [
+            {'timestamp': start + timedelta(minutes=m), 'power': float(m)}
+            for m in minutes
+        ],
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_live_events_streams_rows_committed_after_connect(session):
+    factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    start = datetime(2025, 1, 1)
+    await _insert(session, start, range(2))
+
+    events = live_events(factory, heartbeat=0.05)
+    try:
+        assert await anext(events) == RETRY_EVENT
+        # Nada novo desde a conexão: apenas keep-alive
+        assert await anext(events) == HEARTBEAT
+
+        await _insert(session, start, range(2, 4))
+        rows = await _next_rows(events)
+    finally:
+        await events.aclose()
+
+    assert [data['power'] for _, data in rows] == [2.0, 3.0]
+    assert rows[0][1]['timestamp'] == '2025-01-01T00:02:00'
+    # Posição (ingest_xid, id) crescente na ordem de envio
+    positions = [decode_live_cursor(event_id) for event_id, _ in rows]
+    assert positions == sorted(positions)
+    # A conexão LISTEN fecha junto com o último assinante
+    assert not live_tail.subscribers
+
+
+@pytest.mark.asyncio
+async def test_live_events_resumes_from_since_and_cursor(session):
+    factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    start = datetime(2025, 1, 1)
+    await _insert(session, start, range(5))
+
+    events = live_events(factory, since=start + timedelta(minutes=3))
+    try:
+        since_rows = await _next_rows(events)
+    finally:
+        await events.aclose()
+
+    events = live_events(
+        factory, after=decode_live_cursor(since_rows[0][0]), batch_rows=1
+    )
+    try:
+        # Lotes de uma linha até alcançar o fim da tabela
+        after_rows = await _next_rows(events)
+    finally:
+        await events.aclose()
+
+    assert [data['power'] for _, data in since_rows] == [3.0, 4.0]
+    assert [data['power'] for _, data in after_rows] == [4.0]
+
+
+@pytest.mark.asyncio
+async def test_live_events_waits_for_out_of_order_commits(session):
+    factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    start = datetime(2025, 1, 1)
+    # Cria a partição antes: as duas transações abaixo não disputam o lock
+    await _insert(session, start, range(1))
+
+    events = live_events(factory, heartbeat=0.05)
+    try:
+        assert await anext(events) == RETRY_EVENT
+        async with factory() as slow:
+            # A transação lenta grava antes (timestamp e id menores)...
+            await SensorRepository.insert_bulk_sensor_data(
+                slow, [{'timestamp': start + timedelta(minutes=5), 'power': 5.0}]
+            )
+            # ...e outra grava uma janela seguinte e commita primeiro
+            await _insert(session, start, range(30, 31))
+            # Com a lenta aberta nada é enviado: o cursor não passa por ela
+            for _ in range(3):
+                assert await anext(events) == HEARTBEAT
+            await slow.commit()
+
+        rows = await _next_rows(events)
+    finally:
+        await events.aclose()
+
+    assert [data['power'] for _, data in rows] == [5.0, 30.0]
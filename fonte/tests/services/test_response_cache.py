@@ -0,0 +1,69 @@
+import time
+from datetime import datetime, timedelta
+
+from app.services.response_cache import CachedResponse, ResponseCache
+
+DAY = datetime(2025, 1, 1)
+
+
+def _entry(day: int, size: int = 10) -> CachedResponse:
+    start = DAY + timedelta(days=day)
+    return CachedResponse(
+        b'x' * size, 'application/json', {}, start, start + timedelta(days=1)
+    )
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    cache = ResponseCache(max_bytes=25)
+    cache.put('a', _entry(0), cache.generation)
+    cache.put('b', _entry(1), cache.generation)
+    cache.get('a')
+    cache.put('c', _entry(2), cache.generation)
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.stats.evictions == 1
+    assert cache.size == len(b'x' * 20)
+
+
+def test_entry_larger_than_cache_is_not_stored():
+    cache = ResponseCache(max_bytes=5)
+    cache.put('a', _entry(0), cache.generation)
+
+    assert cache.get('a') is None
+    assert cache.stats.misses == 1
+
+
+def test_invalidate_removes_only_overlapping_ranges():
+    cache = ResponseCache(max_bytes=100)
+    cache.put('a', _entry(0), cache.generation)
+    cache.put('b', _entry(5), cache.generation)
+
+    cache.invalidate(DAY + timedelta(hours=12), DAY + timedelta(hours=13))
+
+    assert list(cache.entries) == ['b']
+    assert cache.stats.invalidations == 1
+
+
+def test_put_discards_response_read_before_an_invalidation():
+    cache = ResponseCache(max_bytes=100)
+    generation = cache.generation
+    cache.invalidate(DAY + timedelta(days=9), DAY + timedelta(days=9))
+
+    cache.put('a', _entry(0), generation)
+
+    assert cache.get('a') is None
+
+
+def test_replica_response_expires_after_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(time, 'monotonic', lambda: now)
+    cache = ResponseCache(max_bytes=100)
+    cache.put('replica', _entry(0), cache.generation, ttl=30)
+    cache.put('primary', _entry(1), cache.generation)
+
+    now += 31
+
+    # Sem TTL, só sai por invalidação ou LRU
+    assert cache.get('replica') is None
+    assert cache.get('primary') is not None
+    assert list(cache.entries) == ['primary']
@@ -1,10 +1,18 @@
 from datetime import datetime, timedelta
 
+import numpy as np
 import pytest
 from sqlalchemy import func, select
 
 from app.infra.models.sensor import SensorData
-from app.services.sensor_data_generator import SensorDataGenerator
+from app.services.sensor_data_generator import (
+    CUT_IN_SPEED,
+    RATED_POWER,
+    RATED_SPEED,
+    WIND_MAX,
+    SensorDataGenerator,
+    power_curve,
+)
 
 
 @pytest.mark.asyncio
@@ -44,3 +52,58 @@ async def test_generate_data_integration(session):
     wind_speed_started = 0
     wind_speed_ended = 25
     assert wind_speed_started <= sample.wind_speed <= wind_speed_ended
+
+
+def test_iter_batches_is_seeded_and_chunked():
+    start_date = datetime(2024, 1, 1)
+    chunk_size = 500
+    first = SensorDataGenerator(None, chunk_size=chunk_size, seed=42)
+    second = SensorDataGenerator(None, chunk_size=chunk_size, seed=42)
+
+    batches = list(first.iter_batches(start_date, days=1))
+    again = list(second.iter_batches(start_date, days=1))
+
+    assert [len(b['timestamp']) for b in batches] == [500, 500, 440]
+    for batch, same in zip(batches, again):
+        for name, values in batch.items():
+            np.testing.assert_array_equal(values, same[name])
+
+    timestamps = np.concatenate([b['timestamp'] for b in batches])
+    wind_speed = np.concatenate([b['wind_speed'] for b in batches])
+    power = np.concatenate([b['power'] for b in batches])
+    assert timestamps[0] == np.datetime64(start_date)
+    assert (np.diff(timestamps) == np.timedelta64(1, 'm')).all()
+    assert wind_speed.min() >= 0
+    assert wind_speed.max() <= WIND_MAX
+    assert power.min() >= 0
+    assert power.max() <= RATED_POWER
+    # Abaixo do cut-in a turbina não gera
+    assert (power[wind_speed < CUT_IN_SPEED] == 0).all()
+
+
+def test_iter_batches_multiple_assets():
+    start_date = datetime(2024, 1, 1)
+    assets = 3
+    generator = SensorDataGenerator(None, chunk_size=500, seed=7, assets=assets)
+
+    batches = list(generator.iter_batches(start_date, days=1))
+
+    # Lotes de minutos inteiros: 166 minutos x 3 ativos cabem em 500 linhas
+    assert len(batches[0]['timestamp']) == 166 * assets
+    asset_ids = np.concatenate([b['asset_id'] for b in batches])
+    timestamps = np.concatenate([b['timestamp'] for b in batches])
+    wind_speed = np.concatenate([b['wind_speed'] for b in batches])
+    assert len(timestamps) == 24 * 60 * assets
+    np.testing.assert_array_equal(asset_ids[:6], [1, 2, 3, 1, 2, 3])
+    assert (timestamps[:assets] == np.datetime64(start_date)).all()
+    # Cada ativo tem o seu passeio de vento
+    by_asset = wind_speed.reshape(-1, assets)
+    assert not np.array_equal(by_asset[:, 0], by_asset[:, 1])
+
+
+def test_power_curve():
+    speeds = np.array([0.0, CUT_IN_SPEED, RATED_SPEED, 20.0, 30.0])
+
+    power = power_curve(speeds)
+
+    np.testing.assert_array_equal(power, [0.0, 0.0, RATED_POWER, RATED_POWER, 0.0])
@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.infra.models.sensor import SensorData
+from app.schemas.sensor import SensorDataCreate
+from app.services.sensor_ingest import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_concurrent_submits(session):
+    session_factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    batcher = MicroBatcher(max_rows=100, max_delay=0.05)
+    start = datetime(2025, 1, 1)
+    readings = [
+        SensorDataCreate(timestamp=start + timedelta(minutes=i), power=float(i))
+        for i in range(20)
+    ]
+
+    await asyncio.gather(*(batcher.submit(r, session_factory) for r in readings))
+
+    count = await session.scalar(select(func.count()).select_from(SensorData))
+    assert count == len(readings)
+    assert batcher.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_when_full(session):
+    session_factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    batcher = MicroBatcher(max_rows=5, max_delay=10)
+    readings = [
+        SensorDataCreate(timestamp=datetime(2025, 1, 1, 0, i)) for i in range(10)
+    ]
+
+    # Sem esperar o atraso: dois lotes cheios
+    await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(r, session_factory) for r in readings)),
+        timeout=5,
+    )
+
+    flushes_expected = 2
+    assert batcher.flushes == flushes_expected
@@ -1,8 +1,20 @@
 from http import HTTPStatus
 
+from app.config.config import settings
+
 
 def test_health_check(client):
     response = client.get('/health')
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'status': 'ok'}
+
+
+def test_pool_status(client):
+    response = client.get('/health/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert body['size'] == settings.DB_POOL_SIZE
+    assert body['max_overflow'] == settings.DB_MAX_OVERFLOW
+    assert {'checked_out', 'checkouts', 'timeouts', 'wait_seconds_max'} <= set(body)